@@ -3,18 +3,20 @@ Datasets API Endpoints
 Handles Excel file upload and dataset management
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 import os
+import asyncio
 from pathlib import Path
 import logging
 
 from app.db.database import get_session
 from app.core.dependencies import get_current_user
 from app.db.repositories.eval import EvalDatasetRepository
-from app.schemas.eval import EvalDatasetResponse
+from app.schemas.eval import EvalDatasetResponse, RunEstimateRequest
 from app.services.excel_service import ExcelService
+from app.services.run_estimator import estimate_run, warm_token_counts
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +29,7 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 
 @router.post("/upload", response_model=EvalDatasetResponse)
 async def upload_dataset(
+    background_tasks: BackgroundTasks,
     project_id: UUID = Query(..., description="Project ID to upload dataset to"),
     file: UploadFile = File(..., description="Excel file (.xlsx or .xls)"),
     session: AsyncSession = Depends(get_session),
@@ -36,6 +39,7 @@ async def upload_dataset(
     Upload an Excel file as a dataset for evaluation
     
     Args:
+        background_tasks: Runs the token-count warm-up after the response
         project_id: The project this dataset belongs to
         file: The Excel file to upload
         session: Database session
@@ -114,6 +118,9 @@ async def upload_dataset(
         
         logger.info(f"Dataset created in database with ID {dataset.id}")
         
+        # Tokenize the columns now so the first estimate is served from cache
+        background_tasks.add_task(_warm_dataset_token_counts, str(file_path))
+        
         return EvalDatasetResponse(
             id=dataset.id,
             project_id=dataset.project_id,
@@ -135,6 +142,14 @@ async def upload_dataset(
         )
 
 
+def _warm_dataset_token_counts(file_path: str) -> None:
+    """Background warm-up after upload; a failure only costs the first estimate its cache"""
+    try:
+        warm_token_counts(ExcelService.load_dataframe(file_path), ExcelService.dataframe_key(file_path))
+    except Exception as e:
+        logger.warning(f"Token count warm-up failed for {file_path}: {str(e)}")
+
+
 @router.get("/{dataset_id}", response_model=EvalDatasetResponse)
 async def get_dataset(
     dataset_id: UUID,
@@ -265,6 +280,79 @@ async def preview_dataset(
         )
 
 
+@router.post("/{dataset_id}/estimate")
+async def estimate_dataset_run(
+    dataset_id: UUID,
+    request: RunEstimateRequest,
+    session: AsyncSession = Depends(get_session),
+    current_user = Depends(get_current_user),
+):
+    """
+    Estimate tokens, cost and wall time of running a prompt over a dataset
+    Nothing is sent to any provider; use this to reject runs before spending
+    
+    Args:
+        dataset_id: The dataset ID
+        request: System prompt, user prompt template, models and max_tokens
+        session: Database session
+        current_user: Current authenticated user
+        
+    Returns:
+        Dictionary with per-model input tokens, output token range, cost range
+        and expected wall time
+        
+    Raises:
+        400: Template references missing columns or unknown model
+        404: Dataset not found
+    """
+    
+    try:
+        repo = EvalDatasetRepository(session)
+        dataset = await repo.get_by_id(dataset_id)
+        
+        if not dataset:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Dataset not found"
+            )
+        
+        # Parsing and tokenizing are CPU-bound; keep the event loop free
+        dataset_key = ExcelService.dataframe_key(dataset.file_path)
+        df = await asyncio.to_thread(ExcelService.load_dataframe, dataset.file_path)
+        
+        try:
+            estimate = await asyncio.to_thread(
+                estimate_run,
+                df,
+                request.system_prompt,
+                request.user_prompt_template,
+                request.models,
+                request.max_tokens,
+                request.concurrency,
+                dataset_key,
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        return {
+            "dataset_id": str(dataset.id),
+            "name": dataset.name,
+            **estimate,
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error estimating dataset run: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error estimating dataset run"
+        )
+
+
 @router.delete("/{dataset_id}")
 async def delete_dataset(
     dataset_id: UUID,
@@ -297,6 +385,7 @@ async def delete_dataset(
         if os.path.exists(dataset.file_path):
             os.remove(dataset.file_path)
             logger.info(f"Deleted file: {dataset.file_path}")
+        ExcelService.remove_row_spill(dataset.file_path)
         
         # Delete from database
         await repo.delete(dataset_id)
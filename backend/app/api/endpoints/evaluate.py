@@ -1,16 +1,26 @@
 """
 Evaluation Endpoints - WITH DEBUGGING
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from starlette.requests import ClientDisconnect
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from pydantic import BaseModel
-from typing import List, AsyncGenerator
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, AsyncGenerator, AsyncIterator, Dict, Any, Optional, Tuple
 from app.db.database import get_session
+from app.services.circuit_breaker import circuit_events_since, last_circuit_event_seq
+from app.services.hedging import HedgePolicy
 from app.services.llm_evaluation import LLMEvaluationService
+from app.services.result_writer import ResultWriter, stream_entry_values
+from app.services.run_store import (
+    RUN_CANCELLED, RUN_COMPLETED, RUN_FAILED, RUN_INTERRUPTED, RUN_RUNNING, get_run_store
+)
+from app.utils.ndjson_frames import FrameEncoder
+from config import get_settings
+from datetime import datetime
 import asyncio
-import json
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.DEBUG)
@@ -21,28 +31,229 @@ class EvaluationRow(BaseModel):
     question: str
     expected_answer: str
 
-class EvaluationRequest(BaseModel):
+class EvaluationSettings(BaseModel):
     system_prompt: str
     user_prompt_template: str
-    rows: List[EvaluationRow]
     model_a: str = "gpt-4"
     model_b: str = "deepseek-chat"
     openai_key: str
     deepseek_key: str
     anthropic_key: str = ""
+    # Sampling temperature for both models; responses are only served from the
+    # LLM cache at or below LLM_CACHE_MAX_TEMPERATURE (sampled calls bypass it)
+    temperature: float = Field(0.7, ge=0.0, le=2.0)
+    # Stream provider tokens as token_delta events before each row_complete
+    stream_tokens: bool = False
+    # Send a duplicate request for calls running past the model's rolling p95
+    hedge_requests: bool = False
+    # Rows evaluated at once (defaults to EVAL_CONCURRENCY)
+    concurrency: Optional[int] = Field(None, ge=1, le=64)
+    # Emit row_complete events in row order instead of as rows finish
+    ordered: bool = False
+    # Stream encoding: events finished within batch_window_ms (or batch_max_bytes)
+    # go out as one frame; gzip sets Content-Encoding; compact drops fields the client sent
+    batch_window_ms: int = Field(0, ge=0, le=5000)
+    batch_max_bytes: int = Field(65536, ge=1024, le=4 * 1024 * 1024)
+    gzip: bool = False
+    compact: bool = False
+    # Existing evaluation cycle to persist results to (eval_entries + eval_cycle_summary)
+    eval_cycle_id: Optional[str] = None
 
-async def evaluate_rows_stream(
-    request: EvaluationRequest
-) -> AsyncGenerator[str, None]:
-    """Stream evaluation results row by row"""
+class EvaluationRequest(EvaluationSettings):
+    rows: List[EvaluationRow]
+
+class StreamedEvaluationHeader(EvaluationSettings):
+    """First line of an NDJSON /evaluate/rows/ndjson body (one EvaluationRow per following line)"""
+    # Row count, if known upfront (enables progress percentages)
+    total_rows: Optional[int] = Field(None, ge=0)
+    # Continue this run: rows with a saved result are skipped, saved events after cursor replayed
+    run_id: Optional[str] = None
+    cursor: int = Field(0, ge=0)
+
+class ResumeRequest(BaseModel):
+    # API keys are never stored with the run, so they are sent again
+    openai_key: str
+    deepseek_key: str
+    anthropic_key: str = ""
+    # Last event_id the client received (saved events after it are replayed)
+    cursor: int = Field(0, ge=0)
+    # Alternatively replay saved events from this row number on
+    from_row: Optional[int] = Field(None, ge=1)
+    concurrency: Optional[int] = Field(None, ge=1, le=64)
+
+_API_KEY_FIELDS = {"openai_key", "deepseek_key", "anthropic_key"}
+
+async def _run_row(
+    llm_service: LLMEvaluationService,
+    request: EvaluationSettings,
+    row: EvaluationRow,
+    row_number: int,
+    events: asyncio.Queue
+) -> None:
+    """
+    Evaluate one row (both models in parallel)
+    Puts (event, error) on events: token_delta events as chunks arrive when
+    streaming tokens, then one row_complete or row_error
+    """
+    on_delta = None
+    if request.stream_tokens:
+        def on_delta(model: str, text: str) -> None:
+            events.put_nowait(({
+                "type": "token_delta",
+                "row_number": row_number,
+                "model": model,
+                "model_name": request.model_a if model == "a" else request.model_b,
+                "delta": text,
+            }, None))
+    
+    try:
+        logger.info(f"=== Processing row {row_number} ===")
+        logger.debug(f"Question: {row.question}")
+        logger.debug(f"Expected Answer: {row.expected_answer}")
+        
+        result = await llm_service.evaluate_row(
+            system_prompt=request.system_prompt,
+            user_prompt_template=request.user_prompt_template,
+            question=row.question,
+            expected_answer=row.expected_answer,
+            model_a=request.model_a,
+            model_b=request.model_b,
+            on_delta=on_delta
+        )
+        
+        logger.debug(f"Result for row {row_number}:")
+        logger.debug(f"  Model A response: {result['model_a_response'][:100]}")
+        logger.debug(f"  Model B response: {result['model_b_response'][:100]}")
+        logger.debug(f"  Winner: {result['winner']}")
+        
+        events.put_nowait(({"type": "row_complete", "row_number": row_number, "result": result}, None))
+    except Exception as e:
+        events.put_nowait(({"type": "row_error", "row_number": row_number, "error": str(e)}, e))
+
+async def _watch_disconnect(http_request: Request, events: asyncio.Queue) -> None:
+    """Put a disconnected event on the queue once the client has gone away"""
+    poll_seconds = get_settings().EVAL_DISCONNECT_POLL_SECONDS
+    while not await http_request.is_disconnected():
+        await asyncio.sleep(poll_seconds)
+    events.put_nowait(({"type": "disconnected"}, None))
+
+async def _keep_lease(run_id: str, owner: str) -> None:
+    """Renew the run's lease while its stream is alive"""
+    store = get_run_store()
+    seconds = get_settings().EVAL_RUN_LEASE_SECONDS
+    while True:
+        await asyncio.sleep(seconds / 3)
+        try:
+            if not await store.call("acquire_lease", run_id, owner, seconds):
+                logger.warning(f"Lease of run {run_id} was taken over by another stream")
+        except Exception as e:
+            logger.warning(f"Could not renew lease of run {run_id}: {str(e)}")
+
+async def _acquire_run_lease(run_id: str) -> str:
+    """
+    Lease a run for a resuming stream
+    
+    Raises:
+        409: Another stream is still evaluating the run
+    """
+    owner = uuid.uuid4().hex
+    if not await get_run_store().call("acquire_lease", run_id, owner, get_settings().EVAL_RUN_LEASE_SECONDS):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Run is still being evaluated by another stream; resume it after that stream ends"
+        )
+    return owner
+
+# Strong references to fire-and-forget tasks (the loop only keeps weak ones)
+_background_tasks: set = set()
+
+def _close_in_background(coro) -> None:
+    task = asyncio.ensure_future(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+async def _finish_run(store, run_id: str, status: Optional[str], lease_owner: Optional[str]) -> None:
+    """Record how an unfinished run ended (status None: already recorded) and release its lease"""
+    if status is not None:
+        try:
+            await store.call("update_meta", run_id, {"status": status})
+        except Exception as e:
+            logger.warning(f"Could not update status of run {run_id}: {str(e)}")
+    try:
+        await store.call("release_lease", run_id, lease_owner)
+    except Exception as e:
+        logger.warning(f"Could not release lease of run {run_id}: {str(e)}")
+
+async def _list_rows(rows: List[EvaluationRow]) -> AsyncIterator[Tuple[int, EvaluationRow]]:
+    for row_number, row in enumerate(rows, 1):
+        yield row_number, row
+
+async def _ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Non-empty lines of a streamed body (only one partial line is buffered)"""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+async def _ndjson_rows(lines: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, EvaluationRow]]:
+    row_number = 0
+    async for line in lines:
+        row_number += 1
+        try:
+            yield row_number, EvaluationRow.model_validate_json(line)
+        except ValidationError as e:
+            raise ValueError(f"Invalid row {row_number}: {e.errors()[0]['msg']}")
+
+async def _evaluation_events(
+    request: EvaluationSettings,
+    frames: FrameEncoder,
+    run_id: str,
+    rows: AsyncIterator[Tuple[int, EvaluationRow]],
+    total_rows: Optional[int] = None,
+    resume: bool = False,
+    cursor: int = 0,
+    from_row: Optional[int] = None,
+    run_request: Optional[Dict[str, Any]] = None,
+    http_request: Optional[Request] = None,
+    body_streamed: bool = False,
+    lease_owner: Optional[str] = None
+) -> AsyncGenerator[Optional[Dict[str, Any]], None]:
+    """
+    Evaluation events of a run (None when buffered frames are due for a flush)
+    Rows are pulled from `rows` only when one of the `concurrency` slots is
+    free, so a streamed request body is read as fast as rows are evaluated;
+    row_complete events are sent as rows finish (or in row order with ordered=True)
+    Row events are saved in the run store with an event_id; with resume=True,
+    saved events after `cursor` (or from `from_row`) are replayed and only
+    rows without a saved result are evaluated (the memory run store replays
+    rows past its per-run limit as "compacted" events without the result)
+    When the client disconnects (polled on http_request, or the response task
+    being cancelled), in-flight rows are cancelled and the run is marked cancelled
+    The run's lease (lease_owner, taken by the resume endpoints; taken here for
+    new runs) is renewed while the stream is alive and released when it ends
+    """
+    in_flight: Dict[int, asyncio.Task] = {}
+    store = get_run_store()
+    final_status = None
+    disconnect_watcher: Optional[asyncio.Task] = None
+    feeder: Optional[asyncio.Task] = None
+    writer: Optional[ResultWriter] = None
+    lease_owner = lease_owner or uuid.uuid4().hex
+    lease_keeper: Optional[asyncio.Task] = None
     try:
         # DEBUG: Log the request
         logger.debug(f"=== EVALUATION REQUEST RECEIVED ===")
+        logger.debug(f"Run ID: {run_id} (resume: {resume})")
         logger.debug(f"Model A: {request.model_a}")
         logger.debug(f"Model B: {request.model_b}")
         logger.debug(f"OpenAI Key length: {len(request.openai_key) if request.openai_key else 0}")
         logger.debug(f"DeepSeek Key length: {len(request.deepseek_key) if request.deepseek_key else 0}")
-        logger.debug(f"Number of rows: {len(request.rows)}")
+        logger.debug(f"Number of rows: {total_rows if total_rows is not None else 'streamed'}")
         logger.debug(f"System prompt: {request.system_prompt[:50]}...")
         logger.debug(f"User prompt template: {request.user_prompt_template[:50]}...")
         
@@ -50,7 +261,7 @@ async def evaluate_rows_stream(
         if not request.openai_key or not request.deepseek_key:
             logger.error("❌ API keys missing!")
             error_data = {"type": "error", "error": "OpenAI and DeepSeek API keys are required"}
-            yield json.dumps(error_data) + "\n"
+            yield error_data
             return
         
         # Create service with user-provided keys
@@ -58,82 +269,371 @@ async def evaluate_rows_stream(
         llm_service = LLMEvaluationService(
             openai_key=request.openai_key.strip(),
             deepseek_key=request.deepseek_key.strip(),
-            anthropic_key=request.anthropic_key.strip()
+            anthropic_key=request.anthropic_key.strip(),
+            temperature=request.temperature,
+            hedge_policy=HedgePolicy() if request.hedge_requests else None
         )
         
-        total_rows = len(request.rows)
+        concurrency = request.concurrency or get_settings().EVAL_CONCURRENCY
+        circuit_seq = last_circuit_event_seq()
+        
+        # Rows with a saved row_complete / row_error are not evaluated again
+        saved_events: List[Dict[str, Any]] = []
+        if resume:
+            saved_events = await store.call("get_events", run_id)
+            await store.call("update_meta", run_id, {"status": RUN_RUNNING})
+        else:
+            await store.call("create", run_id, {
+                "status": RUN_RUNNING,
+                "total_rows": total_rows,
+                "created_at": datetime.utcnow().isoformat(),
+                "request": run_request if run_request is not None else request.model_dump(exclude=_API_KEY_FIELDS),
+            })
+            await store.call("acquire_lease", run_id, lease_owner, get_settings().EVAL_RUN_LEASE_SECONDS)
+        lease_keeper = asyncio.create_task(_keep_lease(run_id, lease_owner))
+        done_rows = {event["row_number"] for event in saved_events}
+        
+        # Results go to the database behind the stream, in batches
+        row_inputs: Dict[int, Dict[str, str]] = {}
+        if request.eval_cycle_id:
+            writer = ResultWriter(request.eval_cycle_id, total_rows)
+            await writer.start()
         
         # Send start signal
-        start_data = {"type": "start", "total_rows": total_rows}
-        yield json.dumps(start_data) + "\n"
-        logger.info(f"Starting evaluation with {total_rows} rows")
+        start_data = {"type": "start", "run_id": run_id, "total_rows": total_rows, "concurrency": concurrency}
+        if resume:
+            start_data["resumed"] = True
+            start_data["completed_rows"] = len(done_rows)
+        yield start_data
+        logger.info(f"Starting evaluation run {run_id} ({len(done_rows)} rows already done), {concurrency} in flight")
         
-        # Process rows ONE BY ONE
-        for idx, row in enumerate(request.rows):
+        for saved in saved_events:
+            if saved["event_id"] > cursor and (from_row is None or saved["row_number"] >= from_row):
+                yield {**saved, "replayed": True}
+        
+        events: asyncio.Queue = asyncio.Queue()
+        # One slot per row in flight or waiting to be emitted; released as each
+        # row's final event is sent, so in ordered mode one stalled row caps the
+        # reorder buffer at `concurrency` rows instead of letting it grow
+        slots = asyncio.Semaphore(concurrency)
+        
+        async def feed_rows() -> None:
+            rows_read = 0
             try:
-                logger.info(f"=== Processing row {idx + 1}/{total_rows} ===")
-                logger.debug(f"Question: {row.question}")
-                logger.debug(f"Expected Answer: {row.expected_answer}")
-                
-                # Call both APIs IN PARALLEL
-                result = await llm_service.evaluate_row(
-                    system_prompt=request.system_prompt,
-                    user_prompt_template=request.user_prompt_template,
-                    question=row.question,
-                    expected_answer=row.expected_answer,
-                    model_a=request.model_a,
-                    model_b=request.model_b
-                )
-                
-                logger.debug(f"Result for row {idx + 1}:")
-                logger.debug(f"  Model A response: {result['model_a_response'][:100]}")
-                logger.debug(f"  Model B response: {result['model_b_response'][:100]}")
-                logger.debug(f"  Winner: {result['winner']}")
-                
-                progress = int(((idx + 1) / total_rows) * 100)
-                
-                # Stream this result
-                response_data = {
-                    "type": "row_complete",
-                    "row_number": idx + 1,
-                    "total_rows": total_rows,
-                    "progress": progress,
-                    "result": result
-                }
-                
-                yield json.dumps(response_data) + "\n"
-                logger.info(f"✅ Row {idx + 1} completed - progress: {progress}%")
-                
-                await asyncio.sleep(0.05)
-                
+                async for row_number, row in rows:
+                    rows_read = row_number
+                    if row_number in done_rows:
+                        continue
+                    await slots.acquire()
+                    if writer is not None:
+                        row_inputs[row_number] = row.model_dump()
+                    in_flight[row_number] = asyncio.create_task(
+                        _run_row(llm_service, request, row, row_number, events)
+                    )
+                events.put_nowait(({"type": "rows_done", "rows_read": rows_read}, None))
             except Exception as e:
-                logger.error(f"❌ Error processing row {idx + 1}: {str(e)}", exc_info=True)
-                response_data = {
-                    "type": "row_error",
-                    "row_number": idx + 1,
-                    "error": str(e)
-                }
-                yield json.dumps(response_data) + "\n"
+                events.put_nowait(({"type": "rows_failed", "rows_read": rows_read}, e))
+        
+        feeder = asyncio.create_task(feed_rows())
+        # Reading a streamed body and polling for disconnects both consume ASGI
+        # messages, so for streamed bodies the watcher starts after the last row
+        if http_request is not None and not body_streamed:
+            disconnect_watcher = asyncio.create_task(_watch_disconnect(http_request, events))
+        
+        # Ordered mode: finished rows wait here until every earlier row is out
+        finished: Dict[int, Dict[str, Any]] = {}
+        next_row_number = 1
+        while next_row_number in done_rows:
+            next_row_number += 1
+        emitted = len(done_rows)
+        rows_done = False
+        
+        while in_flight or not rows_done:
+            try:
+                event, error = await asyncio.wait_for(events.get(), frames.time_to_flush())
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            if event["type"] == "token_delta":
+                yield event
+                continue
+            if event["type"] == "rows_done":
+                rows_done = True
+                total_rows = event["rows_read"]
+                if http_request is not None and disconnect_watcher is None:
+                    disconnect_watcher = asyncio.create_task(_watch_disconnect(http_request, events))
+                continue
+            if event["type"] == "rows_failed":
+                if isinstance(error, ClientDisconnect):
+                    event = {"type": "disconnected"}
+                else:
+                    logger.error(f"❌ Reading rows failed after row {event['rows_read']}: {str(error)}")
+                    final_status = RUN_FAILED
+                    await store.call("update_meta", run_id, {"status": RUN_FAILED, "error": str(error)})
+                    yield {"type": "error", "error": str(error)}
+                    return
+            if event["type"] == "disconnected":
+                logger.warning(f"Client disconnected from run {run_id}, cancelling {len(in_flight)} rows in flight")
+                final_status = RUN_CANCELLED
+                # Wait for the cancellations so provider connections are back in the pool
+                feeder.cancel()
+                for task in in_flight.values():
+                    task.cancel()
+                await asyncio.gather(*in_flight.values(), return_exceptions=True)
+                in_flight.clear()
+                return
+            
+            row_number = event["row_number"]
+            in_flight.pop(row_number, None)
+            
+            if error is not None:
+                # Invalid API key etc.: every remaining row would fail the same way
+                if getattr(error, "aborts_cycle", False):
+                    logger.error(f"❌ Aborting evaluation at row {row_number}: {str(error)}")
+                    final_status = RUN_FAILED
+                    await store.call("update_meta", run_id, {"status": RUN_FAILED, "error": str(error)})
+                    yield {"type": "error", "row_number": row_number, "error": str(error)}
+                    return
+                logger.error(f"❌ Error processing row {row_number}: {str(error)}", exc_info=error)
+            
+            finished[row_number] = event
+            ready = sorted(finished) if not request.ordered else []
+            while request.ordered and next_row_number in finished:
+                ready.append(next_row_number)
+                next_row_number += 1
+                while next_row_number in done_rows:
+                    next_row_number += 1
+            
+            for number in ready:
+                response_data = finished.pop(number)
+                slots.release()
+                emitted += 1
+                if response_data["type"] == "row_complete":
+                    response_data["total_rows"] = total_rows
+                    if total_rows:
+                        response_data["progress"] = int((emitted / total_rows) * 100)
+                    logger.info(f"✅ Row {number} completed - {emitted} rows done")
+                response_data["event_id"] = await store.call("append_event", run_id, response_data)
+                if writer is not None:
+                    writer.submit(stream_entry_values(
+                        writer.eval_cycle_id,
+                        number,
+                        response_data,
+                        request.system_prompt,
+                        request.user_prompt_template,
+                        request.model_a,
+                        request.model_b,
+                        input_data=row_inputs.pop(number, None)
+                    ))
+                yield response_data
+            
+            # Provider circuit opened/closed since the last row
+            for circuit_event in circuit_events_since(circuit_seq, {"openai", "deepseek"}):
+                yield {"type": "circuit", **circuit_event}
+                circuit_seq = circuit_event["seq"]
+        
+        final_status = RUN_COMPLETED
+        await store.call("update_meta", run_id, {"status": RUN_COMPLETED, "total_rows": total_rows})
         
         # Send completion signal
-        complete_data = {"type": "complete", "total_rows": total_rows}
-        yield json.dumps(complete_data) + "\n"
+        complete_data = {"type": "complete", "run_id": run_id, "total_rows": total_rows}
+        if writer is not None:
+            writer.total_rows = total_rows
+            await writer.aclose("completed")
+            complete_data["eval_cycle_id"] = str(writer.eval_cycle_id)
+            if writer.unwritten:
+                complete_data["writer_error"] = f"{writer.unwritten} results could not be saved to the evaluation cycle"
+        # Released before the client hears of completion, so it can resume straight away
+        await store.call("release_lease", run_id, lease_owner)
+        yield complete_data
         logger.info(f"✅ Evaluation complete: all {total_rows} rows processed")
-        
+    
+    except asyncio.CancelledError:
+        # Starlette cancels the response task when it sees the client disconnect
+        logger.warning(f"Stream for run {run_id} cancelled, cancelling {len(in_flight)} rows in flight")
+        final_status = RUN_CANCELLED
+        raise
     except Exception as e:
         logger.error(f"❌ Stream error: {str(e)}", exc_info=True)
         error_data = {"type": "error", "error": str(e)}
-        yield json.dumps(error_data) + "\n"
+        yield error_data
+    finally:
+        # Aborted run or client went away: stop reading rows and the rows still in flight
+        if feeder is not None:
+            feeder.cancel()
+        for task in in_flight.values():
+            task.cancel()
+        if disconnect_watcher is not None:
+            disconnect_watcher.cancel()
+        if lease_keeper is not None:
+            lease_keeper.cancel()
+        if writer is not None and not writer.closed:
+            # Flush what finished; the stream itself is not waited for
+            _close_in_background(writer.aclose("cancelled" if final_status in (RUN_CANCELLED, None) else "failed"))
+        # The stream may be torn down by cancellation, so the store is updated in the background
+        unfinished_status = None if final_status in (RUN_COMPLETED, RUN_FAILED) else final_status or RUN_INTERRUPTED
+        _close_in_background(_finish_run(store, run_id, unfinished_status, lease_owner))
+
+async def evaluate_rows_stream(
+    request: EvaluationSettings,
+    run_id: str,
+    rows: AsyncIterator[Tuple[int, EvaluationRow]],
+    **options
+) -> AsyncGenerator[bytes, None]:
+    """
+    Stream evaluation results as NDJSON frames
+    Events are batched, compacted and gzipped per the request's stream options;
+    see _evaluation_events for the options
+    """
+    frames = FrameEncoder(
+        window_ms=request.batch_window_ms,
+        max_bytes=request.batch_max_bytes,
+        gzip=request.gzip,
+        compact=request.compact
+    )
+    events = _evaluation_events(request, frames, run_id, rows, **options)
+    try:
+        async for event in events:
+            frame = frames.flush() if event is None else frames.add(event)
+            if frame:
+                yield frame
+        frame = frames.close()
+        if frame:
+            yield frame
+    finally:
+        await events.aclose()
+
+_STREAM_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+    "Connection": "keep-alive"
+}
+
+def _stream_headers(request: EvaluationSettings, run_id: str) -> Dict[str, str]:
+    headers = {**_STREAM_HEADERS, "X-Run-Id": run_id}
+    if request.gzip:
+        headers["Content-Encoding"] = "gzip"
+    return headers
+
+class _StreamedBodyResponse(StreamingResponse):
+    """
+    StreamingResponse for requests whose body is still being read while the response streams
+    StreamingResponse listens for the disconnect message on `receive`, which would swallow
+    the remaining body; evaluate_rows_stream detects disconnects itself instead
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
 
 @router.post("/rows")
-async def evaluate_rows(request: EvaluationRequest):
-    """Stream evaluation results"""
+async def evaluate_rows(request: EvaluationRequest, http_request: Request):
+    """Stream evaluation results (the run_id in the start event can be used to resume)"""
+    run_id = uuid.uuid4().hex
+    return StreamingResponse(
+        evaluate_rows_stream(
+            request, run_id, _list_rows(request.rows), total_rows=len(request.rows), http_request=http_request
+        ),
+        media_type="application/x-ndjson",
+        headers=_stream_headers(request, run_id)
+    )
+
+@router.post("/rows/ndjson")
+async def evaluate_rows_ndjson(http_request: Request):
+    """
+    Stream evaluation results for a streamed NDJSON body: a StreamedEvaluationHeader
+    line, then one {"question", "expected_answer"} row per line
+    Evaluation starts with the first row while the rest is still uploading;
+    the body is read only as fast as rows are evaluated
+    Resuming (run_id in the header) returns 409 while another stream is still evaluating the run
+    """
+    lines = _ndjson_lines(http_request.stream())
+    try:
+        header = StreamedEvaluationHeader.model_validate_json(await lines.__anext__())
+    except StopAsyncIteration:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty body: expected a header line")
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.errors())
+
+    resume = header.run_id is not None
+    if resume and await get_run_store().call("get_meta", header.run_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Run not found or expired")
+    run_id = header.run_id or uuid.uuid4().hex
+    lease_owner = await _acquire_run_lease(run_id) if resume else None
+
+    # Rows are not kept: a streamed run is resumed by streaming the rows again with run_id
+    run_request = header.model_dump(exclude=_API_KEY_FIELDS | {"run_id", "cursor"})
+    return _StreamedBodyResponse(
+        evaluate_rows_stream(
+            header,
+            run_id,
+            _ndjson_rows(lines),
+            total_rows=header.total_rows,
+            resume=resume,
+            cursor=header.cursor,
+            run_request=run_request,
+            http_request=http_request,
+            body_streamed=True,
+            lease_owner=lease_owner
+        ),
+        media_type="application/x-ndjson",
+        headers=_stream_headers(header, run_id)
+    )
+
+@router.get("/runs/{run_id}")
+async def get_run(run_id: str):
+    """Status of a streamed run and the last saved event_id"""
+    store = get_run_store()
+    meta = await store.call("get_meta", run_id)
+    if meta is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Run not found or expired")
+    saved_events = await store.call("get_events", run_id)
+    return {
+        "run_id": run_id,
+        "status": meta["status"],
+        "total_rows": meta["total_rows"],
+        "completed_rows": len(saved_events),
+        "last_event_id": saved_events[-1]["event_id"] if saved_events else 0,
+        "created_at": meta.get("created_at"),
+        "error": meta.get("error"),
+    }
+
+@router.post("/runs/{run_id}/resume")
+async def resume_run(run_id: str, resume: ResumeRequest, http_request: Request):
+    """
+    Continue a streamed run: replays saved row events after the cursor,
+    then evaluates only the rows that have no saved result
+    Returns 409 while another stream is still evaluating the run
+    """
+    meta = await get_run_store().call("get_meta", run_id)
+    if meta is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Run not found or expired")
+    if "rows" not in meta["request"]:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Rows of this run were streamed; send them again to /evaluate/rows/ndjson with run_id in the header"
+        )
+
+    request = EvaluationRequest(
+        **{**meta["request"], "concurrency": resume.concurrency or meta["request"].get("concurrency")},
+        openai_key=resume.openai_key,
+        deepseek_key=resume.deepseek_key,
+        anthropic_key=resume.anthropic_key
+    )
+    lease_owner = await _acquire_run_lease(run_id)
     return StreamingResponse(
-        evaluate_rows_stream(request),
+        evaluate_rows_stream(
+            request,
+            run_id,
+            _list_rows(request.rows),
+            total_rows=len(request.rows),
+            resume=True,
+            cursor=resume.cursor,
+            from_row=resume.from_row,
+            http_request=http_request,
+            lease_owner=lease_owner
+        ),
         media_type="application/x-ndjson",
-        headers={
-            "Cache-Control": "no-cache",
-            "X-Accel-Buffering": "no",
-            "Connection": "keep-alive"
-        }
+        headers=_stream_headers(request, run_id)
     )
@@ -206,6 +206,7 @@ async def get_eval_cycle(
         started_at=cycle.started_at,
         completed_at=cycle.completed_at,
         error_message=cycle.error_message,
+        circuit_events=cycle.circuit_events,
         created_at=cycle.created_at,
         entries=[
             EvalEntryResponse(
@@ -262,6 +263,7 @@ async def get_eval_cycle_progress(
         processed_rows=cycle.processed_rows,
         failed_rows=cycle.failed_rows,
         total_rows=cycle.total_rows,
+        circuit_events=cycle.circuit_events,
     )
 
 
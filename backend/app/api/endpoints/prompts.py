@@ -63,7 +63,7 @@ async def improve_prompt(
                 detail="DeepSeek API key not configured"
             )
         
-        llm_service = LLMService()
+        llm_service = LLMService(provider="deepseek", api_key=deepseek_key)
         improved_prompt = await llm_service.improve_prompt_with_deepseek(
             request.prompt_text,
             api_key=deepseek_key
@@ -1,15 +1,22 @@
 """
 Database Connection and Session Management
+- init_db creates missing tables, then upgrade_schema adds the columns and
+  unique constraints that tables created by an older version lack
 """
 
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from sqlalchemy import text
-from typing import AsyncGenerator
+from sqlalchemy import UniqueConstraint, inspect, literal, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import AddConstraint
+from typing import AsyncGenerator, List
+import logging
 import os
 
 from config import get_settings
 
+logger = logging.getLogger(__name__)
+
 settings = get_settings()
 
 # Create async engine with psycopg async driver
@@ -35,14 +42,98 @@ async_session = async_sessionmaker(
 Base = declarative_base()
 
 
+class SchemaUpgradeError(RuntimeError):
+    """An existing table could not be brought up to the models"""
+
+
+def _add_column_ddl(connection, table, column) -> str:
+    """ALTER TABLE ... ADD COLUMN for a model column, with its scalar default as the server default"""
+    preparer = connection.dialect.identifier_preparer
+    ddl = (
+        f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} "
+        f"{column.type.compile(dialect=connection.dialect)}"
+    )
+    if column.default is not None and column.default.is_scalar:
+        value = literal(column.default.arg, column.type).compile(
+            dialect=connection.dialect, compile_kwargs={"literal_binds": True}
+        )
+        ddl += f" DEFAULT {value}"
+    if not column.nullable:
+        ddl += " NOT NULL"
+    return ddl
+
+
+def upgrade_schema(connection) -> List[str]:
+    """
+    Bring tables created by an older version up to the models
+    
+    create_all only creates missing tables, so columns and unique constraints
+    added to a model later are added here: columns with their scalar default
+    (existing rows take it), constraints as named (a unique index on SQLite).
+    Run with AsyncConnection.run_sync after create_all.
+    
+    Args:
+        connection: Sync connection, inside a transaction
+        
+    Returns:
+        The DDL statements executed
+        
+    Raises:
+        SchemaUpgradeError: If a column or constraint cannot be added (e.g. duplicate rows)
+    """
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    executed = []
+    
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        unique_names = {constraint["name"] for constraint in inspector.get_unique_constraints(table.name)}
+        unique_names |= {index["name"] for index in inspector.get_indexes(table.name) if index.get("unique")}
+        
+        statements = [
+            text(_add_column_ddl(connection, table, column))
+            for column in table.columns if column.name not in columns
+        ]
+        for constraint in table.constraints:
+            if not isinstance(constraint, UniqueConstraint) or not constraint.name or constraint.name in unique_names:
+                continue
+            if connection.dialect.name == "sqlite":
+                # SQLite cannot add constraints to a table; a unique index enforces the same
+                column_list = ", ".join(connection.dialect.identifier_preparer.format_column(c) for c in constraint.columns)
+                statements.append(text(f"CREATE UNIQUE INDEX {constraint.name} ON {table.name} ({column_list})"))
+            else:
+                statements.append(AddConstraint(constraint))
+        
+        for statement in statements:
+            ddl = str(statement.compile(dialect=connection.dialect))
+            try:
+                connection.execute(statement)
+            except DBAPIError as e:
+                raise SchemaUpgradeError(
+                    f"Could not upgrade table {table.name} ({ddl}): {e.orig}. "
+                    f"Fix the existing rows (e.g. remove duplicates) and restart."
+                ) from e
+            logger.warning(f"Upgraded table {table.name}: {ddl}")
+            executed.append(ddl)
+    
+    return executed
+
+
 async def init_db():
-    """Initialize database (create tables)"""
+    """Initialize database (create tables, then add columns and constraints existing tables lack)"""
     try:
         async with engine.begin() as conn:
             # Create all tables
             await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(upgrade_schema)
         
         print("✅ Database initialized successfully")
+    except SchemaUpgradeError:
+        # The tables exist but do not match the models: running on would corrupt results
+        raise
     except Exception as e:
         print(f"⚠️  Database initialization skipped: {str(e)}")
         print("   Run PostgreSQL locally or update DATABASE_URL in .env")
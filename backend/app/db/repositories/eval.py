@@ -7,11 +7,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import desc
 from uuid import UUID
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from app.models.eval_config import EvalConfiguration
 from app.models.dataset import EvalDataset
 from app.models.eval_cycle import EvalCycle, EvalEntry, EvalMetrics, EvalCycleSummary
+from app.services.result_writer import bulk_insert_entries
 
 
 class EvalConfigRepository:
@@ -219,6 +220,13 @@ class EvalEntryRepository:
         await self.session.refresh(entry)
         return entry
 
+    async def bulk_create(self, entries: List[Dict[str, Any]], commit: bool = True) -> int:
+        """Insert many entries (dicts of column values) in one COPY / multi-row INSERT, without refreshes; rows already stored are skipped"""
+        inserted = await bulk_insert_entries(self.session, entries)
+        if commit:
+            await self.session.commit()
+        return len(inserted)
+
     async def get_by_cycle_id(self, cycle_id: UUID) -> list[EvalEntry]:
         """Get all entries for cycle"""
         stmt = select(EvalEntry).where(
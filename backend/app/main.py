@@ -5,15 +5,27 @@ LLM Evaluation Platform Backend
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
 import logging
 
+from app.services.http_clients import http_client_pool
+
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Close pooled outbound HTTP clients on shutdown"""
+    yield
+    await http_client_pool.aclose()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="LLM Evaluation Platform",
     description="Platform for evaluating and comparing LLM outputs",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware - MUST be before other middleware
@@ -3,7 +3,7 @@ from app.models.project import Project
 from app.models.prompt import Prompt, PromptVersion
 from app.models.eval_config import EvalConfiguration
 from app.models.dataset import EvalDataset
-from app.models.eval_cycle import EvalCycle, EvalEntry, EvalMetrics, EvalCycleSummary
+from app.models.eval_cycle import EvalCycle, EvalEntry, EvalMetrics, EvalCycleSummary, EvalCycleShard
 
 __all__ = [
     "User",
@@ -17,4 +17,5 @@ __all__ = [
     "EvalEntry",
     "EvalMetrics",
     "EvalCycleSummary",
+    "EvalCycleShard",
 ]
@@ -4,7 +4,7 @@ Represents evaluation runs and individual entries
 Now supports dual-model evaluation with separate outputs and metrics
 """
 
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Float, Text, JSON
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Float, Text, JSON, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -31,6 +31,7 @@ class EvalCycle(Base):
     started_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
     error_message = Column(Text, nullable=True)
+    circuit_events = Column(JSON, nullable=True)  # Provider circuit breaker open/close events during the run
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     # Relationships
@@ -43,6 +44,8 @@ class EvalEntry(Base):
     Now supports dual-model evaluation with separate outputs and metrics
     """
     __tablename__ = "eval_entries"
+    # One entry per row: a retried or redelivered job never stores a row twice
+    __table_args__ = (UniqueConstraint("eval_cycle_id", "row_number", name="uq_eval_entry_cycle_row"),)
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     eval_cycle_id = Column(UUID(as_uuid=True), ForeignKey("eval_cycles.id"), nullable=False)
@@ -81,9 +84,17 @@ class EvalEntry(Base):
     cost_b = Column(Float, default=0.0)
     total_cost = Column(Float, default=0.0)
     
-    # Latency Tracking
+    # Latency Tracking (total / connect / time-to-first-byte of the provider call, 0 on cache hits)
     latency_ms_a = Column(Integer, default=0)
     latency_ms_b = Column(Integer, default=0)
+    connect_ms_a = Column(Integer, default=0)
+    connect_ms_b = Column(Integer, default=0)
+    ttfb_ms_a = Column(Integer, default=0)
+    ttfb_ms_b = Column(Integer, default=0)
+    
+    # Response Cache Tracking (number of provider calls served from / missing the cache)
+    cache_hits = Column(Integer, default=0)
+    cache_misses = Column(Integer, default=0)
     
     # Metrics for Model A
     accuracy_a = Column(Float, nullable=True)
@@ -146,6 +157,7 @@ class EvalCycleSummary(Base):
     total_tokens = Column(Integer, default=0)
     total_cost = Column(Float, default=0.0)
     avg_latency_ms = Column(Integer, default=0)
+    hedged_requests = Column(Integer, default=0)  # Duplicate requests sent for slow calls
     
     # Model A Metrics
     accuracy_a = Column(Float, default=0.0)
@@ -157,6 +169,9 @@ class EvalCycleSummary(Base):
     avg_rouge_a = Column(Float, default=0.0)
     total_tokens_a = Column(Integer, default=0)
     total_cost_a = Column(Float, default=0.0)
+    latency_p50_ms_a = Column(Integer, default=0)
+    latency_p90_ms_a = Column(Integer, default=0)
+    latency_p99_ms_a = Column(Integer, default=0)
     
     # Model B Metrics
     accuracy_b = Column(Float, default=0.0)
@@ -168,6 +183,9 @@ class EvalCycleSummary(Base):
     avg_rouge_b = Column(Float, default=0.0)
     total_tokens_b = Column(Integer, default=0)
     total_cost_b = Column(Float, default=0.0)
+    latency_p50_ms_b = Column(Integer, default=0)
+    latency_p90_ms_b = Column(Integer, default=0)
+    latency_p99_ms_b = Column(Integer, default=0)
     
     # Comparison Results
     model_a_wins = Column(Integer, default=0)  # How many times model A won
@@ -177,3 +195,21 @@ class EvalCycleSummary(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
+
+class EvalCycleShard(Base):
+    """Row range of a sharded eval cycle, with its partial summary"""
+    __tablename__ = "eval_cycle_shards"
+    __table_args__ = (UniqueConstraint("eval_cycle_id", "shard_index", name="uq_eval_cycle_shard"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    eval_cycle_id = Column(UUID(as_uuid=True), ForeignKey("eval_cycles.id"), nullable=False, index=True)
+    shard_index = Column(Integer, nullable=False)
+    start_row = Column(Integer, nullable=False)  # 1-based, inclusive
+    end_row = Column(Integer, nullable=False)  # inclusive
+    status = Column(String(50), default="pending")  # pending, running, completed, failed
+    processed_rows = Column(Integer, default=0)
+    failed_rows = Column(Integer, default=0)
+    partial_summary = Column(JSON, nullable=True)  # SummaryAccumulator.to_dict(), merged into EvalCycleSummary
+    error_message = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -6,7 +6,7 @@ Pydantic models for evaluation configuration, datasets, and cycles
 from pydantic import BaseModel, Field
 from uuid import UUID
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List, Dict, Any
 
 
 # Evaluation Configuration Schemas
@@ -62,6 +62,15 @@ class EvalDatasetResponse(EvalDatasetBase):
         from_attributes = True
 
 
+class RunEstimateRequest(BaseModel):
+    """Pre-flight estimate request for running a prompt over a dataset"""
+    system_prompt: str
+    user_prompt_template: str = Field(..., description="User prompt with {column} placeholders")
+    models: List[str] = Field(..., min_length=1, description="Models to run, e.g. [\"gpt-4\", \"deepseek-chat\"]")
+    max_tokens: int = Field(default=500, ge=1, le=4000)
+    concurrency: Optional[int] = Field(default=None, ge=1, description="Rows in flight at once (default from settings)")
+
+
 # Evaluation Entry Schemas
 class EvalEntryBase(BaseModel):
     """Base eval entry schema"""
@@ -160,6 +169,7 @@ class EvalCycleResponse(EvalCycleBase):
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
     error_message: Optional[str] = None
+    circuit_events: Optional[List[Dict[str, Any]]] = None
     created_at: datetime
 
     class Config:
@@ -181,3 +191,4 @@ class EvalCycleProgressResponse(BaseModel):
     failed_rows: int
     total_rows: int
     estimated_time_remaining_seconds: Optional[int] = None
+    circuit_events: Optional[List[Dict[str, Any]]] = None
@@ -0,0 +1,280 @@
+"""
+Cassettes Module
+Record / replay of provider HTTP traffic for reproducible performance runs:
+- Installed as the transport of the pooled httpx clients, so it covers both
+  LLMService (SDK clients) and LLMEvaluationService
+- record: every request/response pair is appended to a gzip JSON-lines cassette
+  with its time-to-first-byte and per-chunk timing (streamed responses included)
+- replay: responses are served from the cassette without network access,
+  with the original latencies multiplied by LLM_CASSETTE_LATENCY_SCALE
+- Interactions are keyed by a hash of method, path and canonical JSON body
+  (host and headers are ignored, so API keys never reach the cassette)
+"""
+
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Response headers worth keeping (content handling and rate-limit feedback)
+_KEPT_HEADERS = ("content-type", "content-encoding", "retry-after", "retry-after-ms")
+_KEPT_HEADER_PREFIXES = ("x-ratelimit-", "anthropic-ratelimit-")
+
+
+class CassetteMissError(Exception):
+    """Replay mode got a request that is not in the cassette"""
+
+
+def request_key(method: str, path: str, body: bytes) -> str:
+    """
+    Cassette key of a request
+
+    Args:
+        method: HTTP method
+        path: URL path and query (without host)
+        body: Request body; JSON bodies are canonicalized (sorted keys)
+    """
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":")).encode()
+    except ValueError:
+        pass
+    return hashlib.sha256(method.encode() + b" " + path.encode() + b"\n" + body).hexdigest()
+
+
+def _encode_chunk(offset_ms: float, chunk: bytes) -> list:
+    # [offset_ms, text] for UTF-8 chunks, [offset_ms, base64, 1] otherwise (e.g. gzip-encoded bodies)
+    try:
+        return [round(offset_ms, 1), chunk.decode("utf-8")]
+    except UnicodeDecodeError:
+        return [round(offset_ms, 1), base64.b64encode(chunk).decode("ascii"), 1]
+
+
+def _decode_chunk(entry: list) -> bytes:
+    if len(entry) > 2 and entry[2]:
+        return base64.b64decode(entry[1])
+    return entry[1].encode("utf-8")
+
+
+class Cassette:
+    """
+    On-disk set of recorded interactions
+
+    Each interaction is written as its own gzip member with a single
+    O_APPEND write, so several threads or worker processes can record
+    into one file. Repeated requests keep every response; replay serves
+    them in order and wraps around.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._interactions: Optional[Dict[str, List[dict]]] = None
+        self._replay_index: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+
+    def record(self, interaction: dict) -> None:
+        """Append one interaction"""
+        data = gzip.compress((json.dumps(interaction, separators=(",", ":")) + "\n").encode())
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+
+    def _load(self) -> Dict[str, List[dict]]:
+        # Called with the lock held
+        if self._interactions is None:
+            self._interactions = {}
+            if os.path.exists(self.path):
+                with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            interaction = json.loads(line)
+                            self._interactions.setdefault(interaction["key"], []).append(interaction)
+                for key, recorded in self._interactions.items():
+                    complete = [interaction for interaction in recorded if interaction.get("complete", True)]
+                    self._interactions[key] = complete or recorded
+            logger.info(f"Loaded {sum(len(v) for v in self._interactions.values())} interactions from cassette {self.path}")
+        return self._interactions
+
+
+    def next_interaction(self, key: str) -> Optional[dict]:
+        """Next recorded response for a request key, or None if never recorded"""
+        with self._lock:
+            recorded = self._load().get(key)
+            if not recorded:
+                return None
+            index = self._replay_index.get(key, 0)
+            self._replay_index[key] = index + 1
+            return recorded[index % len(recorded)]
+
+
+class _RecordingStream(httpx.AsyncByteStream):
+    """Passes the response body through while timing each chunk"""
+
+    def __init__(self, inner: httpx.AsyncByteStream, cassette: Cassette, interaction: dict, headers_at: float):
+        self._inner = inner
+        self._cassette = cassette
+        self._interaction = interaction
+        self._headers_at = headers_at
+        self._chunks: List[list] = []
+        self._complete = False
+        self._closed = False
+
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._inner:
+            self._chunks.append(_encode_chunk((time.perf_counter() - self._headers_at) * 1000, chunk))
+            yield chunk
+        self._complete = True
+
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+        if self._closed:
+            return
+        self._closed = True
+        # SSE readers stop at [DONE] without draining the body, so partial reads are kept
+        # too; replay prefers complete recordings of the same request
+        self._interaction["chunks"] = self._chunks
+        self._interaction["complete"] = self._complete
+        try:
+            self._cassette.record(self._interaction)
+        except OSError as e:
+            logger.warning(f"Could not write cassette {self._cassette.path}: {str(e)}")
+
+
+class _ReplayStream(httpx.AsyncByteStream):
+    """Replays recorded chunks with their (scaled) timing"""
+
+    def __init__(self, chunks: List[list], latency_scale: float):
+        self._chunks = chunks
+        self._latency_scale = latency_scale
+
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        previous_ms = 0.0
+        for entry in self._chunks:
+            delay = (entry[0] - previous_ms) * self._latency_scale / 1000
+            previous_ms = entry[0]
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield _decode_chunk(entry)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper that records every interaction into a cassette"""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, cassette: Cassette):
+        self._inner = inner
+        self._cassette = cassette
+
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        started = time.perf_counter()
+        response = await self._inner.handle_async_request(request)
+        headers_at = time.perf_counter()
+
+        interaction = {
+            "key": request_key(request.method, request.url.raw_path.decode("ascii"), body),
+            "method": request.method,
+            "path": request.url.raw_path.decode("ascii"),
+            "status": response.status_code,
+            "headers": [
+                [name, value] for name, value in response.headers.items()
+                if name in _KEPT_HEADERS or name.startswith(_KEPT_HEADER_PREFIXES)
+            ],
+            "ttfb_ms": round((headers_at - started) * 1000, 1),
+        }
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_RecordingStream(response.stream, self._cassette, interaction, headers_at),
+            extensions=response.extensions,
+        )
+
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Transport that answers from a cassette instead of the network"""
+
+    def __init__(self, cassette: Cassette, latency_scale: float = 1.0):
+        self._cassette = cassette
+        self._latency_scale = latency_scale
+
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        path = request.url.raw_path.decode("ascii")
+        interaction = self._cassette.next_interaction(request_key(request.method, path, body))
+        if interaction is None:
+            raise CassetteMissError(f"No recorded response for {request.method} {path} in {self._cassette.path}")
+
+        if interaction["ttfb_ms"] and self._latency_scale:
+            await asyncio.sleep(interaction["ttfb_ms"] * self._latency_scale / 1000)
+
+        return httpx.Response(
+            status_code=interaction["status"],
+            headers=interaction["headers"],
+            stream=_ReplayStream(interaction["chunks"], self._latency_scale),
+        )
+
+
+_cassettes: Dict[str, Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path: str) -> Cassette:
+    """Shared Cassette for a path (replay state is per process)"""
+    with _cassettes_lock:
+        cassette = _cassettes.get(path)
+        if cassette is None:
+            cassette = _cassettes[path] = Cassette(path)
+        return cassette
+
+
+def wrap_transport(transport: httpx.AsyncBaseTransport) -> httpx.AsyncBaseTransport:
+    """
+    Apply LLM_CASSETTE_MODE to a pooled client's transport
+
+    Args:
+        transport: The real network transport
+
+    Returns:
+        transport unchanged ("off"), a RecordingTransport ("record") or a ReplayTransport ("replay")
+    """
+    settings = get_settings()
+    mode = settings.LLM_CASSETTE_MODE
+    if mode == "off":
+        return transport
+
+    cassette = get_cassette(settings.LLM_CASSETTE_PATH)
+    if mode == "record":
+        logger.info(f"Recording provider traffic to {cassette.path}")
+        return RecordingTransport(transport, cassette)
+    if mode == "replay":
+        logger.info(f"Replaying provider traffic from {cassette.path} (latency x{settings.LLM_CASSETTE_LATENCY_SCALE})")
+        return ReplayTransport(cassette, settings.LLM_CASSETTE_LATENCY_SCALE)
+
+    raise ValueError(f"Unknown LLM_CASSETTE_MODE: {mode} (expected off, record or replay)")
@@ -0,0 +1,229 @@
+"""
+Circuit Breaker Module
+Fast-fail for degraded providers:
+- One breaker per (provider, base URL), shared by every caller in the process
+- Opens when the failure rate over the last N calls passes a threshold
+- While open, calls fail immediately with CircuitOpenError (no retries, no sleeps)
+- After a cool-down, a few half-open probes decide whether to close or re-open
+- State changes are kept in an event log so cycles can report them
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.services.llm_errors import CONNECTION, SERVER_ERROR, TIMEOUT, error_kind
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open"""
+
+    def __init__(self, provider: str, base_url: str, retry_in: float):
+        self.provider = provider
+        self.base_url = base_url
+        self.retry_in = retry_in
+        super().__init__(
+            f"Circuit open for {provider} ({base_url}): provider is failing, next probe in {retry_in:.0f}s"
+        )
+
+
+def is_provider_failure(error: Optional[BaseException] = None, status_code: Optional[int] = None) -> bool:
+    """
+    Whether an outcome says the provider itself is unhealthy
+
+    5xx, timeouts and connection errors count. Rate limits (429) and
+    other client errors mean the provider answered, so they do not.
+    """
+    if error is None and status_code is None:
+        return False
+    return error_kind(status_code, error=error) in (SERVER_ERROR, TIMEOUT, CONNECTION)
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker over a rolling window of call outcomes
+
+    Thread-safe: sync provider calls run in worker threads.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        base_url: str,
+        failure_rate: float,
+        window_size: int,
+        min_calls: int,
+        open_seconds: float,
+        half_open_probes: int
+    ):
+        self.provider = provider
+        self.base_url = base_url
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self._outcomes: deque = deque(maxlen=window_size)  # True = failure
+        self._opened_at = 0.0
+        self._probe_started_at: Optional[float] = None
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+
+
+    def before_call(self) -> None:
+        """
+        Admit a call or fail fast
+
+        Raises:
+            CircuitOpenError: While open, or while a half-open probe is already in flight
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                retry_in = self._opened_at + self.open_seconds - now
+                if retry_in > 0:
+                    raise CircuitOpenError(self.provider, self.base_url, retry_in)
+                self._transition(HALF_OPEN, "cool-down elapsed, probing")
+
+            if self.state == HALF_OPEN:
+                # One probe at a time; a probe that never reports (cancelled) expires after open_seconds
+                if self._probe_started_at is not None and now - self._probe_started_at < self.open_seconds:
+                    raise CircuitOpenError(self.provider, self.base_url, self.open_seconds)
+                self._probe_started_at = now
+
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe_started_at = None
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_probes:
+                    self._transition(CLOSED, f"{self._probe_successes} probes succeeded")
+            else:
+                self._outcomes.append(False)
+
+
+    def record_failure(self, reason: str = "") -> None:
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe_started_at = None
+                self._transition(OPEN, f"probe failed: {reason}")
+                return
+
+            self._outcomes.append(True)
+            if self.state == CLOSED and len(self._outcomes) >= self.min_calls:
+                failures = sum(self._outcomes)
+                if failures / len(self._outcomes) >= self.failure_rate:
+                    self._transition(OPEN, f"{failures}/{len(self._outcomes)} recent calls failed: {reason}")
+
+
+    def record_outcome(self, error: Optional[BaseException] = None, status_code: Optional[int] = None) -> None:
+        """Record a finished call from its exception and/or HTTP status"""
+        if is_provider_failure(error, status_code):
+            self.record_failure(str(error)[:200] if error is not None else f"HTTP {status_code}")
+        else:
+            self.record_success()
+
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self.state == OPEN
+
+
+    def _transition(self, state: str, reason: str) -> None:
+        # Called with the lock held
+        self.state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        elif state == HALF_OPEN:
+            self._probe_started_at = None
+            self._probe_successes = 0
+        elif state == CLOSED:
+            self._outcomes.clear()
+
+        log = logger.warning if state == OPEN else logger.info
+        log(f"Circuit for {self.provider} ({self.base_url}) -> {state}: {reason}")
+        _record_event(self.provider, self.base_url, state, reason)
+
+
+_breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+# Recent state changes across all breakers, newest last
+_events: deque = deque(maxlen=1000)
+_event_seq = 0
+_events_lock = threading.Lock()
+
+
+def _record_event(provider: str, base_url: str, state: str, reason: str) -> None:
+    global _event_seq
+    with _events_lock:
+        _event_seq += 1
+        _events.append({
+            "seq": _event_seq,
+            "provider": provider,
+            "base_url": base_url,
+            "state": state,
+            "reason": reason,
+            "at": datetime.utcnow().isoformat(),
+        })
+
+
+def get_circuit_breaker(provider: str, base_url: str) -> Optional[CircuitBreaker]:
+    """
+    Shared breaker for a provider endpoint, or None when disabled
+
+    Args:
+        provider: Provider name (openai, deepseek, anthropic)
+        base_url: API base URL
+    """
+    settings = get_settings()
+    if not settings.LLM_CIRCUIT_BREAKER_ENABLED:
+        return None
+
+    key = (provider, base_url)
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = _breakers[key] = CircuitBreaker(
+                provider,
+                base_url,
+                failure_rate=settings.LLM_CIRCUIT_FAILURE_RATE,
+                window_size=settings.LLM_CIRCUIT_WINDOW_SIZE,
+                min_calls=settings.LLM_CIRCUIT_MIN_CALLS,
+                open_seconds=settings.LLM_CIRCUIT_OPEN_SECONDS,
+                half_open_probes=settings.LLM_CIRCUIT_HALF_OPEN_PROBES,
+            )
+        return breaker
+
+
+def last_circuit_event_seq() -> int:
+    """Sequence number of the newest event (pass to circuit_events_since later)"""
+    with _events_lock:
+        return _event_seq
+
+
+def circuit_events_since(seq: int, providers: Optional[Set[str]] = None) -> List[Dict]:
+    """
+    State changes after a sequence number
+
+    Args:
+        seq: Value from last_circuit_event_seq()
+        providers: Only events for these providers (None = all)
+    """
+    with _events_lock:
+        return [
+            event for event in _events
+            if event["seq"] > seq and (providers is None or event["provider"] in providers)
+        ]
@@ -0,0 +1,78 @@
+"""
+Dataset Rows Module
+Lazy access to the rows of an uploaded EvalDataset:
+- Row count from the dataset record (or the sheet dimension), without a parse
+- Rows read in DATASET_CHUNK_ROWS chunks in a worker thread, one chunk in memory
+- Row ranges for processing part of a dataset
+"""
+
+import asyncio
+import logging
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.dataset import EvalDataset
+from app.services.excel_service import ExcelService
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetRows:
+    """Rows of a dataset file, read on demand"""
+
+    def __init__(self, file_path: str, total_rows: int, chunk_size: Optional[int] = None):
+        self.file_path = file_path
+        self.total_rows = total_rows
+        self.chunk_size = chunk_size or get_settings().DATASET_CHUNK_ROWS
+
+
+    @classmethod
+    async def load(cls, session: AsyncSession, dataset_id: str) -> "DatasetRows":
+        """
+        Look up a dataset's file and row count
+
+        Raises:
+            ValueError: If the dataset does not exist
+        """
+        dataset = await session.get(EvalDataset, uuid.UUID(str(dataset_id)))
+        if dataset is None:
+            raise ValueError(f"Dataset {dataset_id} not found")
+
+        total_rows = dataset.total_rows
+        if not total_rows:
+            total_rows = await asyncio.to_thread(ExcelService.count_rows, dataset.file_path)
+        logger.info(f"Dataset {dataset_id}: {total_rows} rows in {dataset.file_path}")
+        return cls(dataset.file_path, total_rows)
+
+
+    async def chunks(
+        self,
+        start_row: int = 1,
+        end_row: Optional[int] = None
+    ) -> AsyncIterator[List[Tuple[int, Dict[str, Any]]]]:
+        """
+        Chunks of (row_number, row) pairs, parsed off the event loop
+
+        Args:
+            start_row: First row (1-based)
+            end_row: Last row, inclusive (None = to the end)
+        """
+        iterator = ExcelService.iter_row_chunks(self.file_path, self.chunk_size, start_row, end_row)
+        try:
+            while True:
+                chunk = await asyncio.to_thread(next, iterator, None)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            iterator.close()
+
+
+    async def rows(self, start_row: int = 1, end_row: Optional[int] = None) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """(row_number, row) pairs, row_number 1-based across the whole dataset (blank rows skipped)"""
+        async for chunk in self.chunks(start_row, end_row):
+            for row_number, row in chunk:
+                yield row_number, row
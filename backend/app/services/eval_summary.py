@@ -0,0 +1,153 @@
+"""
+Eval Summary Module
+Running totals behind EvalCycleSummary:
+- Fed one EvalEntry (as a dict of column values) at a time
+- Counts, sums and latency histograms only, so partial summaries (per
+  flush, per shard, per resumed attempt) merge exactly
+- JSON round trip for passing partials between workers
+"""
+
+from typing import Any, Dict, Optional
+
+from app.services.latency import LatencyHistogram
+
+METRIC_KEYS = ("accuracy", "precision", "recall", "f1_score", "bleu_score", "rouge_score", "cosine_similarity")
+
+# EvalCycleSummary column for each metric average
+_SUMMARY_COLUMNS = {
+    "accuracy": "accuracy",
+    "precision": "precision",
+    "recall": "recall",
+    "f1_score": "f1_score",
+    "bleu_score": "avg_bleu",
+    "rouge_score": "avg_rouge",
+    "cosine_similarity": "avg_similarity",
+}
+
+
+def _ms(value) -> int:
+    return int(round(value)) if value is not None else 0
+
+
+class SummaryAccumulator:
+    """Mergeable totals of a cycle's entries"""
+
+    def __init__(self):
+        self.rows = 0
+        self.failed_rows = 0
+        self.tokens = {"a": 0, "b": 0}
+        self.cost = {"a": 0.0, "b": 0.0}
+        # Per model: metric -> [sum, count]
+        self.metrics = {side: {key: [0.0, 0] for key in METRIC_KEYS} for side in ("a", "b")}
+        self.latency = {"a": LatencyHistogram(), "b": LatencyHistogram()}
+        self.wins = {"model_a": 0, "model_b": 0, "tie": 0}
+        self.hedged_requests = 0
+
+
+    def add_entry(self, entry: Dict[str, Any]) -> None:
+        """
+        Count one entry
+
+        Args:
+            entry: EvalEntry column values (failed entries only need status)
+        """
+        self.rows += 1
+        if entry.get("status") == "failed":
+            self.failed_rows += 1
+            return
+
+        for side in ("a", "b"):
+            self.tokens[side] += entry.get(f"tokens_total_{side}") or 0
+            self.cost[side] += entry.get(f"cost_{side}") or 0.0
+            for key in METRIC_KEYS:
+                value = entry.get(f"{key}_{side}")
+                if value is not None:
+                    self.metrics[side][key][0] += value
+                    self.metrics[side][key][1] += 1
+            # Cache hits have no provider latency
+            latency_ms = entry.get(f"latency_ms_{side}")
+            if latency_ms:
+                self.latency[side].record(latency_ms)
+
+        winner = entry.get("winner")
+        if winner in self.wins:
+            self.wins[winner] += 1
+
+
+    def merge(self, other: "SummaryAccumulator") -> None:
+        """Add another accumulator's totals into this one"""
+        self.rows += other.rows
+        self.failed_rows += other.failed_rows
+        self.hedged_requests += other.hedged_requests
+        for side in ("a", "b"):
+            self.tokens[side] += other.tokens[side]
+            self.cost[side] += other.cost[side]
+            self.latency[side].merge(other.latency[side])
+            for key in METRIC_KEYS:
+                self.metrics[side][key][0] += other.metrics[side][key][0]
+                self.metrics[side][key][1] += other.metrics[side][key][1]
+        for winner in self.wins:
+            self.wins[winner] += other.wins[winner]
+
+
+    def average(self, side: str, key: str) -> float:
+        total, count = self.metrics[side][key]
+        return total / count if count else 0
+
+
+    def summary_values(self, total_rows: Optional[int] = None) -> Dict[str, Any]:
+        """EvalCycleSummary column values"""
+        latency_all = LatencyHistogram()
+        latency_all.merge(self.latency["a"])
+        latency_all.merge(self.latency["b"])
+
+        values = {
+            "total_rows": total_rows if total_rows is not None else self.rows,
+            "total_tokens": self.tokens["a"] + self.tokens["b"],
+            "total_cost": self.cost["a"] + self.cost["b"],
+            "avg_latency_ms": _ms(latency_all.mean()),
+            "hedged_requests": self.hedged_requests,
+            "model_a_wins": self.wins["model_a"],
+            "model_b_wins": self.wins["model_b"],
+            "ties": self.wins["tie"],
+        }
+        for side in ("a", "b"):
+            for key, column in _SUMMARY_COLUMNS.items():
+                values[f"{column}_{side}"] = self.average(side, key)
+            values[f"total_tokens_{side}"] = self.tokens[side]
+            values[f"total_cost_{side}"] = self.cost[side]
+            values[f"latency_p50_ms_{side}"] = _ms(self.latency[side].percentile(50))
+            values[f"latency_p90_ms_{side}"] = _ms(self.latency[side].percentile(90))
+            values[f"latency_p99_ms_{side}"] = _ms(self.latency[side].percentile(99))
+        return values
+
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form (for passing between workers)"""
+        return {
+            "rows": self.rows,
+            "failed_rows": self.failed_rows,
+            "tokens": self.tokens,
+            "cost": self.cost,
+            "metrics": self.metrics,
+            "latency": {side: histogram.to_dict() for side, histogram in self.latency.items()},
+            "wins": self.wins,
+            "hedged_requests": self.hedged_requests,
+        }
+
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SummaryAccumulator":
+        accumulator = cls()
+        accumulator.rows = data.get("rows", 0)
+        accumulator.failed_rows = data.get("failed_rows", 0)
+        accumulator.tokens.update(data.get("tokens", {}))
+        accumulator.cost.update(data.get("cost", {}))
+        for side, metrics in data.get("metrics", {}).items():
+            for key, pair in metrics.items():
+                accumulator.metrics[side][key] = list(pair)
+        for side, histogram in data.get("latency", {}).items():
+            accumulator.latency[side] = LatencyHistogram.from_dict(histogram)
+        accumulator.wins.update(data.get("wins", {}))
+        accumulator.hedged_requests = data.get("hedged_requests", 0)
+        return accumulator
@@ -2,21 +2,132 @@
 Excel Service Module
 Handles all Excel file operations:
 - Parsing Excel files
+- Cached DataFrame loading for bulk (vectorized) passes
+- Streaming row chunks and row counts for large files (constant memory),
+  numbered and named like the DataFrame
+- Row spills: rows converted once to JSON lines with an offset index, so
+  readers of a row range (evaluation shards) seek instead of parsing the sheet up to it
 - Validating data
 - Rendering prompts with data
 - Merging results back to Excel
 """
 
+import datetime
 import io
+import itertools
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional
+from typing import Any, List, Dict, Iterator, Tuple, Optional
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Alignment
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Parsed DataFrames keyed by (path, mtime); reading .xlsx dominates bulk passes
+_DATAFRAME_CACHE_SIZE = 8
+_dataframe_cache: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+_dataframe_cache_lock = threading.Lock()
+
+# Row spills record the byte offset of every _ROW_SPILL_STRIDE-th row
+_ROW_SPILL_STRIDE = 1000
+
+
+def _column_names(header_row: tuple) -> List[str]:
+    """Column names as pandas builds them: "Unnamed: <index>" for empty headers, ".1", ".2" suffixes on duplicates"""
+    names = [
+        str(value) if value is not None else f"Unnamed: {index}"
+        for index, value in enumerate(header_row)
+    ]
+    counts: Dict[str, int] = {}
+    for index, name in enumerate(names):
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[name] = count + 1
+            name = f"{name}.{count}"
+            count = counts.get(name, 0)
+        names[index] = name
+        counts[name] = count + 1
+    return names
+
+
+def _is_blank(values: tuple) -> bool:
+    return all(_json_value(value) is None for value in values)
+
+
+def _json_value(value: Any) -> Any:
+    """Cell value in a JSON-serializable form: dates and times as ISO strings, NaN / NaT as None"""
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return str(value)
+    if isinstance(value, np.generic):
+        return _json_value(value.item())
+    return value
+
+
+def _json_row(headers: List[str], values: tuple) -> Dict[str, Any]:
+    """Row dictionary (header -> JSON-safe value); cells missing from short rows are None"""
+    return {header: _json_value(value) for header, value in itertools.zip_longest(headers, values[:len(headers)])}
+
+
+def _row_spill_paths(file_path: str) -> Tuple[str, str]:
+    """(rows file, offset index file) of a dataset's row spill"""
+    return f"{file_path}.rows.jsonl", f"{file_path}.rows.index.json"
+
+
+def _load_row_spill_index(file_path: str) -> Optional[Dict[str, Any]]:
+    """Offset index of the file's row spill, or None if there is none for its current contents"""
+    _, index_path = _row_spill_paths(file_path)
+    try:
+        with open(index_path) as index_file:
+            index = json.load(index_file)
+    except (OSError, ValueError):
+        return None
+    if index.get("mtime") != os.path.getmtime(file_path):
+        return None
+    return index
+
+
+def _iter_spilled_chunks(
+    file_path: str,
+    index: Dict[str, Any],
+    chunk_size: int,
+    start_row: int,
+    end_row: Optional[int]
+) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+    """iter_row_chunks from a row spill, starting at the indexed offset before start_row"""
+    rows_path, _ = _row_spill_paths(file_path)
+    block = (start_row - 1) // index["stride"]
+    if block >= len(index["offsets"]):
+        return
+    
+    with open(rows_path, "rb") as rows_file:
+        rows_file.seek(index["offsets"][block])
+        chunk: List[Tuple[int, Dict[str, Any]]] = []
+        for line in rows_file:
+            row_number, row = json.loads(line)
+            if row_number < start_row:
+                continue
+            if end_row is not None and row_number > end_row:
+                break
+            chunk.append((row_number, row))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
 
 class ExcelService:
     """
@@ -35,8 +146,8 @@ class ExcelService:
             Tuple of (headers, data_rows, total_rows)
         """
         try:
-            # Read Excel file using pandas
-            df = pd.read_excel(file_path)
+            # Read Excel file using pandas (cached, so later bulk passes skip the parse)
+            df = ExcelService.load_dataframe(file_path)
             
             # Get headers (column names)
             headers = df.columns.tolist()
@@ -60,6 +171,205 @@ class ExcelService:
             raise Exception(f"Error parsing Excel file: {str(e)}")
     
     
+    @staticmethod
+    def dataframe_key(file_path: str) -> Tuple[str, float]:
+        """
+        Cache key of a file's parsed contents: (path, mtime)
+        
+        Values derived from a DataFrame (e.g. token counts) can be cached under
+        this key; it changes whenever the file is rewritten.
+        """
+        try:
+            return (file_path, os.path.getmtime(file_path))
+        except FileNotFoundError:
+            logger.error(f"File not found: {file_path}")
+            raise Exception(f"File not found: {file_path}")
+    
+    
+    @staticmethod
+    def load_dataframe(file_path: str) -> pd.DataFrame:
+        """
+        Load an Excel file as a DataFrame, reusing the parsed copy while the file is unchanged
+        
+        Args:
+            file_path: Path to the Excel file
+            
+        Returns:
+            DataFrame (shared; callers must not modify it in place)
+        """
+        key = ExcelService.dataframe_key(file_path)
+        
+        with _dataframe_cache_lock:
+            df = _dataframe_cache.get(key)
+            if df is not None:
+                _dataframe_cache.move_to_end(key)
+                return df
+        
+        try:
+            df = pd.read_excel(file_path)
+        except Exception as e:
+            logger.error(f"Error parsing Excel file: {str(e)}")
+            raise Exception(f"Error parsing Excel file: {str(e)}")
+        
+        with _dataframe_cache_lock:
+            _dataframe_cache[key] = df
+            while len(_dataframe_cache) > _DATAFRAME_CACHE_SIZE:
+                _dataframe_cache.popitem(last=False)
+        
+        logger.info(f"Loaded Excel file into DataFrame: {file_path} ({len(df)} rows)")
+        return df
+    
+    
+    @staticmethod
+    def iter_row_chunks(
+        file_path: str,
+        chunk_size: int = 500,
+        start_row: int = 1,
+        end_row: Optional[int] = None
+    ) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+        """
+        Read data rows in chunks without loading the workbook
+        
+        .xlsx files are streamed with openpyxl's read-only mode (one chunk in
+        memory at a time); .xls files fall back to the cached DataFrame.
+        Rows are numbered and headers named as in load_dataframe (blank rows
+        keep their number but are not returned), and values are JSON-safe.
+        Files with a current row spill (spill_rows) are read from the spill.
+        
+        Args:
+            file_path: Path to the Excel file
+            chunk_size: Rows per chunk
+            start_row: First data row to return (1-based, header excluded)
+            end_row: Last data row to return (inclusive, None = to the end)
+            
+        Yields:
+            Lists of up to chunk_size (row_number, row dictionary) pairs
+        """
+        if not os.path.exists(file_path):
+            logger.error(f"File not found: {file_path}")
+            raise Exception(f"File not found: {file_path}")
+        
+        spill_index = _load_row_spill_index(file_path)
+        if spill_index is not None:
+            yield from _iter_spilled_chunks(file_path, spill_index, chunk_size, start_row, end_row)
+            return
+        
+        if Path(file_path).suffix.lower() == ".xls":
+            df = ExcelService.load_dataframe(file_path)
+            headers = [str(column) for column in df.columns]
+            stop = len(df) if end_row is None else min(end_row, len(df))
+            for offset in range(start_row - 1, stop, chunk_size):
+                values = df.iloc[offset:min(offset + chunk_size, stop)].itertuples(index=False, name=None)
+                chunk = [
+                    (row_number, _json_row(headers, row))
+                    for row_number, row in enumerate(values, offset + 1)
+                    if not _is_blank(row)
+                ]
+                if chunk:
+                    yield chunk
+            return
+        
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.active
+            header_row = next(sheet.iter_rows(max_row=1, values_only=True), None)
+            if header_row is None:
+                return
+            headers = _column_names(header_row)
+            
+            # Sheet row = data row + 1; rows before the range are not turned into cells,
+            # and parsing stops after end_row
+            rows = sheet.iter_rows(
+                min_row=start_row + 1,
+                max_row=None if end_row is None else end_row + 1,
+                values_only=True
+            )
+            chunk: List[Tuple[int, Dict[str, Any]]] = []
+            for row_number, values in enumerate(rows, start_row):
+                # Blank rows (common at the end of exported sheets) still take their row number
+                if _is_blank(values):
+                    continue
+                chunk.append((row_number, _json_row(headers, values)))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        finally:
+            workbook.close()
+    
+    
+    @staticmethod
+    def spill_rows(file_path: str) -> None:
+        """
+        Write the file's rows as JSON lines with an offset index (once per file version)
+        
+        Reading a row range of an .xlsx sheet means parsing every row before
+        it, so N shards of one sheet would cost O(N^2); after the spill each
+        range read seeks to within _ROW_SPILL_STRIDE rows of its start.
+        The spill sits next to the file and is used while the file is unchanged.
+        
+        Args:
+            file_path: Path to the Excel file
+        """
+        if _load_row_spill_index(file_path) is not None:
+            return
+        
+        rows_path, index_path = _row_spill_paths(file_path)
+        mtime = os.path.getmtime(file_path)
+        offsets: List[int] = []
+        # Written under temporary names and renamed, index last: readers never see a partial spill
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(rows_path + suffix, "wb") as rows_file:
+            for chunk in ExcelService.iter_row_chunks(file_path, chunk_size=5000):
+                for row_number, row in chunk:
+                    while len(offsets) <= (row_number - 1) // _ROW_SPILL_STRIDE:
+                        offsets.append(rows_file.tell())
+                    rows_file.write(json.dumps([row_number, row]).encode() + b"\n")
+        os.replace(rows_path + suffix, rows_path)
+        with open(index_path + suffix, "w") as index_file:
+            json.dump({"mtime": mtime, "stride": _ROW_SPILL_STRIDE, "offsets": offsets}, index_file)
+        os.replace(index_path + suffix, index_path)
+        logger.info(f"Spilled rows of {file_path} ({len(offsets)} index blocks)")
+    
+    
+    @staticmethod
+    def remove_row_spill(file_path: str) -> None:
+        """Delete the file's row spill, if any"""
+        for path in _row_spill_paths(file_path):
+            if os.path.exists(path):
+                os.remove(path)
+    
+    
+    @staticmethod
+    def count_rows(file_path: str) -> int:
+        """
+        Data row count (header excluded), as load_dataframe counts them
+        
+        Blank rows between data rows count, trailing blank rows do not, so
+        the count matches the row numbers iter_row_chunks returns. .xlsx
+        files are scanned in read-only mode without building row dictionaries.
+        
+        Args:
+            file_path: Path to the Excel file
+            
+        Returns:
+            Number of data rows
+        """
+        if Path(file_path).suffix.lower() == ".xls":
+            return len(ExcelService.load_dataframe(file_path))
+        
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            last_row = 0
+            for row_number, values in enumerate(workbook.active.iter_rows(min_row=2, values_only=True), 1):
+                if not _is_blank(values):
+                    last_row = row_number
+            return last_row
+        finally:
+            workbook.close()
+    
+    
     @staticmethod
     def validate_headers(headers: List[str], required_headers: List[str]) -> bool:
         """
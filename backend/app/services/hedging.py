@@ -0,0 +1,165 @@
+"""
+Hedged Requests Module
+Tail-latency control for provider calls:
+- Once a call runs past the model's rolling p95, one duplicate is sent
+- The first to succeed wins and the other is cancelled; a copy that fails
+  (raises, or returns a result the caller's is_success rejects, e.g. a 429)
+  does not cancel the other
+- Duplicates are capped as a percentage of calls (extra spend budget)
+- Enabled per evaluation cycle / request by creating a HedgePolicy
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from app.services.latency import RequestTiming, measure_latency, rolling_percentile
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class HedgePolicy:
+    """
+    Hedging settings and extra-spend budget for one evaluation cycle
+
+    Create one per cycle so the budget covers that cycle's calls only.
+    """
+
+    def __init__(
+        self,
+        percentile: Optional[float] = None,
+        max_extra_percent: Optional[float] = None,
+        min_samples: Optional[int] = None
+    ):
+        settings = get_settings()
+        self.percentile = percentile if percentile is not None else settings.LLM_HEDGE_PERCENTILE
+        self.max_extra_percent = (
+            max_extra_percent if max_extra_percent is not None else settings.LLM_HEDGE_MAX_EXTRA_PERCENT
+        )
+        self.min_samples = min_samples if min_samples is not None else settings.LLM_HEDGE_MIN_SAMPLES
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+
+
+    def hedge_delay(self, provider: str, model: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there is too little latency history"""
+        threshold_ms = rolling_percentile(provider, model, self.percentile, self.min_samples)
+        return threshold_ms / 1000 if threshold_ms is not None else None
+
+
+    def _try_reserve_hedge(self) -> bool:
+        """Take one duplicate from the budget if it stays within max_extra_percent of calls"""
+        with self._lock:
+            if (self.hedges + 1) * 100 > self.calls * self.max_extra_percent:
+                return False
+            self.hedges += 1
+            return True
+
+
+    async def run(
+        self,
+        send: Callable[[], Awaitable[Any]],
+        provider: str,
+        model: str,
+        is_success: Optional[Callable[[Any], bool]] = None
+    ) -> Tuple[Any, RequestTiming, bool]:
+        """
+        Run a provider call, hedging it if it becomes a straggler
+
+        Args:
+            send: Starts one request (called once, or twice when hedged)
+            provider: Provider name (selects the latency window)
+            model: Model name
+            is_success: Whether a returned result counts as a success (default:
+                any result that did not raise)
+
+        Returns:
+            Tuple of (result, timing, hedged). Connect/TTFB come from the winning
+            request; total is the time the caller waited.
+        """
+        with self._lock:
+            self.calls += 1
+
+        started = time.perf_counter()
+        primary = asyncio.ensure_future(_timed(send))
+        delay = self.hedge_delay(provider, model)
+
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+                if not done and self._try_reserve_hedge():
+                    logger.info(f"Hedging {provider}/{model} call after {delay:.2f}s ({self.hedges} hedges / {self.calls} calls)")
+                    backup = asyncio.ensure_future(_timed(send))
+                    try:
+                        result, timing, winner = await _first_success([primary, backup], is_success)
+                    finally:
+                        backup.cancel()
+                    if winner is backup:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    timing.total_ms = (time.perf_counter() - started) * 1000
+                    return result, timing, True
+
+            result, timing = await primary
+            return result, timing, False
+        finally:
+            primary.cancel()
+
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": self.calls, "hedges": self.hedges, "hedge_wins": self.hedge_wins}
+
+
+async def _timed(send: Callable[[], Awaitable[Any]]) -> Tuple[Any, RequestTiming]:
+    # Each request runs in its own task with its own timing, so the two attempts do not mix
+    with measure_latency() as timing:
+        result = await send()
+    return result, timing
+
+
+async def _first_success(
+    tasks: List[asyncio.Future],
+    is_success: Optional[Callable[[Any], bool]] = None
+) -> Tuple[Any, RequestTiming, asyncio.Future]:
+    """Result of the first task to succeed; if all fail, the last one's result (or error)"""
+    pending = set(tasks)
+    while True:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None and (is_success is None or is_success(task.result()[0])):
+                result, timing = task.result()
+                return result, timing, task
+        if not pending:
+            result, timing = task.result()
+            return result, timing, task
+
+
+async def run_timed(
+    send: Callable[[], Awaitable[Any]],
+    provider: str,
+    model: str,
+    policy: Optional[HedgePolicy] = None,
+    is_success: Optional[Callable[[Any], bool]] = None
+) -> Tuple[Any, RequestTiming, bool]:
+    """
+    Run a provider call with latency measurement, hedged when a policy is given
+
+    Args:
+        is_success: Passed to HedgePolicy.run; for calls that return error
+            responses instead of raising
+
+    Returns:
+        Tuple of (result, timing, hedged)
+    """
+    if policy is not None:
+        return await policy.run(send, provider, model, is_success)
+
+    with measure_latency() as timing:
+        result = await send()
+    return result, timing, False
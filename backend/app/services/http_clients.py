@@ -0,0 +1,130 @@
+"""
+HTTP Client Pool Module
+Long-lived, pooled httpx clients for outbound LLM API calls:
+- One AsyncClient per provider base URL (per event loop)
+- HTTP/2 when the h2 package is installed
+- Per-provider connection and keep-alive limits from settings
+- Latency hooks (connect / TTFB / total) for every request
+- Optional record / replay of provider traffic (cassettes)
+- Clean shutdown via aclose()
+"""
+
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Optional
+
+import httpx
+
+from app.services.cassettes import wrap_transport
+from app.services.latency import EVENT_HOOKS
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_available() -> bool:
+    """Check whether the optional h2 dependency is installed"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class HTTPClientPool:
+    """
+    Process-wide registry of pooled httpx.AsyncClient objects
+
+    Clients are keyed by base URL so every request to the same provider
+    reuses warm TCP/TLS connections. httpx connections are bound to the
+    event loop that opened them, so each running loop gets its own set of
+    clients (Celery tasks run each job in a fresh loop via asyncio.run).
+    """
+
+    def __init__(self):
+        # event loop -> {base_url: client}
+        self._clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+
+    def get_client(self, base_url: str, provider: Optional[str] = None) -> httpx.AsyncClient:
+        """
+        Get (or lazily create) the pooled client for a base URL
+
+        Args:
+            base_url: Provider API base URL, e.g. https://api.openai.com/v1
+            provider: Provider name used to look up per-provider limits
+
+        Returns:
+            Shared httpx.AsyncClient bound to the running event loop
+        """
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            loop_clients = self._clients.setdefault(loop, {})
+            client = loop_clients.get(base_url)
+
+            if client is None or client.is_closed:
+                client = self._build_client(base_url, provider)
+                loop_clients[base_url] = client
+
+        return client
+
+
+    def _build_client(self, base_url: str, provider: Optional[str]) -> httpx.AsyncClient:
+        """Create a pooled client using the settings for this provider"""
+        settings = get_settings()
+        overrides = settings.LLM_POOL_OVERRIDES.get(provider or "", {})
+
+        limits = httpx.Limits(
+            max_connections=overrides.get("max_connections", settings.LLM_MAX_CONNECTIONS),
+            max_keepalive_connections=overrides.get(
+                "max_keepalive_connections", settings.LLM_MAX_KEEPALIVE_CONNECTIONS
+            ),
+            keepalive_expiry=overrides.get("keepalive_expiry", settings.LLM_KEEPALIVE_EXPIRY),
+        )
+
+        http2 = overrides.get("http2", settings.LLM_HTTP2)
+        if http2 and not _http2_available():
+            logger.warning("h2 package not installed, falling back to HTTP/1.1. Run: pip install 'httpx[http2]'")
+            http2 = False
+
+        logger.info(
+            f"Creating pooled HTTP client for {base_url} "
+            f"(http2={http2}, max_connections={limits.max_connections}, "
+            f"keepalive={limits.max_keepalive_connections})"
+        )
+
+        # Limits and HTTP/2 live on the transport, which cassette record/replay may wrap
+        transport = wrap_transport(httpx.AsyncHTTPTransport(http2=http2, limits=limits))
+
+        return httpx.AsyncClient(
+            base_url=base_url,
+            transport=transport,
+            timeout=httpx.Timeout(settings.LLM_REQUEST_TIMEOUT),
+            event_hooks=EVENT_HOOKS,
+        )
+
+
+    async def aclose(self) -> None:
+        """
+        Close every client owned by the running event loop
+        Call at app shutdown and at the end of each Celery job loop
+        """
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            loop_clients = self._clients.pop(loop, {})
+
+        for base_url, client in loop_clients.items():
+            try:
+                await client.aclose()
+                logger.info(f"Closed pooled HTTP client for {base_url}")
+            except Exception as e:
+                logger.warning(f"Error closing HTTP client for {base_url}: {str(e)}")
+
+
+# Process-wide pool shared by all services
+http_client_pool = HTTPClientPool()
@@ -0,0 +1,325 @@
+"""
+Latency Module
+Timing of outbound LLM calls and latency histograms:
+- Per-call connect / time-to-first-byte / total on a monotonic clock,
+  captured by httpx event hooks and the httpcore trace extension
+- Mergeable log-bucketed histogram for p50/p90/p99
+- Process-wide histograms and rolling windows per (provider, model)
+"""
+
+import contextvars
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTiming:
+    """
+    Timing of one provider call
+
+    All values are milliseconds. connect_ms is 0 when a pooled connection
+    was reused and None when the transport does not report connects.
+    With retries, connect/TTFB/total describe the last attempt.
+    """
+
+    def __init__(self):
+        self.attempts = 0
+        self.connect_ms: Optional[float] = None
+        self.ttfb_ms: Optional[float] = None
+        self.total_ms: Optional[float] = None
+        self._call_started_at = time.perf_counter()
+        self._request_started_at: Optional[float] = None
+        self._connect_started_at: Optional[float] = None
+        self._body_done_at: Optional[float] = None
+
+
+    def on_request(self) -> None:
+        """Request is about to be sent"""
+        self.attempts += 1
+        self._request_started_at = time.perf_counter()
+        self._connect_started_at = None
+        self._body_done_at = None
+        self.connect_ms = 0.0
+        self.ttfb_ms = None
+
+
+    def on_trace(self, event_name: str) -> None:
+        """httpcore trace event (connection.connect_tcp.started, http11.receive_response_headers.complete, ...)"""
+        if self._request_started_at is None:
+            return
+
+        now = time.perf_counter()
+        if event_name == "connection.connect_tcp.started":
+            self._connect_started_at = now
+        elif event_name in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+            if self._connect_started_at is not None:
+                self.connect_ms = (now - self._connect_started_at) * 1000
+        elif event_name.endswith(".receive_response_headers.complete"):
+            self.ttfb_ms = (now - self._request_started_at) * 1000
+        elif event_name.endswith(".receive_response_body.complete"):
+            self._body_done_at = now
+
+
+    def on_response(self) -> None:
+        """Response headers received (fallback TTFB when the transport has no trace events)"""
+        if self._request_started_at is not None and self.ttfb_ms is None:
+            self.ttfb_ms = (time.perf_counter() - self._request_started_at) * 1000
+
+
+    def finish(self) -> None:
+        """
+        Close the measurement
+        Total runs from the last request start to the end of its body; calls
+        that never reached the HTTP hooks (cache hits, sync clients) are timed
+        end to end instead.
+        """
+        now = time.perf_counter()
+        if self._request_started_at is None:
+            self.total_ms = (now - self._call_started_at) * 1000
+        else:
+            self.total_ms = ((self._body_done_at or now) - self._request_started_at) * 1000
+
+
+    def to_dict(self) -> Dict[str, Optional[float]]:
+        """Rounded values for result dicts"""
+        def _round(value: Optional[float]) -> Optional[float]:
+            return round(value, 1) if value is not None else None
+
+        return {
+            "latency_ms": _round(self.total_ms),
+            "connect_ms": _round(self.connect_ms),
+            "ttfb_ms": _round(self.ttfb_ms),
+        }
+
+
+# Timing fields for results that did not reach a provider (cache hits)
+NO_TIMING: Dict[str, Optional[float]] = {"latency_ms": None, "connect_ms": None, "ttfb_ms": None}
+
+
+_current_timing: contextvars.ContextVar[Optional[RequestTiming]] = contextvars.ContextVar(
+    "llm_request_timing", default=None
+)
+
+
+@contextmanager
+def measure_latency() -> Iterator[RequestTiming]:
+    """
+    Time the provider call made inside the block
+
+    Requests sent by pooled clients within the block (in this task) report
+    into the yielded RequestTiming. Concurrent calls in other tasks get
+    their own context, so asyncio.gather'ed calls do not mix.
+    """
+    timing = RequestTiming()
+    token = _current_timing.set(timing)
+    try:
+        yield timing
+    finally:
+        _current_timing.reset(token)
+        timing.finish()
+
+
+async def _trace(event_name: str, info: dict) -> None:
+    timing = _current_timing.get()
+    if timing is not None:
+        timing.on_trace(event_name)
+
+
+async def _on_request(request: httpx.Request) -> None:
+    timing = _current_timing.get()
+    if timing is not None:
+        timing.on_request()
+        request.extensions["trace"] = _trace
+
+
+async def _on_response(response: httpx.Response) -> None:
+    timing = _current_timing.get()
+    if timing is not None:
+        timing.on_response()
+
+
+# Event hooks installed on every pooled AsyncClient
+EVENT_HOOKS = {"request": [_on_request], "response": [_on_response]}
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram
+
+    Bucket i covers [GROWTH**i, GROWTH**(i+1)) ms, so percentiles are within
+    ~5% relative error whatever the scale. Histograms merge by adding bucket
+    counts, so per-worker or per-shard histograms combine exactly.
+    """
+
+    GROWTH = 1.1
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+
+    def _bucket(self, value_ms: float) -> int:
+        return int(math.floor(math.log(max(value_ms, 1.0), self.GROWTH)))
+
+
+    def record(self, value_ms: float) -> None:
+        """Add one sample"""
+        bucket = self._bucket(value_ms)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value_ms
+        self.min = value_ms if self.min is None else min(self.min, value_ms)
+        self.max = value_ms if self.max is None else max(self.max, value_ms)
+
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add another histogram's samples into this one"""
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        if other.max is not None:
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Estimate a percentile
+
+        Args:
+            p: Percentile in 0-100
+
+        Returns:
+            Milliseconds (bucket midpoint, clamped to the observed min/max), or None if empty
+        """
+        if not self.count:
+            return None
+
+        rank = max(1, math.ceil(self.count * p / 100.0))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                midpoint = (self.GROWTH ** bucket + self.GROWTH ** (bucket + 1)) / 2
+                return min(max(midpoint, self.min), self.max)
+        return self.max
+
+
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """count, mean and p50/p90/p99 in ms"""
+        return {
+            "count": self.count,
+            "mean_ms": self.mean(),
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+        }
+
+
+    def to_dict(self) -> Dict:
+        """JSON-serializable form (for passing between workers)"""
+        return {
+            "buckets": {str(k): v for k, v in self.buckets.items()},
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "LatencyHistogram":
+        histogram = cls()
+        histogram.buckets = {int(k): v for k, v in data.get("buckets", {}).items()}
+        histogram.count = data.get("count", 0)
+        histogram.total = data.get("total", 0.0)
+        histogram.min = data.get("min")
+        histogram.max = data.get("max")
+        return histogram
+
+
+class RollingLatencyWindow:
+    """Last N latencies, for percentiles that follow current provider conditions"""
+
+    def __init__(self, size: int):
+        self.samples: deque = deque(maxlen=size)
+
+
+    def record(self, value_ms: float) -> None:
+        self.samples.append(value_ms)
+
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Exact percentile of the window (nearest rank), or None if empty"""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        rank = max(1, math.ceil(len(ordered) * p / 100.0))
+        return ordered[rank - 1]
+
+
+_histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+_windows: Dict[Tuple[str, str], RollingLatencyWindow] = {}
+_histograms_lock = threading.Lock()
+
+
+def record_latency(provider: str, model: str, latency_ms: Optional[float]) -> None:
+    """Record a live (non-cached) call in the process-wide histogram and window for (provider, model)"""
+    if latency_ms is None:
+        return
+    key = (provider, model)
+    with _histograms_lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = LatencyHistogram()
+            _windows[key] = RollingLatencyWindow(get_settings().LLM_LATENCY_WINDOW_SIZE)
+        histogram.record(latency_ms)
+        _windows[key].record(latency_ms)
+
+
+def rolling_percentile(provider: str, model: str, p: float, min_samples: int = 1) -> Optional[float]:
+    """
+    Percentile of the recent latencies of (provider, model)
+
+    Args:
+        provider: Provider name
+        model: Model name
+        p: Percentile in 0-100
+        min_samples: Return None until the window holds this many samples
+
+    Returns:
+        Milliseconds, or None when there is not enough data
+    """
+    with _histograms_lock:
+        window = _windows.get((provider, model))
+        if window is None or len(window.samples) < min_samples:
+            return None
+        return window.percentile(p)
+
+
+def get_latency_stats() -> List[Dict]:
+    """Per (provider, model) latency summaries since process start"""
+    with _histograms_lock:
+        return [
+            {"provider": provider, "model": model, **histogram.summary()}
+            for (provider, model), histogram in sorted(_histograms.items())
+        ]
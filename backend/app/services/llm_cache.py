@@ -0,0 +1,371 @@
+"""
+LLM Response Cache Module
+Content-addressed cache for provider responses:
+- Cache key = hash of (provider, base URL, model, system prompt, user prompt, temperature, max_tokens)
+- Only deterministic calls (temperature <= LLM_CACHE_MAX_TEMPERATURE) are cached
+- In-process LRU tier
+- SQLite disk tier
+- Shared Redis tier (Redis is already the Celery broker)
+- TTL and size-based eviction on every tier
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(
+    provider: str,
+    base_url: str,
+    model: str,
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float,
+    max_tokens: int
+) -> str:
+    """
+    Build a content-addressed key for one provider call
+
+    Args:
+        provider: Provider name (openai, deepseek, anthropic)
+        base_url: Resolved API base URL, so responses from an override (e.g. a
+            fake server) never mix with the real provider's
+        model: Model name
+        system_prompt: System instruction
+        user_prompt: Rendered user message
+        temperature: Sampling temperature
+        max_tokens: Max response length
+
+    Returns:
+        SHA-256 hex digest identifying the request
+    """
+    payload = json.dumps(
+        [provider, base_url, model, system_prompt, user_prompt, float(temperature), int(max_tokens)],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(temperature: float) -> bool:
+    """Sampled (temperature > LLM_CACHE_MAX_TEMPERATURE) responses are not cached: a replay would hide the variance"""
+    return temperature <= get_settings().LLM_CACHE_MAX_TEMPERATURE
+
+
+class CacheTier(ABC):
+    """
+    Abstract base class for cache tiers
+    Values are JSON-serializable result dicts
+    """
+
+    # True for tiers that do I/O and should run off the event loop
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value or None on miss/expiry"""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a value, evicting old entries if the tier is full"""
+        pass
+
+
+class MemoryCacheTier(CacheTier):
+    """In-process LRU tier with per-entry TTL"""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class DiskCacheTier(CacheTier):
+    """SQLite-backed tier that survives process restarts on a single host"""
+
+    blocking = True
+
+    # Size eviction scans the table, so only run it every N writes
+    EVICT_EVERY_N_WRITES = 100
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            if row[1] < now:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + self.ttl_seconds, now),
+            )
+            self._writes += 1
+
+            # Periodically drop expired rows, then least recently used rows above the size limit
+            if self._writes % self.EVICT_EVERY_N_WRITES == 0:
+                self._conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (now,))
+                self._conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN ("
+                    "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            self._conn.commit()
+
+
+class RedisCacheTier(CacheTier):
+    """
+    Shared Redis tier
+    TTL uses native key expiry; size is bounded by an LRU index kept in a sorted set
+    (scored by last access), from which keys idle past the TTL are pruned on write
+    """
+
+    blocking = True
+
+    def __init__(self, url: str, max_entries: int, ttl_seconds: int, prefix: str = "llmcache:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self.index_key = f"{prefix}__index__"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+
+        self.client.zadd(self.index_key, {key: time.time()})
+        return json.loads(raw)
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        now = time.time()
+        pipe = self.client.pipeline()
+        pipe.set(self.prefix + key, json.dumps(value), ex=self.ttl_seconds)
+        pipe.zadd(self.index_key, {key: now})
+        # Index entries not touched within the TTL belong to keys Redis already expired
+        pipe.zremrangebyscore(self.index_key, 0, now - self.ttl_seconds)
+        pipe.zcard(self.index_key)
+        size = pipe.execute()[-1]
+
+        if size > self.max_entries:
+            # Evict least recently used keys beyond the size limit
+            overflow = self.client.zrange(self.index_key, 0, size - self.max_entries - 1)
+            if overflow:
+                pipe = self.client.pipeline()
+                pipe.delete(*[self.prefix + k.decode() for k in overflow])
+                pipe.zrem(self.index_key, *overflow)
+                pipe.execute()
+
+
+class LLMResponseCache:
+    """
+    Multi-tier response cache
+    Lookups walk the tiers fastest-first and backfill faster tiers on a hit.
+    A failing tier (e.g. Redis down) is logged, treated as a miss and
+    skipped for a cool-down period so every call does not pay its timeout.
+    """
+
+    # Seconds to skip a tier after it raised
+    TIER_COOLDOWN_SECONDS = 30
+
+    def __init__(self, tiers: List[CacheTier]):
+        self.tiers = tiers
+        self.hits = 0
+        self.misses = 0
+        self._disabled_until: Dict[int, float] = {}
+
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a key synchronously"""
+        for idx, tier in enumerate(self.tiers):
+            value = self._tier_get(tier, key)
+            if value is not None:
+                for upper in self.tiers[:idx]:
+                    self._tier_set(upper, key, value)
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a value in every tier synchronously"""
+        for tier in self.tiers:
+            self._tier_set(tier, key, value)
+
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a key, running blocking tiers in a worker thread"""
+        for idx, tier in enumerate(self.tiers):
+            if tier.blocking:
+                value = await asyncio.to_thread(self._tier_get, tier, key)
+            else:
+                value = self._tier_get(tier, key)
+
+            if value is not None:
+                for upper in self.tiers[:idx]:
+                    await self._atier_set(upper, key, value)
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+
+    async def aset(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a value in every tier, running blocking tiers in a worker thread"""
+        for tier in self.tiers:
+            await self._atier_set(tier, key, value)
+
+
+    async def _atier_set(self, tier: CacheTier, key: str, value: Dict[str, Any]) -> None:
+        if tier.blocking:
+            await asyncio.to_thread(self._tier_set, tier, key, value)
+        else:
+            self._tier_set(tier, key, value)
+
+
+    def _tier_get(self, tier: CacheTier, key: str) -> Optional[Dict[str, Any]]:
+        if self._is_disabled(tier):
+            return None
+        try:
+            return tier.get(key)
+        except Exception as e:
+            self._disable(tier, e)
+            return None
+
+
+    def _tier_set(self, tier: CacheTier, key: str, value: Dict[str, Any]) -> None:
+        if self._is_disabled(tier):
+            return
+        try:
+            tier.set(key, value)
+        except Exception as e:
+            self._disable(tier, e)
+
+
+    def _is_disabled(self, tier: CacheTier) -> bool:
+        return self._disabled_until.get(id(tier), 0.0) > time.monotonic()
+
+
+    def _disable(self, tier: CacheTier, error: Exception) -> None:
+        logger.warning(
+            f"{type(tier).__name__} failed: {str(error)}. "
+            f"Skipping it for {self.TIER_COOLDOWN_SECONDS}s"
+        )
+        self._disabled_until[id(tier)] = time.monotonic() + self.TIER_COOLDOWN_SECONDS
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """
+    Get the process-wide response cache built from settings
+
+    Returns:
+        LLMResponseCache, or None when caching is disabled
+    """
+    global _cache
+
+    settings = get_settings()
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+
+    with _cache_lock:
+        if _cache is None:
+            tiers: List[CacheTier] = []
+            for name in [t.strip() for t in settings.LLM_CACHE_TIERS.split(",") if t.strip()]:
+                try:
+                    if name == "memory":
+                        tiers.append(MemoryCacheTier(
+                            settings.LLM_CACHE_MEMORY_MAX_ENTRIES, settings.LLM_CACHE_TTL_SECONDS
+                        ))
+                    elif name == "disk":
+                        tiers.append(DiskCacheTier(
+                            settings.LLM_CACHE_DISK_PATH,
+                            settings.LLM_CACHE_SHARED_MAX_ENTRIES,
+                            settings.LLM_CACHE_TTL_SECONDS,
+                        ))
+                    elif name == "redis":
+                        tiers.append(RedisCacheTier(
+                            settings.LLM_CACHE_REDIS_URL,
+                            settings.LLM_CACHE_SHARED_MAX_ENTRIES,
+                            settings.LLM_CACHE_TTL_SECONDS,
+                        ))
+                    else:
+                        logger.warning(f"Unknown LLM cache tier: {name}")
+                except Exception as e:
+                    logger.warning(f"LLM cache tier {name} unavailable: {str(e)}")
+
+            _cache = LLMResponseCache(tiers)
+            logger.info(f"LLM response cache initialized with tiers: {[type(t).__name__ for t in tiers]}")
+
+    return _cache
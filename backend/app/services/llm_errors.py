@@ -0,0 +1,200 @@
+"""
+LLM Errors Module
+Provider error taxonomy and retry policy:
+- Errors are sorted into retriable kinds (timeouts, connection, 429, 5xx)
+  and fatal kinds (bad request, context length, auth, not found)
+- Auth errors abort the whole evaluation cycle, other fatal errors fail the row
+- Jittered exponential backoff
+- Retry budget shared by every call of a cycle (set with use_retry_budget)
+"""
+
+import asyncio
+import contextvars
+import logging
+import random
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import httpx
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Error kinds
+TIMEOUT = "timeout"
+CONNECTION = "connection"
+RATE_LIMITED = "rate_limited"
+SERVER_ERROR = "server_error"
+AUTH = "auth"
+BAD_REQUEST = "bad_request"
+CONTEXT_LENGTH = "context_length"
+NOT_FOUND = "not_found"
+# The provider's circuit breaker is open; no request was sent
+CIRCUIT_OPEN = "circuit_open"
+UNKNOWN = "unknown"
+
+RETRIABLE_KINDS = {TIMEOUT, CONNECTION, RATE_LIMITED, SERVER_ERROR}
+
+_CONTEXT_LENGTH_MARKERS = (
+    "context_length_exceeded",
+    "maximum context length",
+    "context length",
+    "prompt is too long",
+    "too many tokens",
+)
+
+
+class LLMCallError(Exception):
+    """A classified provider failure"""
+
+    def __init__(self, kind: str, provider: str, message: str, status_code: Optional[int] = None):
+        self.kind = kind
+        self.provider = provider
+        self.status_code = status_code
+        super().__init__(message)
+
+
+    @property
+    def retriable(self) -> bool:
+        return self.kind in RETRIABLE_KINDS
+
+
+    @property
+    def aborts_cycle(self) -> bool:
+        """Every later row would fail the same way (invalid or missing API key)"""
+        return self.kind == AUTH
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    return status_code if isinstance(status_code, int) else None
+
+
+def error_kind(status_code: Optional[int] = None, message: str = "", error: Optional[BaseException] = None) -> str:
+    """
+    Classify a failure from its HTTP status, message and/or exception
+
+    Args:
+        status_code: HTTP status, if a response was received
+        message: Error text (used to spot context-length errors)
+        error: The exception, if any
+
+    Returns:
+        One of the error kinds above
+    """
+    if error is not None:
+        if isinstance(error, LLMCallError):
+            return error.kind
+        if status_code is None:
+            status_code = _status_code(error)
+        message = message or str(error)
+
+    if status_code is not None:
+        if status_code == 429:
+            return RATE_LIMITED
+        if status_code in (408, 504):
+            return TIMEOUT
+        if status_code >= 500:
+            return SERVER_ERROR
+        if status_code in (401, 403):
+            return AUTH
+        if status_code == 404:
+            return NOT_FOUND
+        if status_code in (400, 413, 422):
+            lowered = message.lower()
+            if any(marker in lowered for marker in _CONTEXT_LENGTH_MARKERS):
+                return CONTEXT_LENGTH
+            return BAD_REQUEST
+        return UNKNOWN
+
+    if error is None:
+        return UNKNOWN
+    if isinstance(error, (httpx.TimeoutException, asyncio.TimeoutError, TimeoutError)):
+        return TIMEOUT
+    if isinstance(error, (httpx.TransportError, ConnectionError)):
+        return CONNECTION
+    # SDK errors without a response (openai.APITimeoutError, anthropic.APIConnectionError, ...)
+    name = type(error).__name__
+    if "Timeout" in name:
+        return TIMEOUT
+    if "Connection" in name:
+        return CONNECTION
+    if "Authentication" in name or "PermissionDenied" in name:
+        return AUTH
+    return UNKNOWN
+
+
+def classify_error(error: BaseException, provider: str) -> LLMCallError:
+    """Wrap a provider exception as an LLMCallError"""
+    if isinstance(error, LLMCallError):
+        return error
+    return LLMCallError(error_kind(error=error), provider, str(error), _status_code(error))
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Full-jitter exponential backoff
+
+    Args:
+        attempt: 1 for the first retry, 2 for the second, ...
+
+    Returns:
+        Seconds, uniform in [0, min(cap, base * 2**attempt)]
+    """
+    settings = get_settings()
+    ceiling = min(settings.LLM_RETRY_MAX_BACKOFF_SECONDS, settings.LLM_RETRY_BASE_SECONDS * 2 ** attempt)
+    return random.uniform(0, ceiling)
+
+
+class RetryBudget:
+    """
+    Retries allowed across one evaluation cycle
+
+    At most min_retries + ratio * calls retries, so a degraded provider
+    cannot multiply a cycle's traffic (and duration) by max_retries.
+    """
+
+    def __init__(self, ratio: Optional[float] = None, min_retries: Optional[int] = None):
+        settings = get_settings()
+        self.ratio = ratio if ratio is not None else settings.LLM_RETRY_BUDGET_RATIO
+        self.min_retries = min_retries if min_retries is not None else settings.LLM_RETRY_BUDGET_MIN
+        self.calls = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+
+    def record_call(self) -> None:
+        with self._lock:
+            self.calls += 1
+
+
+    def try_spend(self) -> bool:
+        """Take one retry from the budget; False when it is used up"""
+        with self._lock:
+            if self.retries >= self.min_retries + self.ratio * self.calls:
+                return False
+            self.retries += 1
+            return True
+
+
+_current_budget: contextvars.ContextVar[Optional[RetryBudget]] = contextvars.ContextVar(
+    "llm_retry_budget", default=None
+)
+
+
+@contextmanager
+def use_retry_budget(budget: RetryBudget) -> Iterator[RetryBudget]:
+    """Charge retries of provider calls made inside the block (and tasks started from it) to budget"""
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _current_budget.reset(token)
+
+
+def current_retry_budget() -> Optional[RetryBudget]:
+    return _current_budget.get()
@@ -1,83 +1,146 @@
 """
 LLM Evaluation Service - REAL API CALLS
 Handles parallel API calls to OpenAI and DeepSeek
+Requests go through the process-wide pooled clients in http_clients
+and are paced by the shared per-provider rate limiters; a provider whose
+circuit breaker is open fails rows immediately
+Optional token streaming (stream=True) reports deltas as they arrive and
+records time-to-first-token
 """
 import httpx
 import asyncio
-from typing import Dict
+import json
+import time
+from typing import Callable, Dict, Optional, Tuple
 import logging
 
+from app.services.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from app.services.http_clients import http_client_pool
+from app.services.provider_registry import provider_base_url
+from app.services.llm_errors import AUTH, CIRCUIT_OPEN, TIMEOUT, LLMCallError, error_kind
+from app.services.llm_cache import get_llm_cache, is_cacheable, make_cache_key
+from app.services.rate_limiter import AdaptiveRateLimiter, get_rate_limiter
+from app.services import tokenizer
+from app.services.hedging import HedgePolicy, run_timed
+from app.services.latency import NO_TIMING, record_latency
+from config import get_settings
+
 logger = logging.getLogger(__name__)
 
+
+def _is_ok(sent: Tuple[httpx.Response, Optional[Dict], Optional[float]]) -> bool:
+    """A hedged copy only wins with a 200; 429/5xx copies wait for the other one"""
+    return sent[0].status_code == 200
+
+
 class LLMEvaluationService:
     """Service to evaluate prompts with multiple LLMs"""
     
-    def __init__(self, openai_key: str = "", deepseek_key: str = "", anthropic_key: str = ""):
+    def __init__(
+        self,
+        openai_key: str = "",
+        deepseek_key: str = "",
+        anthropic_key: str = "",
+        temperature: float = 0.7,
+        hedge_policy: Optional[HedgePolicy] = None
+    ):
         self.openai_key = openai_key.strip() if openai_key else ""
         self.deepseek_key = deepseek_key.strip() if deepseek_key else ""
         self.anthropic_key = anthropic_key.strip() if anthropic_key else ""
-        self.openai_base = "https://api.openai.com/v1"
-        self.deepseek_base = "https://api.deepseek.com/v1"
-        self.timeout = httpx.Timeout(60.0)
+        self.openai_base = provider_base_url("openai", "https://api.openai.com/v1")
+        self.deepseek_base = provider_base_url("deepseek", "https://api.deepseek.com/v1")
+        self.temperature = temperature
+        self.max_tokens = 500
+        # Sampled runs (temperature above LLM_CACHE_MAX_TEMPERATURE) never read or fill the cache
+        self.cache = get_llm_cache() if is_cacheable(self.temperature) else None
+        # Hedge straggling non-streamed calls (one policy, and budget, per evaluation run)
+        self.hedge_policy = hedge_policy
         
         logger.info(f"LLMEvaluationService initialized")
         logger.info(f"  OpenAI key present: {bool(self.openai_key)}")
         logger.info(f"  DeepSeek key present: {bool(self.deepseek_key)}")
     
-    async def call_openai(self, system_prompt: str, user_message: str, model: str = "gpt-4") -> Dict:
-        """Call OpenAI API"""
+    async def call_openai(
+        self,
+        system_prompt: str,
+        user_message: str,
+        model: str = "gpt-4",
+        on_delta: Optional[Callable[[str], None]] = None
+    ) -> Dict:
+        """
+        Call OpenAI API
+        With on_delta the response is streamed and on_delta gets each text chunk
+        """
         logger.info(f"🟦 Calling OpenAI with model: {model}")
         
         try:
             if not self.openai_key:
                 logger.error("❌ OpenAI API key is missing!")
-                return {"error": "OpenAI API key not provided", "response": "[Error: No API Key]", "tokens": 0}
+                return {"error": "OpenAI API key not provided", "error_kind": AUTH, "response": "[Error: No API Key]", "tokens": 0}
+            
+            cache_key = make_cache_key(
+                "openai", self.openai_base, model, system_prompt, user_message, self.temperature, self.max_tokens
+            )
+            if self.cache:
+                cached = await self.cache.aget(cache_key)
+                if cached is not None:
+                    logger.info(f"✅ OpenAI cache hit for model: {model}")
+                    if on_delta:
+                        on_delta(cached["response"])
+                    return {**cached, **NO_TIMING, "cached": True, "hedged": False, "ttft_ms": None}
             
             logger.debug(f"  Endpoint: {self.openai_base}/chat/completions")
             logger.debug(f"  System: {system_prompt[:50]}...")
             logger.debug(f"  User: {user_message[:50]}...")
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.openai_base}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.openai_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": model,
-                        "messages": [
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": user_message}
-                        ],
-                        "temperature": 0.7,
-                        "max_tokens": 500,
-                    }
+            async def send():
+                return await self._send_guarded(
+                    "openai", self.openai_base, self.openai_key, model, system_prompt, user_message, on_delta
                 )
-                
-                logger.info(f"OpenAI response status: {response.status_code}")
-                
-                if response.status_code != 200:
-                    error_text = response.text[:200]
-                    logger.error(f"❌ OpenAI API error {response.status_code}: {error_text}")
-                    return {
-                        "error": f"OpenAI error {response.status_code}",
-                        "response": f"[OpenAI Error {response.status_code}]",
-                        "tokens": 0
-                    }
-                
-                data = response.json()
-                result = {
-                    "response": data["choices"][0]["message"]["content"],
-                    "tokens": data["usage"]["total_tokens"],
-                    "model": model,
+            
+            # Streamed calls are not hedged: both copies would emit deltas.
+            # A 429/5xx copy does not win the hedge while the other is still running.
+            (response, data, ttft_ms), timing, hedged = await run_timed(
+                send, "openai", model, None if on_delta else self.hedge_policy, is_success=_is_ok
+            )
+            
+            logger.info(f"OpenAI response status: {response.status_code}")
+            
+            if response.status_code != 200:
+                error_text = response.text[:200]
+                logger.error(f"❌ OpenAI API error {response.status_code}: {error_text}")
+                return {
+                    "error": f"OpenAI error {response.status_code}",
+                    "error_kind": error_kind(response.status_code, error_text),
+                    "response": f"[OpenAI Error {response.status_code}]",
+                    "tokens": 0
                 }
-                logger.info(f"✅ OpenAI response ({result['tokens']} tokens): {result['response'][:50]}...")
-                return result
-        except asyncio.TimeoutError:
+            
+            result = {
+                "response": data["choices"][0]["message"]["content"],
+                "tokens": data["usage"]["total_tokens"],
+                "model": model,
+            }
+            logger.info(f"✅ OpenAI response ({result['tokens']} tokens, {timing.total_ms:.0f}ms): {result['response'][:50]}...")
+            record_latency("openai", model, timing.total_ms)
+            
+            if self.cache:
+                await self.cache.aset(cache_key, result)
+            
+            return {**result, **timing.to_dict(), "cached": None if self.cache is None else False, "hedged": hedged, "ttft_ms": ttft_ms}
+        except CircuitOpenError as e:
+            logger.warning(f"⚠️ OpenAI circuit open, failing fast")
+            return {
+                "error": str(e),
+                "error_kind": CIRCUIT_OPEN,
+                "response": "[OpenAI unavailable: circuit open]",
+                "tokens": 0
+            }
+        except (asyncio.TimeoutError, httpx.TimeoutException):
             logger.warning(f"⚠️ OpenAI timeout")
             return {
                 "error": "OpenAI timeout",
+                "error_kind": TIMEOUT,
                 "response": "[Timeout: OpenAI took too long]",
                 "tokens": 0
             }
@@ -85,64 +148,92 @@ class LLMEvaluationService:
             logger.error(f"❌ OpenAI exception: {str(e)}")
             return {
                 "error": f"OpenAI error: {str(e)}",
+                "error_kind": error_kind(error=e),
                 "response": f"[Error: {str(e)[:50]}]",
                 "tokens": 0
             }
     
-    async def call_deepseek(self, system_prompt: str, user_message: str, model: str = "deepseek-chat") -> Dict:
-        """Call DeepSeek API"""
+    async def call_deepseek(
+        self,
+        system_prompt: str,
+        user_message: str,
+        model: str = "deepseek-chat",
+        on_delta: Optional[Callable[[str], None]] = None
+    ) -> Dict:
+        """
+        Call DeepSeek API
+        With on_delta the response is streamed and on_delta gets each text chunk
+        """
         logger.info(f"🟥 Calling DeepSeek with model: {model}")
         
         try:
             if not self.deepseek_key:
                 logger.error("❌ DeepSeek API key is missing!")
-                return {"error": "DeepSeek API key not provided", "response": "[Error: No API Key]", "tokens": 0}
+                return {"error": "DeepSeek API key not provided", "error_kind": AUTH, "response": "[Error: No API Key]", "tokens": 0}
+            
+            cache_key = make_cache_key(
+                "deepseek", self.deepseek_base, model, system_prompt, user_message, self.temperature, self.max_tokens
+            )
+            if self.cache:
+                cached = await self.cache.aget(cache_key)
+                if cached is not None:
+                    logger.info(f"✅ DeepSeek cache hit for model: {model}")
+                    if on_delta:
+                        on_delta(cached["response"])
+                    return {**cached, **NO_TIMING, "cached": True, "hedged": False, "ttft_ms": None}
             
             logger.debug(f"  Endpoint: {self.deepseek_base}/chat/completions")
             logger.debug(f"  System: {system_prompt[:50]}...")
             logger.debug(f"  User: {user_message[:50]}...")
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.deepseek_base}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.deepseek_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": model,
-                        "messages": [
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": user_message}
-                        ],
-                        "temperature": 0.7,
-                        "max_tokens": 500,
-                    }
+            async def send():
+                return await self._send_guarded(
+                    "deepseek", self.deepseek_base, self.deepseek_key, model, system_prompt, user_message, on_delta
                 )
-                
-                logger.info(f"DeepSeek response status: {response.status_code}")
-                
-                if response.status_code != 200:
-                    error_text = response.text[:200]
-                    logger.error(f"❌ DeepSeek API error {response.status_code}: {error_text}")
-                    return {
-                        "error": f"DeepSeek error {response.status_code}",
-                        "response": f"[DeepSeek Error {response.status_code}]",
-                        "tokens": 0
-                    }
-                
-                data = response.json()
-                result = {
-                    "response": data["choices"][0]["message"]["content"],
-                    "tokens": data["usage"]["total_tokens"],
-                    "model": model,
+            
+            # Streamed calls are not hedged: both copies would emit deltas.
+            # A 429/5xx copy does not win the hedge while the other is still running.
+            (response, data, ttft_ms), timing, hedged = await run_timed(
+                send, "deepseek", model, None if on_delta else self.hedge_policy, is_success=_is_ok
+            )
+            
+            logger.info(f"DeepSeek response status: {response.status_code}")
+            
+            if response.status_code != 200:
+                error_text = response.text[:200]
+                logger.error(f"❌ DeepSeek API error {response.status_code}: {error_text}")
+                return {
+                    "error": f"DeepSeek error {response.status_code}",
+                    "error_kind": error_kind(response.status_code, error_text),
+                    "response": f"[DeepSeek Error {response.status_code}]",
+                    "tokens": 0
                 }
-                logger.info(f"✅ DeepSeek response ({result['tokens']} tokens): {result['response'][:50]}...")
-                return result
-        except asyncio.TimeoutError:
+            
+            result = {
+                "response": data["choices"][0]["message"]["content"],
+                "tokens": data["usage"]["total_tokens"],
+                "model": model,
+            }
+            logger.info(f"✅ DeepSeek response ({result['tokens']} tokens, {timing.total_ms:.0f}ms): {result['response'][:50]}...")
+            record_latency("deepseek", model, timing.total_ms)
+            
+            if self.cache:
+                await self.cache.aset(cache_key, result)
+            
+            return {**result, **timing.to_dict(), "cached": None if self.cache is None else False, "hedged": hedged, "ttft_ms": ttft_ms}
+        except CircuitOpenError as e:
+            logger.warning(f"⚠️ DeepSeek circuit open, failing fast")
+            return {
+                "error": str(e),
+                "error_kind": CIRCUIT_OPEN,
+                "response": "[DeepSeek unavailable: circuit open]",
+                "tokens": 0
+            }
+        except (asyncio.TimeoutError, httpx.TimeoutException):
             logger.warning(f"⚠️ DeepSeek timeout")
             return {
                 "error": "DeepSeek timeout",
+                "error_kind": TIMEOUT,
                 "response": "[Timeout: DeepSeek took too long]",
                 "tokens": 0
             }
@@ -150,29 +241,198 @@ class LLMEvaluationService:
             logger.error(f"❌ DeepSeek exception: {str(e)}")
             return {
                 "error": f"DeepSeek error: {str(e)}",
+                "error_kind": error_kind(error=e),
                 "response": f"[Error: {str(e)[:50]}]",
                 "tokens": 0
             }
     
+    async def _send_guarded(
+        self,
+        provider: str,
+        base_url: str,
+        api_key: str,
+        model: str,
+        system_prompt: str,
+        user_message: str,
+        on_delta: Optional[Callable[[str], None]]
+    ) -> Tuple[httpx.Response, Optional[Dict], Optional[float]]:
+        """
+        One chat completion behind the provider's circuit breaker and rate limiter
+        Every request (each copy of a hedged call) reports its status to the limiter
+        
+        Returns:
+            Tuple of (response, parsed JSON, ttft_ms)
+        
+        Raises:
+            CircuitOpenError: The provider is failing; no request was sent
+        """
+        breaker = get_circuit_breaker(provider, base_url)
+        if breaker:
+            breaker.before_call()
+        
+        limiter = await self._acquire_rate_limit(provider, model, system_prompt, user_message)
+        client = http_client_pool.get_client(base_url, provider=provider)
+        try:
+            response, data, ttft_ms = await self._send_chat_completion(
+                client, api_key, model, system_prompt, user_message, on_delta
+            )
+        except Exception as e:
+            if breaker:
+                breaker.record_outcome(e)
+            raise
+        
+        if breaker:
+            breaker.record_outcome(status_code=response.status_code)
+        if limiter:
+            if response.status_code == 429:
+                limiter.on_rate_limited(response.headers)
+            elif response.status_code == 200:
+                limiter.on_success(response.headers)
+        return response, data, ttft_ms
+    
+    async def _send_chat_completion(
+        self,
+        client: httpx.AsyncClient,
+        api_key: str,
+        model: str,
+        system_prompt: str,
+        user_message: str,
+        on_delta: Optional[Callable[[str], None]] = None
+    ) -> Tuple[httpx.Response, Optional[Dict], Optional[float]]:
+        """
+        POST /chat/completions (OpenAI-compatible), optionally streaming
+        
+        Args:
+            client: Pooled client for the provider base URL
+            api_key: Bearer token
+            model: Model name
+            system_prompt: System instruction
+            user_message: Rendered user message
+            on_delta: If set, stream the response and call this with each text chunk
+            
+        Returns:
+            Tuple of (response, completion JSON in the non-streaming shape or None
+            on a non-200 status, time-to-first-token in ms when streamed)
+        """
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message}
+            ],
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+        }
+        
+        if not on_delta:
+            response = await client.post("/chat/completions", headers=headers, json=payload)
+            return response, response.json() if response.status_code == 200 else None, None
+        
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+        
+        started_at = time.perf_counter()
+        ttft_ms = None
+        chunks = []
+        usage = None
+        
+        async with client.stream(
+            "POST", "/chat/completions", headers=headers, json=payload
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                return response, None, None
+            
+            # Server-sent events: "data: {json}" lines, terminated by "data: [DONE]"
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                body = line[len("data:"):].strip()
+                if body == "[DONE]":
+                    break
+                
+                event = json.loads(body)
+                if event.get("usage"):
+                    usage = event["usage"]
+                
+                for choice in event.get("choices") or []:
+                    text = (choice.get("delta") or {}).get("content")
+                    if text:
+                        if ttft_ms is None:
+                            ttft_ms = (time.perf_counter() - started_at) * 1000
+                        chunks.append(text)
+                        on_delta(text)
+        
+        content = "".join(chunks)
+        if usage is None:
+            # Provider did not report usage on the stream; count locally
+            prompt_tokens = tokenizer.count_tokens(system_prompt, model) + tokenizer.count_tokens(user_message, model)
+            usage = {"total_tokens": prompt_tokens + tokenizer.count_tokens(content, model)}
+        
+        data = {
+            "choices": [{"message": {"role": "assistant", "content": content}}],
+            "usage": usage,
+        }
+        return response, data, ttft_ms
+    
+    async def _acquire_rate_limit(
+        self,
+        provider: str,
+        model: str,
+        system_prompt: str,
+        user_message: str
+    ) -> Optional[AdaptiveRateLimiter]:
+        """Wait for the shared limiter of this provider/model; returns None when rate limiting is disabled"""
+        if not get_settings().LLM_RATE_LIMIT_ENABLED:
+            return None
+        
+        limiter = get_rate_limiter(provider, model)
+        # Prompt tokens plus the output budget, as charged against tokens-per-minute limits
+        estimated_tokens = (
+            tokenizer.count_tokens(system_prompt, model) + tokenizer.count_tokens(user_message, model) + self.max_tokens
+        )
+        await limiter.acquire(estimated_tokens)
+        return limiter
+    
     async def evaluate_row(self, 
                           system_prompt: str, 
                           user_prompt_template: str,
                           question: str,
                           expected_answer: str,
                           model_a: str = "gpt-4",
-                          model_b: str = "deepseek-chat") -> Dict:
-        """Evaluate a single row with both models in PARALLEL"""
+                          model_b: str = "deepseek-chat",
+                          on_delta: Optional[Callable[[str, str], None]] = None) -> Dict:
+        """
+        Evaluate a single row with both models in PARALLEL
+        With on_delta both responses are streamed; on_delta("a" | "b", text) gets each chunk
+        A failed call sets model_a_error / model_b_error (and _error_kind); such
+        rows have no accuracy for that model and no winner
+        """
         
         user_message = user_prompt_template.replace("{Question}", question)
         
         logger.info(f"Starting parallel evaluation for: {question[:50]}...")
         
+        on_delta_a = (lambda text: on_delta("a", text)) if on_delta else None
+        on_delta_b = (lambda text: on_delta("b", text)) if on_delta else None
+        
         # Call both APIs IN PARALLEL
-        openai_task = self.call_openai(system_prompt, user_message, model_a)
-        deepseek_task = self.call_deepseek(system_prompt, user_message, model_b)
+        openai_task = self.call_openai(system_prompt, user_message, model_a, on_delta=on_delta_a)
+        deepseek_task = self.call_deepseek(system_prompt, user_message, model_b, on_delta=on_delta_b)
         
         openai_result, deepseek_result = await asyncio.gather(openai_task, deepseek_task)
         
+        # A rejected API key fails every row: stop the run instead of scoring error text.
+        # An open circuit fails just this row (row_error), its placeholder is not an answer.
+        for kind in (AUTH, CIRCUIT_OPEN):
+            for provider, result in (("openai", openai_result), ("deepseek", deepseek_result)):
+                if result.get("error_kind") == kind:
+                    raise LLMCallError(kind, provider, result["error"])
+        
         logger.info(f"Both API calls completed")
         
         # Extract responses (handle errors gracefully)
@@ -188,16 +448,25 @@ class LLMEvaluationService:
             matches = len(response_words & expected_words)
             return min(matches / len(expected_words), 1.0)
         
-        openai_accuracy = calculate_accuracy(openai_response, expected_answer)
-        deepseek_accuracy = calculate_accuracy(deepseek_response, expected_answer)
+        # A failed call (429, 5xx, timeout) has no answer to score: no accuracy, no winner
+        openai_error = openai_result.get("error")
+        deepseek_error = deepseek_result.get("error")
+        openai_accuracy = None if openai_error else calculate_accuracy(openai_response, expected_answer)
+        deepseek_accuracy = None if deepseek_error else calculate_accuracy(deepseek_response, expected_answer)
         
-        winner = model_a if openai_accuracy >= deepseek_accuracy else model_b
+        winner = None
+        if not openai_error and not deepseek_error:
+            winner = model_a if openai_accuracy >= deepseek_accuracy else model_b
         
-        openai_cost = (openai_result.get("tokens", 0) / 1000) * 0.015
-        deepseek_cost = (deepseek_result.get("tokens", 0) / 1000000) * 0.14
+        # Cache hits were paid for by the run that stored them
+        openai_cost = 0.0 if openai_result.get("cached") else (openai_result.get("tokens", 0) / 1000) * 0.015
+        deepseek_cost = 0.0 if deepseek_result.get("cached") else (deepseek_result.get("tokens", 0) / 1000000) * 0.14
         
-        logger.info(f"Accuracy - OpenAI: {openai_accuracy*100:.1f}%, DeepSeek: {deepseek_accuracy*100:.1f}%")
-        logger.info(f"Winner: {winner}")
+        if winner:
+            logger.info(f"Accuracy - OpenAI: {openai_accuracy*100:.1f}%, DeepSeek: {deepseek_accuracy*100:.1f}%")
+            logger.info(f"Winner: {winner}")
+        else:
+            logger.warning(f"Row failed - OpenAI: {openai_error or 'ok'}, DeepSeek: {deepseek_error or 'ok'}")
         
         return {
             "question": question,
@@ -206,11 +475,25 @@ class LLMEvaluationService:
             "model_a_tokens": openai_result.get("tokens", 0),
             "model_a_cost": openai_cost,
             "model_a_accuracy": openai_accuracy,
-            "model_a_latency": 2.5,
+            "model_a_latency": round((openai_result.get("latency_ms") or 0) / 1000, 3),
+            "model_a_connect_ms": openai_result.get("connect_ms"),
+            "model_a_ttfb_ms": openai_result.get("ttfb_ms"),
+            "model_a_cached": openai_result.get("cached"),
+            "model_a_hedged": openai_result.get("hedged", False),
+            "model_a_ttft_ms": openai_result.get("ttft_ms"),
+            "model_a_error": openai_error,
+            "model_a_error_kind": openai_result.get("error_kind"),
             "model_b_response": deepseek_response,
             "model_b_tokens": deepseek_result.get("tokens", 0),
             "model_b_cost": deepseek_cost,
             "model_b_accuracy": deepseek_accuracy,
-            "model_b_latency": 1.5,
+            "model_b_latency": round((deepseek_result.get("latency_ms") or 0) / 1000, 3),
+            "model_b_connect_ms": deepseek_result.get("connect_ms"),
+            "model_b_ttfb_ms": deepseek_result.get("ttfb_ms"),
+            "model_b_cached": deepseek_result.get("cached"),
+            "model_b_hedged": deepseek_result.get("hedged", False),
+            "model_b_ttft_ms": deepseek_result.get("ttft_ms"),
+            "model_b_error": deepseek_error,
+            "model_b_error_kind": deepseek_result.get("error_kind"),
             "winner": winner,
         }
@@ -12,21 +12,293 @@ Handles all LLM API interactions:
 import os
 import time
 import logging
-from typing import Dict, Any, Optional, Tuple, List
+from typing import Dict, Any, Optional, Tuple, List, Callable, Awaitable
 from abc import ABC, abstractmethod
-import json
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import weakref
+
+from app.services.http_clients import http_client_pool
+from app.services.llm_cache import get_llm_cache, is_cacheable, make_cache_key
+from app.services.provider_registry import provider_base_url, provider_registry
+from app.services.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from app.services.llm_errors import LLMCallError, backoff_delay, classify_error, current_retry_budget
+from app.services.rate_limiter import AdaptiveRateLimiter, get_rate_limiter, parse_retry_after
+from app.services import tokenizer
+from app.services.hedging import HedgePolicy, run_timed
+from app.services.latency import NO_TIMING, measure_latency, record_latency
+from config import get_settings
 
 logger = logging.getLogger(__name__)
 
 
+class _RetryAttempts:
+    """
+    Per-call retry bookkeeping shared by the sync and async retry loops
+    (circuit breaker, rate limiter feedback, retry budget, error classification);
+    the loops only differ in how they wait and send
+    """
+    
+    def __init__(self, provider: "LLMProvider", model: str, max_retries: int):
+        self.provider = provider
+        self.model = model
+        self.max_retries = max_retries
+        self.limiter = provider._get_rate_limiter(model)
+        self.breaker = provider._get_circuit_breaker()
+        self.budget = current_retry_budget()
+        if self.budget:
+            self.budget.record_call()
+        self.retry_count = 0
+        self.last_error: Optional[LLMCallError] = None
+    
+    
+    @property
+    def remaining(self) -> bool:
+        return self.retry_count < self.max_retries
+    
+    
+    def before_attempt(self) -> None:
+        """Raises CircuitOpenError (not retried) while the provider is failing"""
+        if self.breaker:
+            self.breaker.before_call()
+        logger.debug(
+            f"Calling {self.provider.DISPLAY_NAME} {self.model} (attempt {self.retry_count + 1}/{self.max_retries})"
+        )
+    
+    
+    def after_success(self, headers: Any) -> None:
+        if self.limiter:
+            self.limiter.on_success(headers)
+        if self.breaker:
+            self.breaker.record_success()
+    
+    
+    def after_error(self, e: Exception) -> float:
+        """
+        Record a failed attempt
+        
+        Returns:
+            Seconds to wait before the next attempt
+            
+        Raises:
+            LLMCallError: The error is fatal or the cycle's retry budget is used up
+        """
+        name = self.provider.DISPLAY_NAME
+        error = classify_error(e, self.provider.PROVIDER_NAME)
+        self.last_error = error
+        self.retry_count += 1
+        if self.breaker:
+            self.breaker.record_outcome(e)
+        
+        # Bad request, context length, invalid key, ...: retrying cannot help
+        if not error.retriable:
+            logger.error(f"{name} call failed ({error.kind}), not retrying: {str(e)}")
+            raise error from e
+        
+        # Breaker just opened: skip the backoff, the next attempt fails fast
+        if self.breaker and self.breaker.is_open:
+            return 0
+        if not self.remaining:
+            logger.error(f"{name} call failed after {self.max_retries} retries: {str(e)}")
+            return 0
+        if self.budget and not self.budget.try_spend():
+            logger.error(f"{name} call failed ({error.kind}), cycle retry budget used up: {str(e)}")
+            raise error from e
+        wait_time = self.provider._backoff_after_error(e, self.limiter, self.retry_count)
+        logger.warning(f"{name} call failed ({error.kind}): {str(e)}. Retrying in {wait_time:.1f}s...")
+        return wait_time
+    
+    
+    def exhausted(self) -> LLMCallError:
+        """The error to raise once every attempt failed"""
+        return LLMCallError(
+            self.last_error.kind,
+            self.provider.PROVIDER_NAME,
+            f"Failed to call {self.provider.DISPLAY_NAME} after {self.max_retries} retries: {str(self.last_error)}",
+            self.last_error.status_code
+        )
+
+
 class LLMProvider(ABC):
     """
     Abstract base class for LLM providers
     All LLM providers must implement these methods
     """
     
+    # Provider name, display name for logs and public API base URL
+    PROVIDER_NAME = ""
+    DISPLAY_NAME = ""
+    BASE_URL = ""
+    
+    @property
+    def base_url(self) -> str:
+        """BASE_URL unless overridden in LLM_BASE_URL_OVERRIDES (used for SDK clients and pooled connections)"""
+        return provider_base_url(self.PROVIDER_NAME, self.BASE_URL)
+    
+    @property
+    def async_client(self):
+        """
+        Async SDK client for the running event loop
+        
+        SDK async clients hold connections bound to one event loop, and
+        Celery runs every job in a fresh loop, so one client is built per
+        loop on top of the shared pooled httpx client.
+        """
+        loop = asyncio.get_running_loop()
+        if not hasattr(self, "_async_clients"):
+            self._async_clients = weakref.WeakKeyDictionary()
+        
+        client = self._async_clients.get(loop)
+        if client is None:
+            http_client = http_client_pool.get_client(self.base_url, provider=self.PROVIDER_NAME)
+            client = self._build_async_client(http_client)
+            self._async_clients[loop] = client
+        
+        return client
+    
+    @abstractmethod
+    def _build_async_client(self, http_client):
+        """
+        Build the provider's async SDK client on top of a pooled httpx client
+        
+        Args:
+            http_client: Shared httpx.AsyncClient for base_url
+        """
+        pass
+    
+    def _estimate_request_tokens(self, system_prompt: str, user_prompt: str, model: str, max_tokens: int) -> int:
+        """Tokens a request may consume, as charged against tokens-per-minute limits"""
+        return self.count_tokens(system_prompt, model) + self.count_tokens(user_prompt, model) + max_tokens
+    
+    
+    def _build_result(
+        self,
+        model: str,
+        temperature: float,
+        response_text: str,
+        input_tokens: int,
+        output_tokens: int
+    ) -> Dict[str, Any]:
+        """Build the standard result dict for a successful call"""
+        total_tokens = input_tokens + output_tokens
+        cost = self._calculate_cost(model, input_tokens, output_tokens)
+        
+        logger.info(f"{self.DISPLAY_NAME} call successful. Tokens: {total_tokens}, Cost: ${cost:.6f}")
+        
+        return {
+            "response": response_text,
+            "tokens_used": total_tokens,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cost": cost,
+            "model": model,
+            "temperature": temperature,
+            "provider": self.PROVIDER_NAME
+        }
+    
+    
+    def _call_with_retries(
+        self,
+        send: Callable[[], Tuple[Dict[str, Any], Any]],
+        model: str,
+        estimated_tokens: int,
+        max_retries: int
+    ) -> Dict[str, Any]:
+        """
+        Run a provider request with rate limiting and retries
+        Only retriable errors (timeouts, connection, 429, 5xx) are retried,
+        with jittered backoff, while the cycle's retry budget lasts
+        
+        Args:
+            send: Makes one request and returns (result, response headers)
+            model: Model name (selects the rate limiter)
+            estimated_tokens: Tokens to reserve from the tokens-per-minute budget
+            max_retries: Number of attempts
+            
+        Returns:
+            Result dict from send()
+            
+        Raises:
+            LLMCallError: Fatal error, retries exhausted or retry budget used up
+            CircuitOpenError: The provider's circuit breaker is open
+        """
+        attempts = _RetryAttempts(self, model, max_retries)
+        while attempts.remaining:
+            attempts.before_attempt()
+            try:
+                if attempts.limiter:
+                    attempts.limiter.acquire_sync(estimated_tokens)
+                result, headers = send()
+            except Exception as e:
+                time.sleep(attempts.after_error(e))
+                continue
+            attempts.after_success(headers)
+            return result
+        raise attempts.exhausted()
+    
+    
+    async def _acall_with_retries(
+        self,
+        send: Callable[[], Awaitable[Tuple[Dict[str, Any], Any]]],
+        model: str,
+        estimated_tokens: int,
+        max_retries: int
+    ) -> Dict[str, Any]:
+        """
+        Async variant of _call_with_retries
+        Rate-limit waits and backoff use asyncio.sleep so other rows keep running
+        """
+        attempts = _RetryAttempts(self, model, max_retries)
+        while attempts.remaining:
+            attempts.before_attempt()
+            try:
+                if attempts.limiter:
+                    await attempts.limiter.acquire(estimated_tokens)
+                result, headers = await send()
+            except Exception as e:
+                await asyncio.sleep(attempts.after_error(e))
+                continue
+            attempts.after_success(headers)
+            return result
+        raise attempts.exhausted()
+    
+    
+    def _get_rate_limiter(self, model: str) -> Optional[AdaptiveRateLimiter]:
+        """Shared limiter for this provider and model, or None when disabled"""
+        if not get_settings().LLM_RATE_LIMIT_ENABLED:
+            return None
+        return get_rate_limiter(self.PROVIDER_NAME, model)
+    
+    
+    def _get_circuit_breaker(self) -> Optional[CircuitBreaker]:
+        """Shared breaker for this provider's endpoint, or None when disabled"""
+        return get_circuit_breaker(self.PROVIDER_NAME, self.base_url)
+    
+    
+    @staticmethod
+    def _backoff_after_error(
+        error: Exception,
+        limiter: Optional[AdaptiveRateLimiter],
+        retry_count: int
+    ) -> float:
+        """
+        Seconds to wait before the next attempt
+        On a 429 the limiter is told about Retry-After and holds every caller
+        itself, so the retry loop does not add its own sleep on top.
+        """
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        
+        if getattr(error, "status_code", None) == 429:
+            if limiter:
+                limiter.on_rate_limited(headers)
+                return 0
+            retry_after = parse_retry_after(headers)
+            if retry_after is not None:
+                return retry_after
+        
+        return backoff_delay(retry_count)
+    
+    
     @abstractmethod
     def call(self, system_prompt: str, user_prompt: str, **kwargs) -> Dict[str, Any]:
         """
@@ -43,71 +315,135 @@ class LLMProvider(ABC):
         pass
     
     @abstractmethod
-    def count_tokens(self, text: str) -> int:
+    async def acall(self, system_prompt: str, user_prompt: str, **kwargs) -> Dict[str, Any]:
+        """
+        Call the LLM with given prompts without blocking the event loop
+        
+        Args:
+            system_prompt: System instruction for the LLM
+            user_prompt: The actual user message
+            **kwargs: Additional parameters (temperature, max_tokens, etc)
+            
+        Returns:
+            Dict with keys: response, tokens_used, cost
+        """
+        pass
+    
+    @classmethod
+    @abstractmethod
+    def _calculate_cost(cls, model: str, input_tokens: int, output_tokens: int) -> float:
+        """
+        Cost in dollars of a call from its token usage and the provider's PRICING
+        
+        Args:
+            model: Model name
+            input_tokens: Number of input tokens
+            output_tokens: Number of output tokens
+        """
+        pass
+    
+    @classmethod
+    def estimate_cost(cls, model: str, input_tokens: int, output_tokens: int) -> float:
+        """
+        Cost in dollars for a token count, without an instance (no API key needed)
+        Used for pre-flight run estimates
+        """
+        return cls._calculate_cost(model, input_tokens, output_tokens)
+    
+    
+    def count_tokens(self, text: str, model: Optional[str] = None) -> int:
         """
         Count tokens in text without calling API
+        Uses the bundled BPE tokenizer; repeated texts are served from its memo
         
         Args:
             text: Text to count tokens for
+            model: Model name used to pick the encoding
             
         Returns:
             Number of tokens
         """
-        pass
+        return tokenizer.count_tokens(text, model)
+    
+    
+    def count_tokens_batch(self, texts: List[str], model: Optional[str] = None) -> List[int]:
+        """
+        Count tokens for many texts (e.g. a dataset column) in one pass
+        
+        Args:
+            texts: Texts to count tokens for
+            model: Model name used to pick the encoding
+            
+        Returns:
+            Token counts in input order
+        """
+        return tokenizer.count_tokens_batch(texts, model)
 
 
-class OpenAIProvider(LLMProvider):
+class OpenAICompatibleProvider(LLMProvider):
     """
-    OpenAI LLM Provider
-    Handles calls to OpenAI's API (GPT-4, GPT-3.5, etc)
+    Base for providers speaking the OpenAI chat completions API (OpenAI, DeepSeek)
+    Subclasses set the names, base URL, API key variable, default model and PRICING
     """
     
-    # Token pricing per 1000 tokens (as of Feb 2025)
-    PRICING = {
-        "gpt-4-turbo": {"input": 0.01, "output": 0.03},
-        "gpt-4": {"input": 0.03, "output": 0.06},
-        "gpt-3.5-turbo": {"input": 0.0005, "output": 0.0015},
-    }
-    
-    # Approximate tokens per word (for estimation)
-    TOKENS_PER_WORD = 0.75
+    # Environment variable holding the API key
+    API_KEY_ENV = ""
+    # Default model, also priced for models missing from PRICING
+    DEFAULT_MODEL = ""
+    PRICING: Dict[str, Dict[str, float]] = {}
     
-    def __init__(self):
-        """Initialize OpenAI provider with API key"""
+    def __init__(self, api_key: Optional[str] = None):
+        """
+        Initialize the provider with an API key
+        
+        Args:
+            api_key: API key to use (defaults to the API_KEY_ENV variable)
+        """
         try:
             import openai
             self.openai = openai
             
             # Get API key from environment
-            api_key = os.getenv("OPENAI_API_KEY")
+            api_key = api_key or os.getenv(self.API_KEY_ENV)
             if not api_key:
-                raise ValueError("OPENAI_API_KEY not set in environment")
+                raise ValueError(f"{self.API_KEY_ENV} not set in environment")
             
-            self.openai.api_key = api_key
-            self.client = openai.OpenAI(api_key=api_key)
-            logger.info("OpenAI provider initialized")
+            self.api_key = api_key
+            # SDK retries are disabled; retries and rate limiting happen in _call_with_retries
+            self.client = openai.OpenAI(api_key=api_key, base_url=self.base_url, max_retries=0)
+            logger.info(f"{self.DISPLAY_NAME} provider initialized")
             
         except ImportError:
             logger.error("openai package not installed. Run: pip install openai")
             raise Exception("openai package required. Run: pip install openai")
     
     
+    def _build_async_client(self, http_client):
+        """Build AsyncOpenAI against the provider base URL on the pooled HTTP client"""
+        return self.openai.AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            http_client=http_client,
+            max_retries=0
+        )
+    
+    
     def call(
         self,
         system_prompt: str,
         user_prompt: str,
-        model: str = "gpt-3.5-turbo",
+        model: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 2000,
         max_retries: int = 3
     ) -> Dict[str, Any]:
         """
-        Call OpenAI API with exponential backoff retry logic
+        Call the chat completions API with rate limiting and exponential backoff retry logic
         
         Args:
             system_prompt: System instruction
             user_prompt: User message
-            model: Model name (gpt-4, gpt-3.5-turbo, etc)
+            model: Model name (defaults to DEFAULT_MODEL)
             temperature: Randomness (0.0 = deterministic, 1.0 = random)
             max_tokens: Maximum response length
             max_retries: Number of retry attempts on failure
@@ -120,84 +456,85 @@ class OpenAIProvider(LLMProvider):
             - model: Model used
             - temperature: Temperature used
         """
+        model = model or self.DEFAULT_MODEL
         
-        retry_count = 0
-        last_error = None
-        
-        while retry_count < max_retries:
-            try:
-                logger.debug(f"Calling OpenAI {model} (attempt {retry_count + 1}/{max_retries})")
-                
-                # Call OpenAI API
-                response = self.client.chat.completions.create(
-                    model=model,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                )
-                
-                # Extract response text
-                response_text = response.choices[0].message.content
-                
-                # Get token counts
-                input_tokens = response.usage.prompt_tokens
-                output_tokens = response.usage.completion_tokens
-                total_tokens = input_tokens + output_tokens
-                
-                # Calculate cost
-                cost = self._calculate_cost(model, input_tokens, output_tokens)
-                
-                logger.info(f"OpenAI call successful. Tokens: {total_tokens}, Cost: ${cost:.6f}")
-                
-                return {
-                    "response": response_text,
-                    "tokens_used": total_tokens,
-                    "input_tokens": input_tokens,
-                    "output_tokens": output_tokens,
-                    "cost": cost,
-                    "model": model,
-                    "temperature": temperature,
-                    "provider": "openai"
-                }
-                
-            except Exception as e:
-                last_error = e
-                retry_count += 1
-                
-                if retry_count < max_retries:
-                    # Exponential backoff: wait 2^retry_count seconds
-                    wait_time = 2 ** retry_count
-                    logger.warning(f"OpenAI call failed: {str(e)}. Retrying in {wait_time}s...")
-                    time.sleep(wait_time)
-                else:
-                    logger.error(f"OpenAI call failed after {max_retries} retries: {str(e)}")
+        def send():
+            # Raw response exposes the rate-limit headers
+            raw = self.client.chat.completions.with_raw_response.create(
+                **self._request_params(system_prompt, user_prompt, model, temperature, max_tokens)
+            )
+            return self._parse_response(raw.parse(), model, temperature), raw.headers
         
-        raise Exception(f"Failed to call OpenAI after {max_retries} retries: {str(last_error)}")
+        return self._call_with_retries(
+            send, model, self._estimate_request_tokens(system_prompt, user_prompt, model, max_tokens), max_retries
+        )
     
     
-    def count_tokens(self, text: str) -> int:
+    async def acall(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        max_retries: int = 3
+    ) -> Dict[str, Any]:
         """
-        Estimate token count without calling API
-        Uses approximate ratio: 1 token ≈ 0.75 words
+        Async variant of call() using the non-blocking client
+        Backoff waits with asyncio.sleep so other rows keep running
         
         Args:
-            text: Text to count tokens for
+            Same as call()
             
         Returns:
-            Estimated token count
+            Same dict as call()
         """
-        word_count = len(text.split())
-        estimated_tokens = int(word_count * self.TOKENS_PER_WORD)
+        model = model or self.DEFAULT_MODEL
         
-        logger.debug(f"Estimated tokens: {estimated_tokens} (for {word_count} words)")
+        async def send():
+            raw = await self.async_client.chat.completions.with_raw_response.create(
+                **self._request_params(system_prompt, user_prompt, model, temperature, max_tokens)
+            )
+            return self._parse_response(raw.parse(), model, temperature), raw.headers
         
-        return estimated_tokens
+        return await self._acall_with_retries(
+            send, model, self._estimate_request_tokens(system_prompt, user_prompt, model, max_tokens), max_retries
+        )
     
     
-    def _calculate_cost(self, model: str, input_tokens: int, output_tokens: int) -> float:
+    @staticmethod
+    def _request_params(
+        system_prompt: str,
+        user_prompt: str,
+        model: str,
+        temperature: float,
+        max_tokens: int
+    ) -> Dict[str, Any]:
+        """Chat completion request parameters"""
+        return {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+    
+    
+    def _parse_response(self, response, model: str, temperature: float) -> Dict[str, Any]:
+        """Extract text and token usage from a chat completion"""
+        return self._build_result(
+            model,
+            temperature,
+            response.choices[0].message.content,
+            response.usage.prompt_tokens,
+            response.usage.completion_tokens
+        )
+    
+    
+    @classmethod
+    def _calculate_cost(cls, model: str, input_tokens: int, output_tokens: int) -> float:
         """
         Calculate cost based on token usage and pricing
         
@@ -211,11 +548,11 @@ class OpenAIProvider(LLMProvider):
         """
         
         # Get pricing for model
-        if model not in self.PRICING:
-            logger.warning(f"Pricing not found for {model}, using gpt-3.5-turbo pricing")
-            pricing = self.PRICING["gpt-3.5-turbo"]
+        if model not in cls.PRICING:
+            logger.warning(f"Pricing not found for {model}, using {cls.DEFAULT_MODEL} pricing")
+            pricing = cls.PRICING[cls.DEFAULT_MODEL]
         else:
-            pricing = self.PRICING[model]
+            pricing = cls.PRICING[model]
         
         # Calculate cost: (tokens / 1000) * price_per_1k_tokens
         input_cost = (input_tokens / 1000) * pricing["input"]
@@ -227,10 +564,30 @@ class OpenAIProvider(LLMProvider):
         return total_cost
 
 
-class DeepSeekProvider(LLMProvider):
+class OpenAIProvider(OpenAICompatibleProvider):
+    """
+    OpenAI LLM Provider
+    Handles calls to OpenAI's API (GPT-4, GPT-3.5, etc)
+    """
+    
+    # Token pricing per 1000 tokens (as of Feb 2025)
+    PRICING = {
+        "gpt-4-turbo": {"input": 0.01, "output": 0.03},
+        "gpt-4": {"input": 0.03, "output": 0.06},
+        "gpt-3.5-turbo": {"input": 0.0005, "output": 0.0015},
+    }
+    
+    PROVIDER_NAME = "openai"
+    DISPLAY_NAME = "OpenAI"
+    BASE_URL = "https://api.openai.com/v1"
+    API_KEY_ENV = "OPENAI_API_KEY"
+    DEFAULT_MODEL = "gpt-3.5-turbo"
+
+
+class DeepSeekProvider(OpenAICompatibleProvider):
     """
     DeepSeek LLM Provider
-    Handles calls to DeepSeek's API (DeepSeek-V2, etc)
+    Handles calls to DeepSeek's API (DeepSeek-V2, etc) through its OpenAI-compatible endpoint
     """
     
     # Token pricing per 1000 tokens (as of Feb 2025)
@@ -239,146 +596,11 @@ class DeepSeekProvider(LLMProvider):
         "deepseek-coder": {"input": 0.0014, "output": 0.0028},
     }
     
-    TOKENS_PER_WORD = 0.75
+    PROVIDER_NAME = "deepseek"
+    DISPLAY_NAME = "DeepSeek"
     BASE_URL = "https://api.deepseek.com/v1"
-    
-    def __init__(self):
-        """Initialize DeepSeek provider with API key"""
-        try:
-            import openai
-            self.openai = openai
-            
-            # Get API key from environment
-            api_key = os.getenv("DEEPSEEK_API_KEY")
-            if not api_key:
-                raise ValueError("DEEPSEEK_API_KEY not set in environment")
-            
-            # DeepSeek uses OpenAI-compatible API
-            self.client = openai.OpenAI(
-                api_key=api_key,
-                base_url=self.BASE_URL
-            )
-            logger.info("DeepSeek provider initialized")
-            
-        except ImportError:
-            logger.error("openai package not installed. Run: pip install openai")
-            raise Exception("openai package required. Run: pip install openai")
-    
-    
-    def call(
-        self,
-        system_prompt: str,
-        user_prompt: str,
-        model: str = "deepseek-chat",
-        temperature: float = 0.7,
-        max_tokens: int = 2000,
-        max_retries: int = 3
-    ) -> Dict[str, Any]:
-        """
-        Call DeepSeek API with exponential backoff retry logic
-        
-        Args:
-            system_prompt: System instruction
-            user_prompt: User message
-            model: Model name (deepseek-chat, deepseek-coder, etc)
-            temperature: Randomness (0.0 = deterministic, 1.0 = random)
-            max_tokens: Maximum response length
-            max_retries: Number of retry attempts on failure
-            
-        Returns:
-            Dict with response, tokens_used, cost
-        """
-        
-        retry_count = 0
-        last_error = None
-        
-        while retry_count < max_retries:
-            try:
-                logger.debug(f"Calling DeepSeek {model} (attempt {retry_count + 1}/{max_retries})")
-                
-                # Call DeepSeek API (OpenAI-compatible)
-                response = self.client.chat.completions.create(
-                    model=model,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                )
-                
-                # Extract response text
-                response_text = response.choices[0].message.content
-                
-                # Get token counts
-                input_tokens = response.usage.prompt_tokens
-                output_tokens = response.usage.completion_tokens
-                total_tokens = input_tokens + output_tokens
-                
-                # Calculate cost
-                cost = self._calculate_cost(model, input_tokens, output_tokens)
-                
-                logger.info(f"DeepSeek call successful. Tokens: {total_tokens}, Cost: ${cost:.6f}")
-                
-                return {
-                    "response": response_text,
-                    "tokens_used": total_tokens,
-                    "input_tokens": input_tokens,
-                    "output_tokens": output_tokens,
-                    "cost": cost,
-                    "model": model,
-                    "temperature": temperature,
-                    "provider": "deepseek"
-                }
-                
-            except Exception as e:
-                last_error = e
-                retry_count += 1
-                
-                if retry_count < max_retries:
-                    wait_time = 2 ** retry_count
-                    logger.warning(f"DeepSeek call failed: {str(e)}. Retrying in {wait_time}s...")
-                    time.sleep(wait_time)
-                else:
-                    logger.error(f"DeepSeek call failed after {max_retries} retries: {str(e)}")
-        
-        raise Exception(f"Failed to call DeepSeek after {max_retries} retries: {str(last_error)}")
-    
-    
-    def count_tokens(self, text: str) -> int:
-        """
-        Estimate token count without calling API
-        
-        Args:
-            text: Text to count tokens for
-            
-        Returns:
-            Estimated token count
-        """
-        word_count = len(text.split())
-        estimated_tokens = int(word_count * self.TOKENS_PER_WORD)
-        
-        logger.debug(f"Estimated tokens: {estimated_tokens} (for {word_count} words)")
-        
-        return estimated_tokens
-    
-    
-    def _calculate_cost(self, model: str, input_tokens: int, output_tokens: int) -> float:
-        """Calculate cost based on token usage and pricing"""
-        
-        if model not in self.PRICING:
-            logger.warning(f"Pricing not found for {model}, using deepseek-chat pricing")
-            pricing = self.PRICING["deepseek-chat"]
-        else:
-            pricing = self.PRICING[model]
-        
-        input_cost = (input_tokens / 1000) * pricing["input"]
-        output_cost = (output_tokens / 1000) * pricing["output"]
-        total_cost = input_cost + output_cost
-        
-        logger.debug(f"Cost calculation: input=${input_cost:.6f}, output=${output_cost:.6f}, total=${total_cost:.6f}")
-        
-        return total_cost
+    API_KEY_ENV = "DEEPSEEK_API_KEY"
+    DEFAULT_MODEL = "deepseek-chat"
 
 
 class AnthropicProvider(LLMProvider):
@@ -394,20 +616,29 @@ class AnthropicProvider(LLMProvider):
         "claude-3-haiku": {"input": 0.00025, "output": 0.00125},
     }
     
-    TOKENS_PER_WORD = 0.75
+    PROVIDER_NAME = "anthropic"
+    DISPLAY_NAME = "Anthropic"
+    BASE_URL = "https://api.anthropic.com"
     
-    def __init__(self):
-        """Initialize Anthropic provider with API key"""
+    def __init__(self, api_key: Optional[str] = None):
+        """
+        Initialize Anthropic provider with API key
+        
+        Args:
+            api_key: API key to use (defaults to ANTHROPIC_API_KEY)
+        """
         try:
             import anthropic
             self.anthropic = anthropic
             
             # Get API key from environment
-            api_key = os.getenv("ANTHROPIC_API_KEY")
+            api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
             if not api_key:
                 raise ValueError("ANTHROPIC_API_KEY not set in environment")
             
-            self.client = anthropic.Anthropic(api_key=api_key)
+            self.api_key = api_key
+            # SDK retries are disabled; retries and rate limiting happen in _call_with_retries
+            self.client = anthropic.Anthropic(api_key=api_key, base_url=self.base_url, max_retries=0)
             logger.info("Anthropic provider initialized")
             
         except ImportError:
@@ -415,6 +646,16 @@ class AnthropicProvider(LLMProvider):
             raise Exception("anthropic package required. Run: pip install anthropic")
     
     
+    def _build_async_client(self, http_client):
+        """Build AsyncAnthropic on the pooled HTTP client"""
+        return self.anthropic.AsyncAnthropic(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            http_client=http_client,
+            max_retries=0
+        )
+    
+    
     def call(
         self,
         system_prompt: str,
@@ -425,7 +666,7 @@ class AnthropicProvider(LLMProvider):
         max_retries: int = 3
     ) -> Dict[str, Any]:
         """
-        Call Anthropic API with exponential backoff retry logic
+        Call Anthropic API with rate limiting and exponential backoff retry logic
         
         Args:
             system_prompt: System instruction
@@ -439,88 +680,89 @@ class AnthropicProvider(LLMProvider):
             Dict with response, tokens_used, cost
         """
         
-        retry_count = 0
-        last_error = None
-        
-        while retry_count < max_retries:
-            try:
-                logger.debug(f"Calling Anthropic {model} (attempt {retry_count + 1}/{max_retries})")
-                
-                # Call Anthropic API
-                response = self.client.messages.create(
-                    model=model,
-                    max_tokens=max_tokens,
-                    system=system_prompt,
-                    messages=[
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    temperature=temperature,
-                )
-                
-                # Extract response text
-                response_text = response.content[0].text
-                
-                # Get token counts
-                input_tokens = response.usage.input_tokens
-                output_tokens = response.usage.output_tokens
-                total_tokens = input_tokens + output_tokens
-                
-                # Calculate cost
-                cost = self._calculate_cost(model, input_tokens, output_tokens)
-                
-                logger.info(f"Anthropic call successful. Tokens: {total_tokens}, Cost: ${cost:.6f}")
-                
-                return {
-                    "response": response_text,
-                    "tokens_used": total_tokens,
-                    "input_tokens": input_tokens,
-                    "output_tokens": output_tokens,
-                    "cost": cost,
-                    "model": model,
-                    "temperature": temperature,
-                    "provider": "anthropic"
-                }
-                
-            except Exception as e:
-                last_error = e
-                retry_count += 1
-                
-                if retry_count < max_retries:
-                    wait_time = 2 ** retry_count
-                    logger.warning(f"Anthropic call failed: {str(e)}. Retrying in {wait_time}s...")
-                    time.sleep(wait_time)
-                else:
-                    logger.error(f"Anthropic call failed after {max_retries} retries: {str(e)}")
+        def send():
+            # Raw response exposes the rate-limit headers
+            raw = self.client.messages.with_raw_response.create(
+                **self._request_params(system_prompt, user_prompt, model, temperature, max_tokens)
+            )
+            return self._parse_response(raw.parse(), model, temperature), raw.headers
         
-        raise Exception(f"Failed to call Anthropic after {max_retries} retries: {str(last_error)}")
+        return self._call_with_retries(
+            send, model, self._estimate_request_tokens(system_prompt, user_prompt, model, max_tokens), max_retries
+        )
     
     
-    def count_tokens(self, text: str) -> int:
+    async def acall(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        model: str = "claude-3-sonnet",
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        max_retries: int = 3
+    ) -> Dict[str, Any]:
         """
-        Estimate token count without calling API
+        Async variant of call() using the non-blocking Anthropic client
+        Backoff waits with asyncio.sleep so other rows keep running
         
         Args:
-            text: Text to count tokens for
+            Same as call()
             
         Returns:
-            Estimated token count
+            Same dict as call()
         """
-        word_count = len(text.split())
-        estimated_tokens = int(word_count * self.TOKENS_PER_WORD)
         
-        logger.debug(f"Estimated tokens: {estimated_tokens} (for {word_count} words)")
+        async def send():
+            raw = await self.async_client.messages.with_raw_response.create(
+                **self._request_params(system_prompt, user_prompt, model, temperature, max_tokens)
+            )
+            return self._parse_response(raw.parse(), model, temperature), raw.headers
         
-        return estimated_tokens
+        return await self._acall_with_retries(
+            send, model, self._estimate_request_tokens(system_prompt, user_prompt, model, max_tokens), max_retries
+        )
+    
     
+    @staticmethod
+    def _request_params(
+        system_prompt: str,
+        user_prompt: str,
+        model: str,
+        temperature: float,
+        max_tokens: int
+    ) -> Dict[str, Any]:
+        """Messages API request parameters"""
+        return {
+            "model": model,
+            "max_tokens": max_tokens,
+            "system": system_prompt,
+            "messages": [
+                {"role": "user", "content": user_prompt}
+            ],
+            "temperature": temperature,
+        }
     
-    def _calculate_cost(self, model: str, input_tokens: int, output_tokens: int) -> float:
+    
+    def _parse_response(self, response, model: str, temperature: float) -> Dict[str, Any]:
+        """Extract text and token usage from a Messages API response"""
+        return self._build_result(
+            model,
+            temperature,
+            response.content[0].text,
+            response.usage.input_tokens,
+            response.usage.output_tokens
+        )
+    
+    
+    @classmethod
+    def _calculate_cost(cls, model: str, input_tokens: int, output_tokens: int) -> float:
         """Calculate cost based on token usage and pricing"""
         
-        if model not in self.PRICING:
+        if model not in cls.PRICING:
             logger.warning(f"Pricing not found for {model}, using claude-3-sonnet pricing")
-            pricing = self.PRICING["claude-3-sonnet"]
+            pricing = cls.PRICING["claude-3-sonnet"]
         else:
-            pricing = self.PRICING[model]
+            pricing = cls.PRICING[model]
         
         input_cost = (input_tokens / 1000) * pricing["input"]
         output_cost = (output_tokens / 1000) * pricing["output"]
@@ -538,25 +780,19 @@ class LLMService:
     Supports dual-model parallel execution
     """
     
-    def __init__(self, provider: str = "openai"):
+    def __init__(self, provider: str = "openai", api_key: Optional[str] = None):
         """
         Initialize LLM service with specified provider
+        Provider clients come from the process-wide registry, so this is cheap
         
         Args:
             provider: "openai", "deepseek", or "anthropic"
+            api_key: API key to use (defaults to the provider's environment variable)
         """
         self.provider = provider
+        self.llm = provider_registry.get(provider, api_key)
         
-        if provider == "openai":
-            self.llm = OpenAIProvider()
-        elif provider == "deepseek":
-            self.llm = DeepSeekProvider()
-        elif provider == "anthropic":
-            self.llm = AnthropicProvider()
-        else:
-            raise ValueError(f"Unknown provider: {provider}")
-        
-        logger.info(f"LLMService initialized with {provider} provider")
+        logger.debug(f"LLMService initialized with {provider} provider")
     
     
     def evaluate(
@@ -565,10 +801,12 @@ class LLMService:
         user_prompt: str,
         model: str = "gpt-3.5-turbo",
         temperature: float = 0.7,
-        max_tokens: int = 2000
+        max_tokens: int = 2000,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Evaluate a single prompt with LLM
+        Identical requests are served from the response cache when enabled
         
         Args:
             system_prompt: System instruction
@@ -576,21 +814,103 @@ class LLMService:
             model: Model to use
             temperature: Randomness level
             max_tokens: Max response length
+            use_cache: Look up / store the response in the LLM response cache
+                (only at temperatures up to LLM_CACHE_MAX_TEMPERATURE)
             
         Returns:
-            Dict with response, tokens, cost, model
+            Dict with response, tokens, cost (0 on cache hits), model, cached (True on
+            a hit, False on a miss, None when the cache was not consulted) and
+            latency_ms / connect_ms / ttfb_ms (None on cache hits)
         """
         
         try:
-            result = self.llm.call(
-                system_prompt=system_prompt,
-                user_prompt=user_prompt,
-                model=model,
-                temperature=temperature,
-                max_tokens=max_tokens
+            cache = get_llm_cache() if use_cache and is_cacheable(temperature) else None
+            if cache:
+                cache_key = make_cache_key(
+                    self.provider, self.llm.base_url, model, system_prompt, user_prompt, temperature, max_tokens
+                )
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    logger.debug(f"Cache hit for {self.provider} {model}")
+                    return {**cached, **NO_TIMING, "cost": 0.0, "cached": True}
+            
+            with measure_latency() as timing:
+                result = self.llm.call(
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt,
+                    model=model,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+            record_latency(self.provider, model, timing.total_ms)
+            
+            if cache:
+                cache.set(cache_key, result)
+            
+            return {**result, **timing.to_dict(), "cached": None if cache is None else False}
+            
+        except Exception as e:
+            logger.error(f"LLM evaluation failed: {str(e)}")
+            raise
+    
+    
+    async def aevaluate(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        model: str = "gpt-3.5-turbo",
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        use_cache: bool = True,
+        hedge_policy: Optional[HedgePolicy] = None
+    ) -> Dict[str, Any]:
+        """
+        Evaluate a single prompt with LLM without blocking the event loop
+        Identical requests are served from the response cache when enabled
+        
+        Args:
+            system_prompt: System instruction
+            user_prompt: User message
+            model: Model to use
+            temperature: Randomness level
+            max_tokens: Max response length
+            use_cache: Look up / store the response in the LLM response cache
+                (only at temperatures up to LLM_CACHE_MAX_TEMPERATURE)
+            hedge_policy: Send a duplicate request when the call runs past the
+                model's rolling p95 (per-cycle budget); None disables hedging
+            
+        Returns:
+            Dict with response, tokens, cost (0 on cache hits), model, cached, hedged and
+            latency_ms / connect_ms / ttfb_ms (None on cache hits)
+        """
+        
+        try:
+            cache = get_llm_cache() if use_cache and is_cacheable(temperature) else None
+            if cache:
+                cache_key = make_cache_key(
+                    self.provider, self.llm.base_url, model, system_prompt, user_prompt, temperature, max_tokens
+                )
+                cached = await cache.aget(cache_key)
+                if cached is not None:
+                    logger.debug(f"Cache hit for {self.provider} {model}")
+                    return {**cached, **NO_TIMING, "cost": 0.0, "cached": True, "hedged": False}
+            
+            result, timing, hedged = await run_timed(
+                lambda: self.llm.acall(
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt,
+                    model=model,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                ),
+                self.provider, model, hedge_policy
             )
+            record_latency(self.provider, model, timing.total_ms)
             
-            return result
+            if cache:
+                await cache.aset(cache_key, result)
+            
+            return {**result, **timing.to_dict(), "cached": None if cache is None else False, "hedged": hedged}
             
         except Exception as e:
             logger.error(f"LLM evaluation failed: {str(e)}")
@@ -610,7 +930,8 @@ class LLMService:
         max_tokens: int = 2000
     ) -> Dict[str, Any]:
         """
-        Evaluate same prompt with TWO models in PARALLEL
+        Evaluate same prompt with TWO models, one after the other
+        Use aevaluate_dual_models to run both calls concurrently
         
         Args:
             system_prompt: System instruction
@@ -635,13 +956,12 @@ class LLMService:
         """
         
         try:
-            # Initialize both providers
+            # Both services wrap shared clients from the provider registry
             service_a = LLMService(provider=provider_a)
             service_b = LLMService(provider=provider_b)
             
             logger.info(f"Starting dual-model evaluation: {model_a} ({provider_a}) vs {model_b} ({provider_b})")
             
-            # Run both LLM calls in parallel
             result_a = service_a.evaluate(
                 system_prompt=system_prompt,
                 user_prompt=user_prompt,
@@ -658,27 +978,12 @@ class LLMService:
                 max_tokens=max_tokens
             )
             
-            # Combine results
-            combined_result = {
-                "response_a": result_a["response"],
-                "response_b": result_b["response"],
-                "model_a": model_a,
-                "model_b": model_b,
-                "provider_a": provider_a,
-                "provider_b": provider_b,
-                "tokens_a": result_a["tokens_used"],
-                "tokens_b": result_b["tokens_used"],
-                "total_tokens": result_a["tokens_used"] + result_b["tokens_used"],
-                "input_tokens_a": result_a["input_tokens"],
-                "output_tokens_a": result_a["output_tokens"],
-                "input_tokens_b": result_b["input_tokens"],
-                "output_tokens_b": result_b["output_tokens"],
-                "cost_a": result_a["cost"],
-                "cost_b": result_b["cost"],
-                "total_cost": result_a["cost"] + result_b["cost"],
-                "temperature_a": temperature_a,
-                "temperature_b": temperature_b,
-            }
+            combined_result = self._combine_dual_results(
+                result_a, result_b,
+                model_a, model_b,
+                provider_a, provider_b,
+                temperature_a, temperature_b
+            )
             
             logger.info(f"Dual-model evaluation complete. Total cost: ${combined_result['total_cost']:.6f}")
             
@@ -687,14 +992,118 @@ class LLMService:
         except Exception as e:
             logger.error(f"Dual-model evaluation failed: {str(e)}")
             raise
-
+    
+    
+    async def aevaluate_dual_models(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        model_a: str,
+        model_b: str,
+        provider_a: str = "openai",
+        provider_b: str = "deepseek",
+        temperature_a: float = 0.7,
+        temperature_b: float = 0.7,
+        max_tokens: int = 2000,
+        hedge_policy: Optional[HedgePolicy] = None
+    ) -> Dict[str, Any]:
+        """
+        Evaluate same prompt with TWO models in PARALLEL
+        Both provider calls are awaited together, so wall time is max(A, B)
+        
+        Args:
+            Same as evaluate_dual_models, plus hedge_policy (see aevaluate)
+            
+        Returns:
+            Same dict as evaluate_dual_models
+        """
+        
+        try:
+            # Both services wrap shared clients from the provider registry
+            service_a = LLMService(provider=provider_a)
+            service_b = LLMService(provider=provider_b)
+            
+            logger.info(f"Starting async dual-model evaluation: {model_a} ({provider_a}) vs {model_b} ({provider_b})")
+            
+            # Run both LLM calls in parallel
+            result_a, result_b = await asyncio.gather(
+                service_a.aevaluate(
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt,
+                    model=model_a,
+                    temperature=temperature_a,
+                    max_tokens=max_tokens,
+                    hedge_policy=hedge_policy
+                ),
+                service_b.aevaluate(
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt,
+                    model=model_b,
+                    temperature=temperature_b,
+                    max_tokens=max_tokens,
+                    hedge_policy=hedge_policy
+                ),
+            )
+            
+            combined_result = self._combine_dual_results(
+                result_a, result_b,
+                model_a, model_b,
+                provider_a, provider_b,
+                temperature_a, temperature_b
+            )
+            
+            logger.info(f"Dual-model evaluation complete. Total cost: ${combined_result['total_cost']:.6f}")
+            
+            return combined_result
+            
+        except Exception as e:
+            logger.error(f"Dual-model evaluation failed: {str(e)}")
+            raise
+    
+    
+    @staticmethod
+    def _combine_dual_results(
+        result_a: Dict[str, Any],
+        result_b: Dict[str, Any],
+        model_a: str,
+        model_b: str,
+        provider_a: str,
+        provider_b: str,
+        temperature_a: float,
+        temperature_b: float
+    ) -> Dict[str, Any]:
+        """Merge two single-model results into the dual-model result dict"""
+        return {
+            "response_a": result_a["response"],
+            "response_b": result_b["response"],
+            "model_a": model_a,
+            "model_b": model_b,
+            "provider_a": provider_a,
+            "provider_b": provider_b,
+            "tokens_a": result_a["tokens_used"],
+            "tokens_b": result_b["tokens_used"],
+            "total_tokens": result_a["tokens_used"] + result_b["tokens_used"],
+            "input_tokens_a": result_a["input_tokens"],
+            "output_tokens_a": result_a["output_tokens"],
+            "input_tokens_b": result_b["input_tokens"],
+            "output_tokens_b": result_b["output_tokens"],
+            "cost_a": result_a["cost"],
+            "cost_b": result_b["cost"],
+            "total_cost": result_a["cost"] + result_b["cost"],
+            "temperature_a": temperature_a,
+            "temperature_b": temperature_b,
+            "cached_a": result_a.get("cached"),
+            "cached_b": result_b.get("cached"),
+            "latency_ms_a": result_a.get("latency_ms"),
+            "latency_ms_b": result_b.get("latency_ms"),
+        }
 
 
     async def improve_prompt_with_deepseek(self, prompt: str, api_key: str) -> str:
         """
         Use DeepSeek to improve a prompt
+        Goes through the shared DeepSeek client, whatever this service's provider is
         """
-        import httpx
         
         improvement_prompt = f"""You are an expert prompt engineer. Improve the following prompt to make it clearer, more specific, and more effective.
 
@@ -703,24 +1112,14 @@ Original Prompt:
 
 Provide ONLY the improved prompt, nothing else."""
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.deepseek.com/v1/chat/completions",
-                headers={"Authorization": f"Bearer {api_key}"},
-                json={
-                    "model": "deepseek-chat",
-                    "messages": [
-                        {"role": "user", "content": improvement_prompt}
-                    ],
-                    "temperature": 0.7,
-                    "max_tokens": 1000
-                },
-                timeout=30.0
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"DeepSeek API error: {response.text}")
-            
-            result = response.json()
-            improved = result['choices'][0]['message']['content'].strip()
-            return improved
+        deepseek = provider_registry.get("deepseek", api_key)
+        result = await deepseek.acall(
+            system_prompt="You are a helpful assistant.",
+            user_prompt=improvement_prompt,
+            model="deepseek-chat",
+            temperature=0.7,
+            max_tokens=1000
+        )
+        
+        improved = result["response"].strip()
+        return improved
@@ -0,0 +1,251 @@
+"""
+Pipeline Module
+Staged async pipeline for row processing:
+- Stages connected by bounded queues, so a slow stage applies backpressure
+  instead of buffering the whole dataset
+- Per-stage concurrency: async stages run N workers on the event loop,
+  threaded stages run their (CPU-bound) function in worker threads
+- A batching sink receives results every batch_rows items or batch_ms
+- Per-stage item counts and busy time, to see which stage is the bottleneck
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# End of input marker passed down the queues
+_DONE = object()
+
+
+class Stage:
+    """
+    One pipeline stage
+
+    Args:
+        name: Stage name (for stats and logs)
+        fn: Called with each item, returns the item for the next stage
+            (sync or async; sync functions run inline unless threaded)
+        concurrency: Items processed at the same time
+        threaded: Run fn in a worker thread (keeps CPU work off the event loop)
+    """
+
+    def __init__(self, name: str, fn: Callable[[Any], Any], concurrency: int = 1, threaded: bool = False):
+        self.name = name
+        self.fn = fn
+        self.concurrency = max(1, concurrency)
+        self.threaded = threaded
+        self.is_async = inspect.iscoroutinefunction(fn)
+
+
+    async def process(self, item: Any) -> Any:
+        if self.threaded:
+            return await asyncio.to_thread(self.fn, item)
+        if self.is_async:
+            return await self.fn(item)
+        return self.fn(item)
+
+
+class Pipeline:
+    """
+    Source -> stages -> batching sink
+
+    Usage:
+        pipeline = Pipeline(
+            [Stage("render", render), Stage("call", call, concurrency=8), Stage("score", score, threaded=True)],
+            sink=persist_batch,
+        )
+        await pipeline.run(rows())
+
+    Stage functions handle their own per-item errors; an exception escaping a
+    stage or the sink stops the pipeline and is raised from run(). When the
+    source fails, items already read are finished and flushed before its
+    error is raised, so work that was paid for is not lost.
+    """
+
+    def __init__(
+        self,
+        stages: List[Stage],
+        sink: Callable[[List[Any]], Awaitable[None]],
+        queue_size: Optional[int] = None,
+        batch_rows: Optional[int] = None,
+        batch_ms: Optional[int] = None
+    ):
+        settings = get_settings()
+        self.stages = stages
+        self.sink = sink
+        self.queue_size = queue_size or settings.EVAL_PIPELINE_QUEUE_SIZE
+        self.batch_rows = batch_rows or settings.EVAL_PIPELINE_PERSIST_ROWS
+        self.batch_seconds = (batch_ms or settings.EVAL_PIPELINE_PERSIST_MS) / 1000
+        # busy_seconds is summed over a stage's workers
+        self.stats: Dict[str, Dict[str, float]] = {
+            name: {"items": 0, "busy_seconds": 0.0, "workers": workers}
+            for name, workers in [("source", 1)] + [(stage.name, stage.concurrency) for stage in stages] + [("sink", 1)]
+        }
+        self._stopped = asyncio.Event()
+        self._flushing = False
+        self._source_error: Optional[BaseException] = None
+
+
+    def stop(self) -> None:
+        """Abort: items in flight are dropped, a batch the sink is writing is finished"""
+        self._stopped.set()
+
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped.is_set()
+
+
+    async def run(self, source: AsyncIterator[Any]) -> None:
+        """
+        Push every item of source through the stages into the sink
+
+        Raises:
+            Exception: The first error raised by the source, a stage or the sink
+        """
+        started = time.monotonic()
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        tasks = [asyncio.create_task(self._feed(source, queues[0]))]
+        for index, stage in enumerate(self.stages):
+            remaining = [stage.concurrency]
+            tasks += [
+                asyncio.create_task(self._work(stage, queues[index], queues[index + 1], remaining))
+                for _ in range(stage.concurrency)
+            ]
+        sink_task = asyncio.create_task(self._drain(queues[-1]))
+        stop_task = asyncio.create_task(self._stopped.wait())
+
+        try:
+            pending = set(tasks) | {sink_task}
+            while sink_task in pending:
+                done, pending = await asyncio.wait(pending | {stop_task}, return_when=asyncio.FIRST_COMPLETED)
+                pending.discard(stop_task)
+                for task in done:
+                    if task is not stop_task and task.exception() is not None:
+                        raise task.exception()
+                if stop_task in done:
+                    if self._flushing:
+                        await sink_task
+                    break
+        finally:
+            await self._shutdown(tasks + [sink_task, stop_task], queues)
+            if hasattr(source, "aclose"):
+                await source.aclose()
+
+        if self._source_error is not None:
+            raise self._source_error
+
+        elapsed = time.monotonic() - started
+        logger.info(
+            f"Pipeline finished in {elapsed:.1f}s: "
+            + ", ".join(
+                f"{name} {int(stat['items'])} items ({self._utilization(stat, elapsed):.0f}% busy)"
+                for name, stat in self.stats.items()
+            )
+        )
+
+
+    async def _shutdown(self, tasks: List[asyncio.Task], queues: List[asyncio.Queue]) -> None:
+        """
+        Cancel every task and wait for it to end
+
+        A cancellation can get lost inside a stage (asyncio.wait_for swallows it
+        when the awaited call completes at the same moment), leaving a worker
+        blocked on a full queue: stopped makes workers exit after their current
+        item, and the queues are drained so no put() waits forever.
+        """
+        self._stopped.set()
+        pending = [task for task in tasks if not task.done()]
+        while pending:
+            for task in pending:
+                task.cancel()
+            for queue in queues:
+                while not queue.empty():
+                    queue.get_nowait()
+            _, pending = await asyncio.wait(pending, timeout=0.1)
+        for task in tasks:
+            if not task.cancelled():
+                task.exception()  # retrieved, so asyncio does not log it again
+
+
+    @staticmethod
+    def _utilization(stat: Dict[str, float], elapsed: float) -> float:
+        """Share of the run the stage's workers were busy, in percent"""
+        if not elapsed:
+            return 0.0
+        return stat["busy_seconds"] / (elapsed * stat["workers"]) * 100
+
+
+    async def _feed(self, source: AsyncIterator[Any], out: asyncio.Queue) -> None:
+        stat = self.stats["source"]
+        while not self.stopped:
+            began = time.monotonic()
+            try:
+                item = await source.__anext__()
+            except StopAsyncIteration:
+                break
+            except Exception as e:
+                # Drain what was read, then raise from run()
+                self._source_error = e
+                break
+            stat["busy_seconds"] += time.monotonic() - began
+            stat["items"] += 1
+            await out.put(item)
+        await out.put(_DONE)
+
+
+    async def _work(self, stage: Stage, inbox: asyncio.Queue, out: asyncio.Queue, remaining: List[int]) -> None:
+        stat = self.stats[stage.name]
+        while not self.stopped:
+            item = await inbox.get()
+            if item is _DONE:
+                # Pass the marker to the sibling workers; the last one forwards it
+                remaining[0] -= 1
+                await (inbox if remaining[0] else out).put(_DONE)
+                return
+            began = time.monotonic()
+            item = await stage.process(item)
+            stat["busy_seconds"] += time.monotonic() - began
+            stat["items"] += 1
+            await out.put(item)
+
+
+    async def _drain(self, inbox: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        stat = self.stats["sink"]
+        closing = False
+        while not closing:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            batch = [item]
+            deadline = loop.time() + self.batch_seconds
+            while len(batch) < self.batch_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(inbox.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _DONE:
+                    closing = True
+                    break
+                batch.append(item)
+
+            began = time.monotonic()
+            self._flushing = True
+            try:
+                await self.sink(batch)
+            finally:
+                self._flushing = False
+            stat["busy_seconds"] += time.monotonic() - began
+            stat["items"] += len(batch)
+            if self.stopped:
+                return
@@ -0,0 +1,138 @@
+"""
+Provider Registry Module
+Process-wide registry of LLM provider clients:
+- Each provider client is built once per (provider, API key)
+- Shared across API requests and across Celery tasks in a worker process
+- Providers are resolved lazily, so only the SDKs actually used get imported
+- Base URLs can be pointed elsewhere (e.g. the fake provider server) via settings
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+# Provider name -> (class name in llm_service, API key environment variable)
+PROVIDERS: Dict[str, Tuple[str, str]] = {
+    "openai": ("OpenAIProvider", "OPENAI_API_KEY"),
+    "deepseek": ("DeepSeekProvider", "DEEPSEEK_API_KEY"),
+    "anthropic": ("AnthropicProvider", "ANTHROPIC_API_KEY"),
+}
+
+
+def get_provider_class(provider: str):
+    """
+    Resolve a provider class without instantiating it (no API key needed)
+
+    Args:
+        provider: "openai", "deepseek", or "anthropic"
+
+    Returns:
+        LLMProvider subclass
+    """
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown provider: {provider}")
+
+    from app.services import llm_service
+
+    class_name, _ = PROVIDERS[provider]
+    return getattr(llm_service, class_name)
+
+
+# Model name prefix -> provider, for models not listed in a provider's PRICING table
+MODEL_PREFIXES: Dict[str, str] = {
+    "gpt-": "openai",
+    "o1": "openai",
+    "deepseek-": "deepseek",
+    "claude-": "anthropic",
+}
+
+
+def provider_for_model(model: str) -> str:
+    """
+    Resolve which provider serves a model
+
+    Args:
+        model: Model name, e.g. gpt-4 or deepseek-chat
+
+    Returns:
+        Provider name
+    """
+    for provider in PROVIDERS:
+        if model in get_provider_class(provider).PRICING:
+            return provider
+
+    for prefix, provider in MODEL_PREFIXES.items():
+        if model.startswith(prefix):
+            return provider
+
+    raise ValueError(f"Unknown model: {model}")
+
+
+def provider_base_url(provider: str, default: str) -> str:
+    """
+    API base URL for a provider, honouring LLM_BASE_URL_OVERRIDES
+
+    Args:
+        provider: "openai", "deepseek", or "anthropic"
+        default: The provider's public API base URL
+
+    Returns:
+        Base URL without a trailing slash
+    """
+    return (get_settings().LLM_BASE_URL_OVERRIDES.get(provider) or default).rstrip("/")
+
+
+class ProviderRegistry:
+    """
+    Thread-safe cache of provider instances keyed by provider and API key
+    Provider instances own the SDK clients, so each client is built once
+    """
+
+    def __init__(self):
+        self._providers: Dict[Tuple[str, str], object] = {}
+        self._lock = threading.Lock()
+
+
+    def get(self, provider: str, api_key: Optional[str] = None):
+        """
+        Get (or lazily build) the provider instance
+
+        Args:
+            provider: "openai", "deepseek", or "anthropic"
+            api_key: API key to use (defaults to the provider's environment variable)
+
+        Returns:
+            Shared LLMProvider instance
+        """
+        provider_class = get_provider_class(provider)
+        _, env_var = PROVIDERS[provider]
+        api_key = api_key or os.getenv(env_var) or ""
+
+        # Key on a digest so raw API keys are not kept as dict keys
+        key = (provider, hashlib.sha256(api_key.encode()).hexdigest())
+
+        with self._lock:
+            instance = self._providers.get(key)
+            if instance is None:
+                instance = provider_class(api_key=api_key or None)
+                self._providers[key] = instance
+                logger.info(f"Registered {provider} provider client")
+
+        return instance
+
+
+    def clear(self) -> None:
+        """Drop all cached provider instances"""
+        with self._lock:
+            self._providers.clear()
+
+
+# Process-wide registry shared by all services and tasks
+provider_registry = ProviderRegistry()
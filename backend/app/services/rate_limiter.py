@@ -0,0 +1,329 @@
+"""
+Rate Limiter Module
+Adaptive client-side rate limiting for LLM providers:
+- Token buckets for requests/minute and tokens/minute per (provider, model)
+- Limits learned from provider rate-limit headers (OpenAI/DeepSeek and Anthropic)
+- Retry-After honoured as a shared pause for every caller
+- Multiplicative slow-down on 429s, gradual recovery on success
+"""
+
+import asyncio
+import logging
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional, Tuple
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket that allows a negative balance
+    A caller reserves its cost up front and waits until the balance is
+    back to zero, so concurrent callers queue in arrival order.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def reserve(self, cost: float, now: float) -> float:
+        """Take cost from the bucket and return seconds until it is covered"""
+        self._refill(now)
+        self.tokens -= cost
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def set_limit(self, per_minute: float, now: float) -> None:
+        """Change the per-minute limit, keeping the current balance"""
+        self._refill(now)
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = min(self.tokens, self.capacity)
+
+    def cap_remaining(self, remaining: float, now: float) -> None:
+        """Lower the balance to what the provider says is left"""
+        self._refill(now)
+        self.tokens = min(self.tokens, float(remaining))
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """
+    Parse OpenAI-style reset durations ("1s", "6m0s", "20ms", "1h2m3.5s")
+
+    Returns:
+        Seconds, or None if the value is not a duration
+    """
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if not parts or "".join(n + u for n, u in parts) != value:
+        return None
+
+    units = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    return sum(float(n) * units[u] for n, u in parts)
+
+
+def _parse_reset(value: str) -> Optional[float]:
+    """Parse a reset header (duration or RFC 3339 timestamp) into seconds from now"""
+    seconds = _parse_duration(value)
+    if seconds is not None:
+        return seconds
+
+    try:
+        reset_at = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        return max(0.0, (reset_at - datetime.now(timezone.utc)).total_seconds())
+    except ValueError:
+        return None
+
+
+def parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """
+    Read Retry-After (seconds or HTTP date) or retry-after-ms from response headers
+
+    Returns:
+        Seconds to wait, or None if the headers carry no hint
+    """
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _read_rate_limit_headers(headers: Mapping[str, str]) -> Dict[str, Dict[str, float]]:
+    """
+    Normalize provider rate-limit headers
+
+    Returns:
+        {"requests": {"limit", "remaining", "reset"}, "tokens": {...}} with the keys that were present
+    """
+    names = {
+        "requests": [
+            ("x-ratelimit-limit-requests", "x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+            ("anthropic-ratelimit-requests-limit", "anthropic-ratelimit-requests-remaining",
+             "anthropic-ratelimit-requests-reset"),
+        ],
+        "tokens": [
+            ("x-ratelimit-limit-tokens", "x-ratelimit-remaining-tokens", "x-ratelimit-reset-tokens"),
+            ("anthropic-ratelimit-tokens-limit", "anthropic-ratelimit-tokens-remaining",
+             "anthropic-ratelimit-tokens-reset"),
+        ],
+    }
+
+    parsed: Dict[str, Dict[str, float]] = {}
+    for kind, variants in names.items():
+        for limit_name, remaining_name, reset_name in variants:
+            values: Dict[str, float] = {}
+            for field, header in (("limit", limit_name), ("remaining", remaining_name)):
+                raw = headers.get(header)
+                if raw is not None:
+                    try:
+                        values[field] = float(raw)
+                    except ValueError:
+                        pass
+            raw_reset = headers.get(reset_name)
+            if raw_reset is not None:
+                reset = _parse_reset(raw_reset)
+                if reset is not None:
+                    values["reset"] = reset
+            if values:
+                parsed[kind] = values
+                break
+
+    return parsed
+
+
+class AdaptiveRateLimiter:
+    """
+    Requests/minute and tokens/minute limiter for one (provider, model)
+
+    State is guarded by a threading lock and waits happen outside it, so
+    one instance is safely shared by every coroutine and thread in the
+    process, across event loops.
+    """
+
+    # Stay this fraction under a limit learned from headers
+    SAFETY_FACTOR = 0.95
+    # Multiplicative slow-down after a 429 without limit headers
+    BACKOFF_FACTOR = 0.7
+    # Fraction of the configured limit recovered per successful call
+    RECOVERY_STEP = 0.01
+    # Pause used when a 429 carries no Retry-After
+    DEFAULT_PAUSE_SECONDS = 1.0
+
+    def __init__(self, provider: str, model: str, requests_per_minute: float, tokens_per_minute: float):
+        self.provider = provider
+        self.model = model
+        self.max_rpm = float(requests_per_minute)
+        self.max_tpm = float(tokens_per_minute)
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+
+    def _reserve(self, tokens: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            wait = max(self.requests.reserve(1, now), self.tokens.reserve(tokens, now))
+            return max(wait, self.paused_until - now)
+
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """
+        Wait (asynchronously) until a request of this size may be sent
+
+        Args:
+            tokens: Estimated tokens for the request (prompt + max output)
+
+        Returns:
+            Seconds waited
+        """
+        wait = self._reserve(tokens)
+        if wait > 0:
+            logger.debug(f"Rate limiter {self.provider}/{self.model}: waiting {wait:.2f}s")
+            await asyncio.sleep(wait)
+        return wait
+
+
+    def acquire_sync(self, tokens: int = 0) -> float:
+        """Blocking variant of acquire() for synchronous callers"""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            logger.debug(f"Rate limiter {self.provider}/{self.model}: waiting {wait:.2f}s")
+            time.sleep(wait)
+        return wait
+
+
+    def on_success(self, headers: Optional[Mapping[str, str]] = None) -> None:
+        """
+        Record a successful response
+        Recovers gradually after a slow-down and, when the provider sent
+        rate-limit headers, learns the real limits, syncs the remaining
+        budget and pauses everyone until the reset if a budget is exhausted.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            if headers:
+                self._apply_headers(headers, now)
+
+            for bucket, ceiling in ((self.requests, self.max_rpm), (self.tokens, self.max_tpm)):
+                if bucket.capacity < ceiling:
+                    bucket.set_limit(min(ceiling, bucket.capacity + ceiling * self.RECOVERY_STEP), now)
+
+
+    def _apply_headers(self, headers: Mapping[str, str], now: float) -> bool:
+        """Apply provider rate-limit headers (lock held). Returns True if any were present"""
+        parsed = _read_rate_limit_headers(headers)
+
+        for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            values = parsed.get(kind)
+            if not values:
+                continue
+
+            if "limit" in values and values["limit"] > 0:
+                learned = values["limit"] * self.SAFETY_FACTOR
+                if kind == "requests":
+                    self.max_rpm = learned
+                else:
+                    self.max_tpm = learned
+                bucket.set_limit(learned, now)
+
+            if "remaining" in values:
+                bucket.cap_remaining(values["remaining"], now)
+                if values["remaining"] <= 0 and "reset" in values:
+                    self.paused_until = max(self.paused_until, now + values["reset"])
+
+        return bool(parsed)
+
+
+    def on_rate_limited(self, headers: Optional[Mapping[str, str]] = None) -> float:
+        """
+        Record a 429: pause every caller for Retry-After and slow down
+
+        Args:
+            headers: Headers of the 429 response, if available
+
+        Returns:
+            Seconds every caller is paused for
+        """
+        retry_after = parse_retry_after(headers)
+        pause = retry_after if retry_after is not None else self.DEFAULT_PAUSE_SECONDS
+        now = time.monotonic()
+
+        with self._lock:
+            self.paused_until = max(self.paused_until, now + pause)
+            has_limit_headers = bool(headers) and self._apply_headers(headers, now)
+            if not has_limit_headers:
+                # No quota information: back off multiplicatively
+                self.requests.set_limit(max(1.0, self.requests.capacity * self.BACKOFF_FACTOR), now)
+                self.tokens.set_limit(max(1.0, self.tokens.capacity * self.BACKOFF_FACTOR), now)
+
+        logger.warning(
+            f"Rate limited by {self.provider}/{self.model}: pausing {pause:.2f}s, "
+            f"now {self.requests.capacity:.0f} rpm / {self.tokens.capacity:.0f} tpm"
+        )
+        return pause
+
+
+_limiters: Dict[Tuple[str, str], AdaptiveRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str, model: str) -> AdaptiveRateLimiter:
+    """
+    Get the process-wide limiter for a (provider, model)
+    Initial limits come from LLM_RATE_LIMITS["provider:model"] or the defaults
+    """
+    key = (provider, model)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            settings = get_settings()
+            limits = settings.LLM_RATE_LIMITS.get(f"{provider}:{model}", {})
+            limiter = AdaptiveRateLimiter(
+                provider,
+                model,
+                requests_per_minute=limits.get("rpm", settings.LLM_DEFAULT_RPM),
+                tokens_per_minute=limits.get("tpm", settings.LLM_DEFAULT_TPM),
+            )
+            _limiters[key] = limiter
+    return limiter
@@ -0,0 +1,490 @@
+"""
+Result Writer Module
+Write-behind persistence of streamed evaluation results:
+- submit() only queues the entry, so the result stream never waits on the database
+- A background task bulk-inserts queued entries every RESULT_WRITER_FLUSH_ROWS rows
+  or RESULT_WRITER_FLUSH_MS, in one transaction with the summary upsert and cycle
+  progress (a crash loses at most one flush window)
+- Summary totals are rebuilt from already persisted entries on start, so resumed
+  runs keep a correct summary
+- bulk_insert_entries: entries as plain column values in one COPY (Postgres) or
+  multi-row INSERT, without ORM objects or refreshes; rows already stored for
+  the cycle are skipped, so re-running rows never duplicates entries
+- load_checkpoint: rows a cycle has already completed, for resuming a retried job
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import JSON, delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import async_session
+from app.models.eval_cycle import EvalCycle, EvalCycleSummary, EvalEntry
+from app.services.eval_summary import METRIC_KEYS, SummaryAccumulator
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    from psycopg.types.json import Json
+except ImportError:  # pragma: no cover - COPY needs psycopg
+    Json = None
+
+_ENTRY_TABLE = EvalEntry.__table__
+_ENTRY_JSON_COLUMNS = {column.name for column in _ENTRY_TABLE.columns if isinstance(column.type, JSON)}
+_ENTRY_KEY = ("eval_cycle_id", "row_number")
+_ON_CONFLICT_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+# Columns needed to rebuild a SummaryAccumulator
+_SUMMARY_SOURCE_COLUMNS = [
+    EvalEntry.status, EvalEntry.winner,
+    EvalEntry.tokens_total_a, EvalEntry.tokens_total_b,
+    EvalEntry.cost_a, EvalEntry.cost_b,
+    EvalEntry.latency_ms_a, EvalEntry.latency_ms_b,
+] + [getattr(EvalEntry, f"{key}_{side}") for side in ("a", "b") for key in METRIC_KEYS]
+
+
+async def load_summary_accumulator(session: AsyncSession, eval_cycle_id) -> SummaryAccumulator:
+    """
+    Totals of the entries already persisted for a cycle
+
+    Streams only the summary columns, never whole ORM entries.
+    """
+    accumulator = SummaryAccumulator()
+    result = await session.stream(
+        select(*_SUMMARY_SOURCE_COLUMNS).where(EvalEntry.eval_cycle_id == eval_cycle_id)
+    )
+    async for row in result.mappings():
+        accumulator.add_entry(row)
+    return accumulator
+
+
+async def load_checkpoint(
+    session: AsyncSession,
+    eval_cycle_id,
+    start_row: Optional[int] = None,
+    end_row: Optional[int] = None
+) -> Tuple[Set[int], SummaryAccumulator]:
+    """
+    Rows of a cycle completed by an earlier attempt, and their totals
+
+    Failed entries are deleted so the resumed attempt evaluates those rows again.
+    The caller commits.
+
+    Args:
+        session: Session to read (and delete failed entries) in
+        eval_cycle_id: Cycle being resumed
+        start_row: First row of the range to look at (None = from the start)
+        end_row: Last row of the range, inclusive (None = to the end)
+
+    Returns:
+        (completed row numbers, SummaryAccumulator of those rows)
+    """
+    conditions = [EvalEntry.eval_cycle_id == eval_cycle_id]
+    if start_row is not None:
+        conditions.append(EvalEntry.row_number >= start_row)
+    if end_row is not None:
+        conditions.append(EvalEntry.row_number <= end_row)
+
+    await session.execute(delete(EvalEntry).where(*conditions, EvalEntry.status == "failed"))
+
+    done_rows = set()
+    accumulator = SummaryAccumulator()
+    result = await session.stream(select(EvalEntry.row_number, *_SUMMARY_SOURCE_COLUMNS).where(*conditions))
+    async for row in result.mappings():
+        done_rows.add(row["row_number"])
+        accumulator.add_entry(row)
+    return done_rows, accumulator
+
+
+async def upsert_summary(session: AsyncSession, eval_cycle_id, values: Dict[str, Any]) -> None:
+    """
+    Insert or update the cycle's EvalCycleSummary
+
+    One ON CONFLICT statement on Postgres and SQLite; other dialects update
+    and insert only when no summary row exists yet.
+    """
+    dialect_name = (await session.connection()).dialect.name
+    if dialect_name in _ON_CONFLICT_INSERTS:
+        stmt = _ON_CONFLICT_INSERTS[dialect_name](EvalCycleSummary).values(
+            id=uuid.uuid4(), eval_cycle_id=eval_cycle_id, **values
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[EvalCycleSummary.eval_cycle_id],
+            set_={**values, "updated_at": datetime.utcnow()},
+        )
+        await session.execute(stmt)
+        return
+
+    result = await session.execute(
+        update(EvalCycleSummary)
+        .where(EvalCycleSummary.eval_cycle_id == eval_cycle_id)
+        .values(**values, updated_at=datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        await session.execute(
+            EvalCycleSummary.__table__.insert().values(id=uuid.uuid4(), eval_cycle_id=eval_cycle_id, **values)
+        )
+
+
+def _entry_rows(entries: List[Dict[str, Any]]) -> Tuple[List[str], List[List[Any]]]:
+    """
+    Column names and value rows for a bulk insert
+
+    Every row gets the same columns (failed entries carry fewer); missing
+    columns take the model's Python-side defaults, as an ORM insert would.
+    """
+    present = set().union(*entries)
+    columns = [column for column in _ENTRY_TABLE.columns if column.name in present or column.default is not None]
+    rows = []
+    for entry in entries:
+        row = []
+        for column in columns:
+            if column.name in entry or column.default is None:
+                row.append(entry.get(column.name))
+            elif column.default.is_callable:
+                row.append(column.default.arg(None))
+            else:
+                row.append(column.default.arg)
+        rows.append(row)
+    return [column.name for column in columns], rows
+
+
+async def bulk_insert_entries(session: AsyncSession, entries: List[Dict[str, Any]]) -> List[int]:
+    """
+    Insert EvalEntry rows in one round trip, in the session's transaction
+
+    Postgres (psycopg) gets a COPY into a staging table when EVAL_ENTRY_COPY is
+    on, other databases one multi-row INSERT (insertmanyvalues). Rows whose
+    (eval_cycle_id, row_number) is already stored are skipped (ON CONFLICT DO
+    NOTHING). The caller commits.
+
+    Args:
+        session: Session whose transaction the rows join
+        entries: EvalEntry column values, one dict per row
+
+    Returns:
+        Row numbers actually inserted
+    """
+    if not entries:
+        return []
+    columns, rows = _entry_rows(entries)
+    connection = await session.connection()
+    dialect = connection.dialect
+
+    if get_settings().EVAL_ENTRY_COPY and Json is not None and dialect.driver == "psycopg":
+        json_indexes = [index for index, column in enumerate(columns) if column in _ENTRY_JSON_COLUMNS]
+        raw_connection = await connection.get_raw_connection()
+        table = _ENTRY_TABLE.name
+        stage = f"{table}_stage"
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        async with raw_connection.driver_connection.cursor() as cursor:
+            # COPY has no ON CONFLICT: copy into a temp table, then insert what is new
+            await cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS {stage} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP")
+            async with cursor.copy(f"COPY {stage} ({column_list}) FROM STDIN") as copy:
+                for row in rows:
+                    for index in json_indexes:
+                        if row[index] is not None:
+                            row[index] = Json(row[index])
+                    await copy.write_row(row)
+            await cursor.execute(
+                f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {stage} "
+                f"ON CONFLICT ({', '.join(_ENTRY_KEY)}) DO NOTHING RETURNING row_number"
+            )
+            inserted = [row[0] for row in await cursor.fetchall()]
+            await cursor.execute(f"TRUNCATE {stage}")
+        return inserted
+
+    params = [dict(zip(columns, row)) for row in rows]
+    if dialect.name in _ON_CONFLICT_INSERTS:
+        stmt = (
+            _ON_CONFLICT_INSERTS[dialect.name](_ENTRY_TABLE)
+            .on_conflict_do_nothing(index_elements=list(_ENTRY_KEY))
+            .returning(_ENTRY_TABLE.c.row_number)
+        )
+        result = await connection.execute(stmt, params)
+        return list(result.scalars())
+    await connection.execute(_ENTRY_TABLE.insert(), params)
+    return [entry["row_number"] for entry in params]
+
+
+def stream_entry_values(
+    eval_cycle_id,
+    row_number: int,
+    event: Dict[str, Any],
+    system_prompt: str,
+    user_prompt_template: str,
+    model_a: str,
+    model_b: str,
+    input_data: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    EvalEntry column values for a row_complete / row_error event of /evaluate/rows
+    Rows where either provider call failed are stored as failed entries
+
+    Args:
+        eval_cycle_id: Cycle the entry belongs to
+        row_number: 1-based row number
+        event: The stream event (result carries question and expected_answer)
+        system_prompt: System prompt of the run
+        user_prompt_template: User prompt template of the run
+        model_a: Model A name (called through OpenAI)
+        model_b: Model B name (called through DeepSeek)
+        input_data: The input row (failed rows have no result to take it from)
+    """
+    result = event.get("result") or {}
+    # A provider call of the row failed: its error text is not an answer to score
+    call_errors = [
+        f"{name}: {result[f'model_{side}_error']}"
+        for side, name in (("a", model_a), ("b", model_b))
+        if result.get(f"model_{side}_error")
+    ]
+    if event["type"] != "row_complete" or call_errors:
+        return {
+            "id": uuid.uuid4(),
+            "eval_cycle_id": eval_cycle_id,
+            "row_number": row_number,
+            "input_data": input_data or {},
+            "system_prompt": system_prompt,
+            "user_prompt": user_prompt_template,
+            "model_a": model_a,
+            "model_b": model_b,
+            "status": "failed",
+            "error_message": "; ".join(call_errors) or event.get("error"),
+        }
+
+    question = result.get("question", "")
+    winner = result.get("winner")
+    cost_a = result.get("model_a_cost") or 0.0
+    cost_b = result.get("model_b_cost") or 0.0
+    return {
+        "id": uuid.uuid4(),
+        "eval_cycle_id": eval_cycle_id,
+        "row_number": row_number,
+        "input_data": {"question": question, "expected_answer": result.get("expected_answer")},
+        "system_prompt": system_prompt,
+        "user_prompt": user_prompt_template.replace("{Question}", question),
+        "expected_output": result.get("expected_answer"),
+        "output_a": result.get("model_a_response"),
+        "model_a": model_a,
+        "provider_a": "openai",
+        "output_b": result.get("model_b_response"),
+        "model_b": model_b,
+        "provider_b": "deepseek",
+        "tokens_total_a": result.get("model_a_tokens") or 0,
+        "tokens_total_b": result.get("model_b_tokens") or 0,
+        "cost_a": cost_a,
+        "cost_b": cost_b,
+        "total_cost": cost_a + cost_b,
+        "latency_ms_a": int(round((result.get("model_a_latency") or 0) * 1000)),
+        "latency_ms_b": int(round((result.get("model_b_latency") or 0) * 1000)),
+        "connect_ms_a": int(round(result.get("model_a_connect_ms") or 0)),
+        "connect_ms_b": int(round(result.get("model_b_connect_ms") or 0)),
+        "ttfb_ms_a": int(round(result.get("model_a_ttfb_ms") or 0)),
+        "ttfb_ms_b": int(round(result.get("model_b_ttfb_ms") or 0)),
+        # model_x_cached: True = hit, False = miss, None = cache not consulted
+        "cache_hits": sum(1 for side in ("a", "b") if result.get(f"model_{side}_cached") is True),
+        "cache_misses": sum(1 for side in ("a", "b") if result.get(f"model_{side}_cached") is False),
+        "accuracy_a": result.get("model_a_accuracy"),
+        "accuracy_b": result.get("model_b_accuracy"),
+        "winner": "model_a" if winner == model_a else "model_b" if winner == model_b else winner,
+        "status": "completed",
+    }
+
+
+class ResultWriter:
+    """
+    Write-behind queue of EvalEntry rows for one evaluation cycle
+
+    Entries of a failed flush stay queued and are retried with bounded
+    exponential backoff while new entries keep arriving; rows the database
+    still has not taken after the close retries are counted in `unwritten`.
+
+    Usage:
+        writer = ResultWriter(eval_cycle_id)
+        await writer.start()
+        writer.submit(entry_values)   # never blocks
+        await writer.aclose("completed")
+    """
+
+    def __init__(
+        self,
+        eval_cycle_id,
+        total_rows: Optional[int] = None,
+        flush_rows: Optional[int] = None,
+        flush_ms: Optional[int] = None
+    ):
+        settings = get_settings()
+        self.eval_cycle_id = uuid.UUID(str(eval_cycle_id))
+        self.total_rows = total_rows
+        self.flush_rows = flush_rows or settings.RESULT_WRITER_FLUSH_ROWS
+        self.flush_seconds = (flush_ms or settings.RESULT_WRITER_FLUSH_MS) / 1000
+        self.max_backoff_seconds = settings.RESULT_WRITER_MAX_BACKOFF_MS / 1000
+        self.close_retries = settings.RESULT_WRITER_CLOSE_RETRIES
+        self.summary = SummaryAccumulator()
+        self.written = 0
+        self.unwritten = 0
+        self.closed = False
+        self._queue: asyncio.Queue = asyncio.Queue()
+        # Entries taken off the queue and not yet committed
+        self._pending: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+
+
+    async def start(self) -> None:
+        """
+        Check the cycle exists, load its persisted totals and start flushing
+
+        Raises:
+            ValueError: If the evaluation cycle does not exist
+        """
+        async with async_session() as session:
+            cycle = await session.get(EvalCycle, self.eval_cycle_id)
+            if cycle is None:
+                raise ValueError(f"Evaluation cycle {self.eval_cycle_id} not found")
+            if self.total_rows is None:
+                self.total_rows = cycle.total_rows
+            self.summary = await load_summary_accumulator(session, self.eval_cycle_id)
+            cycle.status = "running"
+            cycle.started_at = cycle.started_at or datetime.utcnow()
+            await session.commit()
+
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Result writer started for cycle {self.eval_cycle_id} ({self.summary.rows} entries already stored)")
+
+
+    def submit(self, entry: Dict[str, Any]) -> None:
+        """Queue an entry (EvalEntry column values) for the next flush"""
+        if self.closed:
+            raise RuntimeError("Result writer is closed")
+        self._queue.put_nowait(entry)
+
+
+    async def aclose(self, status: str = "completed") -> None:
+        """
+        Flush everything queued and set the cycle's final status
+
+        Args:
+            status: completed (becomes "partial" if rows failed or were not written), failed or cancelled
+
+        Check `unwritten` afterwards: entries the database did not take
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.put_nowait(None)
+        if self._task is not None:
+            await self._task
+
+        if status == "completed" and (self.summary.failed_rows or self.unwritten):
+            status = "partial"
+        try:
+            async with async_session() as session:
+                await session.execute(
+                    update(EvalCycle).where(EvalCycle.id == self.eval_cycle_id).values(
+                        status=status,
+                        completed_at=datetime.utcnow(),
+                        processed_rows=self.summary.rows - self.summary.failed_rows,
+                        failed_rows=self.summary.failed_rows,
+                        progress=100 if status in ("completed", "partial") else self._progress(),
+                    )
+                )
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Could not finalize cycle {self.eval_cycle_id}: {str(e)}")
+        logger.info(f"Result writer for cycle {self.eval_cycle_id} closed ({status}): {self.written} entries written, {self.unwritten} unwritten")
+
+
+    def _progress(self) -> int:
+        if not self.total_rows:
+            return 0
+        return min(100, int(self.summary.rows / self.total_rows * 100))
+
+
+    def _backoff(self, failures: int) -> float:
+        """Seconds to wait after the n-th consecutive failed flush"""
+        return min(self.max_backoff_seconds, 0.5 * 2 ** (failures - 1))
+
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        closing = False
+        failures = 0
+        while not closing:
+            if failures:
+                # Back off before retrying, still taking new entries
+                deadline = loop.time() + self._backoff(failures)
+            else:
+                entry = await self._queue.get()
+                if entry is None:
+                    break
+                self._pending.append(entry)
+                deadline = loop.time() + self.flush_seconds
+            while failures or len(self._pending) < self.flush_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is None:
+                    closing = True
+                    break
+                self._pending.append(entry)
+            failures = 0 if await self._flush_pending() else failures + 1
+
+        # Stream ended: a few more tries for what the database has not taken yet
+        for attempt in range(1, self.close_retries + 1):
+            if not self._pending:
+                break
+            await asyncio.sleep(self._backoff(failures + attempt))
+            await self._flush_pending()
+        if self._pending:
+            self.unwritten = len(self._pending)
+            logger.error(f"{self.unwritten} entries for cycle {self.eval_cycle_id} could not be written")
+
+
+    async def _flush_pending(self) -> bool:
+        """Write pending entries in batches of flush_rows; False if a batch failed (it stays pending)"""
+        while self._pending:
+            batch = self._pending[:self.flush_rows]
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                logger.warning(
+                    f"Flush of {len(batch)} entries for cycle {self.eval_cycle_id} failed "
+                    f"({len(self._pending)} pending): {str(e)}"
+                )
+                return False
+            del self._pending[:len(batch)]
+        return True
+
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        async with async_session() as session:
+            inserted = set(await bulk_insert_entries(session, batch))
+            # Rows stored by an earlier run of this cycle are already counted
+            summary = SummaryAccumulator()
+            summary.merge(self.summary)
+            for entry in batch:
+                if entry["row_number"] in inserted:
+                    summary.add_entry(entry)
+            await upsert_summary(session, self.eval_cycle_id, summary.summary_values(self.total_rows))
+            await session.execute(
+                update(EvalCycle).where(EvalCycle.id == self.eval_cycle_id).values(
+                    processed_rows=summary.rows - summary.failed_rows,
+                    failed_rows=summary.failed_rows,
+                    progress=min(100, int(summary.rows / self.total_rows * 100)) if self.total_rows else 0,
+                )
+            )
+            await session.commit()
+        self.summary = summary
+        self.written += len(inserted)
+        logger.debug(f"Flushed {len(batch)} entries for cycle {self.eval_cycle_id}")
@@ -0,0 +1,240 @@
+"""
+Run Estimator Module
+Pre-flight token, cost and wall-time estimates for an evaluation run:
+- Counts every rendered row without rendering it: template literals are
+  tokenized once and each column is tokenized in one batch
+- Column token arrays are cached per (file, mtime, encoding, column) and can be
+  warmed at upload, so re-estimating with other prompts or models skips tokenizing
+- Input tokens exact up to merges across template/value boundaries
+- Output tokens as a range (expected-answer length or a floor .. max_tokens)
+- Cost from each provider's PRICING table
+- Wall time from the configured concurrency and the per-model rate limits
+"""
+
+import logging
+import string
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services import tokenizer
+from app.services.provider_registry import get_provider_class, provider_for_model
+from app.services.rate_limiter import get_rate_limiter
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Columns holding a reference answer; their length is the low end of the output range
+EXPECTED_OUTPUT_COLUMNS = ("expected_output", "expected_answer", "expected")
+
+# Column token arrays keyed by (dataset key, encoding, column, prefix)
+_TOKEN_COUNT_CACHE_SIZE = 64
+_token_count_cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+_token_count_cache_lock = threading.Lock()
+
+
+def parse_template(template: str) -> tuple:
+    """
+    Split a str.format template into literal text and fields
+
+    A space right before a placeholder is moved onto the value: BPE merges
+    it with the value's first word, so counting it with the literal would
+    overcount by a token per field.
+
+    Args:
+        template: Template with {column} placeholders
+
+    Returns:
+        Tuple of (literal text joined, list of (column, prefix) in order)
+    """
+    literals = []
+    fields = []
+    for literal, field_name, _, _ in string.Formatter().parse(template):
+        prefix = ""
+        if field_name is not None and literal.endswith(" "):
+            literal, prefix = literal[:-1], " "
+        literals.append(literal)
+        if field_name is not None:
+            # "{row.attr}" / "{row[0]}" read the base column
+            fields.append((field_name.split(".")[0].split("[")[0], prefix))
+    return "".join(literals), fields
+
+
+def _column_token_counts(
+    df: pd.DataFrame,
+    column: str,
+    prefix: str,
+    model: str,
+    dataset_key: Optional[tuple] = None
+) -> np.ndarray:
+    """Token counts of one column rendered the way str.format renders it, cached per dataset_key"""
+    key = (dataset_key, tokenizer.encoding_for_model(model), column, prefix)
+    if dataset_key is not None:
+        with _token_count_cache_lock:
+            counts = _token_count_cache.get(key)
+            if counts is not None:
+                _token_count_cache.move_to_end(key)
+                return counts
+
+    values = df[column].astype(str)
+    if prefix:
+        values = prefix + values
+    counts = np.asarray(tokenizer.count_tokens_batch(values.tolist(), model), dtype=np.int64)
+
+    if dataset_key is not None:
+        with _token_count_cache_lock:
+            _token_count_cache[key] = counts
+            while len(_token_count_cache) > _TOKEN_COUNT_CACHE_SIZE:
+                _token_count_cache.popitem(last=False)
+    return counts
+
+
+def warm_token_counts(df: pd.DataFrame, dataset_key: tuple, model: Optional[str] = None) -> None:
+    """
+    Tokenize every column of a dataset ahead of its first estimate
+
+    Each column is counted bare and with the leading space a "... {column}"
+    placeholder gives it (see parse_template), the two ways a template renders it.
+
+    Args:
+        df: Parsed dataset
+        dataset_key: Cache key of the dataset file (ExcelService.dataframe_key)
+        model: Model whose encoding to count with (default encoding if None)
+    """
+    for column in df.columns:
+        for prefix in ("", " "):
+            _column_token_counts(df, column, prefix, model, dataset_key)
+    logger.info(f"Warmed token counts for {len(df.columns)} columns of {dataset_key[0]}")
+
+
+def estimate_run(
+    df: pd.DataFrame,
+    system_prompt: str,
+    user_prompt_template: str,
+    models: List[str],
+    max_tokens: int,
+    concurrency: Optional[int] = None,
+    dataset_key: Optional[tuple] = None
+) -> Dict[str, Any]:
+    """
+    Estimate tokens, cost and wall time for evaluating every row with each model
+
+    Args:
+        df: Parsed dataset
+        system_prompt: System instruction sent with every row
+        user_prompt_template: User prompt with {column} placeholders
+        models: Models to run (rows are sent to all models concurrently)
+        max_tokens: Max response length per call
+        concurrency: Rows in flight at once (defaults to EVAL_CONCURRENCY)
+        dataset_key: Cache key of the dataset file (ExcelService.dataframe_key);
+            column token counts are reused across estimates of the same file
+
+    Returns:
+        Dict with per-model and total token, cost and wall-time ranges
+    """
+    settings = get_settings()
+    concurrency = concurrency or settings.EVAL_CONCURRENCY
+    total_rows = len(df)
+
+    literal_text, fields = parse_template(user_prompt_template)
+    missing = sorted({column for column, _ in fields} - set(df.columns))
+    if missing:
+        raise ValueError(f"Template variables not found in dataset columns: {', '.join(missing)}")
+
+    expected_column = next((c for c in EXPECTED_OUTPUT_COLUMNS if c in df.columns), None)
+
+    # Token arrays are per encoding; models sharing one are counted once
+    column_counts: Dict[tuple, np.ndarray] = {}
+
+    def counts_for(column: str, prefix: str, model: str) -> np.ndarray:
+        key = (tokenizer.encoding_for_model(model), column, prefix)
+        if key not in column_counts:
+            column_counts[key] = _column_token_counts(df, column, prefix, model, dataset_key)
+        return column_counts[key]
+
+    model_estimates = []
+    row_latency_low = np.zeros(total_rows)
+    row_latency_high = np.zeros(total_rows)
+    rate_bound = 0.0
+
+    for model in models:
+        provider = provider_for_model(model)
+        provider_class = get_provider_class(provider)
+
+        # Per-row input = system prompt + template literals + each referenced column
+        fixed = tokenizer.count_tokens(system_prompt, model) + tokenizer.count_tokens(literal_text, model)
+        input_per_row = np.full(total_rows, fixed, dtype=np.int64)
+        for column, prefix in fields:
+            input_per_row += counts_for(column, prefix, model)
+
+        if expected_column:
+            output_low_per_row = np.minimum(counts_for(expected_column, "", model), max_tokens)
+        else:
+            output_low_per_row = np.full(total_rows, min(settings.ESTIMATE_MIN_OUTPUT_TOKENS, max_tokens))
+
+        input_tokens = int(input_per_row.sum())
+        output_low = int(output_low_per_row.sum())
+        output_high = max_tokens * total_rows
+
+        row_latency_low = np.maximum(
+            row_latency_low,
+            settings.ESTIMATE_REQUEST_OVERHEAD_SECONDS + output_low_per_row / settings.ESTIMATE_OUTPUT_TOKENS_PER_SECOND
+        )
+        row_latency_high = np.maximum(
+            row_latency_high,
+            settings.ESTIMATE_REQUEST_OVERHEAD_SECONDS + max_tokens / settings.ESTIMATE_OUTPUT_TOKENS_PER_SECOND
+        )
+
+        # The limiter charges prompt + max_tokens per request, whatever the real output is
+        limiter = get_rate_limiter(provider, model)
+        rate_bound = max(rate_bound, 60.0 * max(
+            total_rows / limiter.max_rpm,
+            (input_tokens + output_high) / limiter.max_tpm
+        ))
+
+        model_estimates.append({
+            "model": model,
+            "provider": provider,
+            "pricing_known": model in provider_class.PRICING,
+            "input_tokens": input_tokens,
+            "input_tokens_per_row_avg": round(input_tokens / total_rows, 1) if total_rows else 0,
+            "input_tokens_per_row_max": int(input_per_row.max()) if total_rows else 0,
+            "output_tokens_low": output_low,
+            "output_tokens_high": output_high,
+            "cost_low": round(provider_class.estimate_cost(model, input_tokens, output_low), 6),
+            "cost_high": round(provider_class.estimate_cost(model, input_tokens, output_high), 6),
+        })
+
+    wall_low = max(float(row_latency_low.sum()) / concurrency, rate_bound)
+    wall_high = max(float(row_latency_high.sum()) / concurrency, rate_bound)
+
+    logger.info(
+        f"Estimated run: {total_rows} rows x {len(models)} models, "
+        f"cost ${sum(m['cost_low'] for m in model_estimates):.4f}-"
+        f"${sum(m['cost_high'] for m in model_estimates):.4f}"
+    )
+
+    return {
+        "total_rows": total_rows,
+        "concurrency": concurrency,
+        "max_tokens": max_tokens,
+        "template_fields": [column for column, _ in fields],
+        "expected_output_column": expected_column,
+        "models": model_estimates,
+        "total_input_tokens": sum(m["input_tokens"] for m in model_estimates),
+        "total_output_tokens": {
+            "low": sum(m["output_tokens_low"] for m in model_estimates),
+            "high": sum(m["output_tokens_high"] for m in model_estimates),
+        },
+        "total_cost": {
+            "low": round(sum(m["cost_low"] for m in model_estimates), 6),
+            "high": round(sum(m["cost_high"] for m in model_estimates), 6),
+        },
+        "wall_time_seconds": {
+            "low": round(wall_low, 1),
+            "high": round(wall_high, 1),
+        },
+    }
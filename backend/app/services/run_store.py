@@ -0,0 +1,293 @@
+"""
+Run Store Module
+Server-side state of streamed /evaluate/rows runs, so dropped streams can resume:
+- Run metadata: request parameters (never API keys), status, row count
+- Event log: every row_complete / row_error event with a 1-based event_id
+- Lease held by the stream evaluating a run, so two streams never evaluate
+  the same rows; it expires if the worker dies without releasing it
+- In-process memory backend or Redis (shared across API workers); the
+  memory backend keeps full events for the first rows of a run only and a
+  compact (event_id, row_number, type) record for the rest
+- TTL on every run
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Run statuses
+RUN_RUNNING = "running"
+RUN_COMPLETED = "completed"
+RUN_FAILED = "failed"
+RUN_INTERRUPTED = "interrupted"
+# Client disconnected: in-flight provider calls were cancelled
+RUN_CANCELLED = "cancelled"
+
+
+class RunStore(ABC):
+    """
+    Abstract base class for run stores
+    """
+
+    # Whether calls block on I/O (run them in a thread from async code)
+    blocking = False
+
+    @abstractmethod
+    def create(self, run_id: str, meta: Dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    def get_meta(self, run_id: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def update_meta(self, run_id: str, fields: Dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    def append_event(self, run_id: str, event: Dict[str, Any]) -> int:
+        """Store a row event under the next event_id (set on the stored copy) and return it"""
+        pass
+
+    @abstractmethod
+    def get_events(self, run_id: str) -> List[Dict[str, Any]]:
+        """All stored row events, oldest first"""
+        pass
+
+    @abstractmethod
+    def acquire_lease(self, run_id: str, owner: str, seconds: int) -> bool:
+        """Take (or, for its owner, extend) the run's lease; False while another owner holds it"""
+        pass
+
+    @abstractmethod
+    def release_lease(self, run_id: str, owner: str) -> None:
+        """Give up the lease if owner still holds it"""
+        pass
+
+
+    async def call(self, method: str, *args):
+        """Run a store method without blocking the event loop"""
+        fn = getattr(self, method)
+        if self.blocking:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+
+class MemoryRunStore(RunStore):
+    """
+    In-process store (runs resume only on the same API worker)
+
+    Past max_replay_events events a run keeps only compact records, so a long
+    streamed run does not hold every result in memory for the TTL. Those rows
+    are still skipped on resume, but replayed without their result
+    ("compacted": true); use the Redis store to replay every result.
+    """
+
+    def __init__(self, max_runs: int, ttl_seconds: int, max_replay_events: int):
+        self.max_runs = max_runs
+        self.ttl_seconds = ttl_seconds
+        self.max_replay_events = max_replay_events
+        # run_id -> (expires_at, meta, events)
+        self._runs: "OrderedDict[str, tuple]" = OrderedDict()
+        # run_id -> (owner, expires_at)
+        self._leases: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+
+    def _get(self, run_id: str) -> Optional[tuple]:
+        # Called with the lock held
+        entry = self._runs.get(run_id)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._runs[run_id]
+            return None
+        return entry
+
+
+    def create(self, run_id: str, meta: Dict[str, Any]) -> None:
+        with self._lock:
+            self._runs[run_id] = (time.monotonic() + self.ttl_seconds, dict(meta), [])
+            while len(self._runs) > self.max_runs:
+                self._runs.popitem(last=False)
+
+
+    def get_meta(self, run_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._get(run_id)
+            return dict(entry[1]) if entry else None
+
+
+    def update_meta(self, run_id: str, fields: Dict[str, Any]) -> None:
+        with self._lock:
+            entry = self._get(run_id)
+            if entry:
+                entry[1].update(fields)
+
+
+    def append_event(self, run_id: str, event: Dict[str, Any]) -> int:
+        with self._lock:
+            entry = self._get(run_id)
+            if entry is None:
+                raise KeyError(f"Run {run_id} not found")
+            event_id = len(entry[2]) + 1
+            if event_id <= self.max_replay_events:
+                entry[2].append({**event, "event_id": event_id})
+            else:
+                if event_id == self.max_replay_events + 1:
+                    logger.warning(
+                        f"Run {run_id} passed {self.max_replay_events} events; "
+                        f"later rows are replayed without results"
+                    )
+                entry[2].append((event_id, event["row_number"], event["type"]))
+            return event_id
+
+
+    def get_events(self, run_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            entry = self._get(run_id)
+            events = list(entry[2]) if entry else []
+        return [
+            event if isinstance(event, dict)
+            else {"type": event[2], "row_number": event[1], "event_id": event[0], "compacted": True}
+            for event in events
+        ]
+
+
+    def acquire_lease(self, run_id: str, owner: str, seconds: int) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            lease = self._leases.get(run_id)
+            if lease is not None and lease[0] != owner and lease[1] > now:
+                return False
+            self._leases[run_id] = (owner, now + seconds)
+            return True
+
+
+    def release_lease(self, run_id: str, owner: str) -> None:
+        with self._lock:
+            lease = self._leases.get(run_id)
+            if lease is not None and lease[0] == owner:
+                del self._leases[run_id]
+
+
+class RedisRunStore(RunStore):
+    """Redis store shared by every API worker"""
+
+    blocking = True
+
+    def __init__(self, url: str, ttl_seconds: int, prefix: str = "evalrun:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=1)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+
+    def _meta_key(self, run_id: str) -> str:
+        return f"{self.prefix}{run_id}:meta"
+
+
+    def _events_key(self, run_id: str) -> str:
+        return f"{self.prefix}{run_id}:events"
+
+
+    def create(self, run_id: str, meta: Dict[str, Any]) -> None:
+        self.client.set(self._meta_key(run_id), json.dumps(meta), ex=self.ttl_seconds)
+
+
+    def get_meta(self, run_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(self._meta_key(run_id))
+        return json.loads(raw) if raw else None
+
+
+    def update_meta(self, run_id: str, fields: Dict[str, Any]) -> None:
+        meta = self.get_meta(run_id)
+        if meta is not None:
+            meta.update(fields)
+            self.client.set(self._meta_key(run_id), json.dumps(meta), ex=self.ttl_seconds)
+
+
+    def _seq_key(self, run_id: str) -> str:
+        return f"{self.prefix}{run_id}:seq"
+
+
+    def append_event(self, run_id: str, event: Dict[str, Any]) -> int:
+        event_id = self.client.incr(self._seq_key(run_id))
+        pipe = self.client.pipeline()
+        pipe.rpush(self._events_key(run_id), json.dumps({**event, "event_id": event_id}))
+        pipe.expire(self._events_key(run_id), self.ttl_seconds)
+        pipe.expire(self._seq_key(run_id), self.ttl_seconds)
+        pipe.execute()
+        return event_id
+
+
+    def get_events(self, run_id: str) -> List[Dict[str, Any]]:
+        events = [json.loads(raw) for raw in self.client.lrange(self._events_key(run_id), 0, -1)]
+        # Concurrent appends can land out of event_id order
+        return sorted(events, key=lambda event: event["event_id"])
+
+
+    def _lease_key(self, run_id: str) -> str:
+        return f"{self.prefix}{run_id}:lease"
+
+
+    def acquire_lease(self, run_id: str, owner: str, seconds: int) -> bool:
+        key = self._lease_key(run_id)
+        if self.client.set(key, owner, nx=True, ex=seconds):
+            return True
+        # Held already: extend it if it is ours
+        holder = self.client.get(key)
+        if holder is None:
+            # Expired in between
+            return bool(self.client.set(key, owner, nx=True, ex=seconds))
+        if holder.decode() == owner:
+            self.client.expire(key, seconds)
+            return True
+        return False
+
+
+    def release_lease(self, run_id: str, owner: str) -> None:
+        key = self._lease_key(run_id)
+        holder = self.client.get(key)
+        if holder is not None and holder.decode() == owner:
+            self.client.delete(key)
+
+
+_store: Optional[RunStore] = None
+_store_lock = threading.Lock()
+
+
+def get_run_store() -> RunStore:
+    """
+    Get the process-wide run store built from settings
+    Falls back to the memory store when Redis is not available
+    """
+    global _store
+
+    with _store_lock:
+        if _store is None:
+            settings = get_settings()
+            if settings.EVAL_RUN_STORE == "redis":
+                try:
+                    store = RedisRunStore(settings.EVAL_RUN_REDIS_URL, settings.EVAL_RUN_TTL_SECONDS)
+                    store.client.ping()
+                    _store = store
+                except Exception as e:
+                    logger.warning(f"Redis run store unavailable ({str(e)}), keeping runs in memory")
+            if _store is None:
+                _store = MemoryRunStore(
+                    settings.EVAL_RUN_MEMORY_MAX_RUNS,
+                    settings.EVAL_RUN_TTL_SECONDS,
+                    settings.EVAL_RUN_MEMORY_MAX_REPLAY_EVENTS,
+                )
+        return _store
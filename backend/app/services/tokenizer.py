@@ -0,0 +1,239 @@
+"""
+Tokenizer Module
+Offline byte-pair-encoding tokenizer for token counts:
+- Reads tiktoken-format vocab files bundled in app/services/vocab
+- No network access and no compiled dependencies
+- LRU memo for repeated strings (system prompts, templates)
+- count_tokens_batch() for tokenizing a whole dataset column at once
+"""
+
+import base64
+import logging
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+VOCAB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vocab")
+
+DEFAULT_ENCODING = "cl100k_base"
+
+# Pre-tokenizer split pattern for cl100k_base. \p{L}/\p{N} are spelled with
+# stdlib classes ([^\W\d_] = letter, \d = digit) so the `regex` package is not needed.
+_LETTER = r"[^\W\d_]"
+_NOT_LETTER_OR_DIGIT = r"(?:[^\w\r\n]|_)"
+_PUNCT = r"(?:[^\s\w]|_)"
+
+ENCODING_PATTERNS = {
+    "cl100k_base": (
+        r"'(?i:[sdmt]|ll|ve|re)"
+        rf"|{_NOT_LETTER_OR_DIGIT}?+{_LETTER}+"
+        r"|\d{1,3}"
+        rf"| ?{_PUNCT}++[\r\n]*"
+        r"|\s*[\r\n]"
+        r"|\s+(?!\S)"
+        r"|\s+"
+    ),
+}
+
+# Model name prefix -> encoding. Only cl100k_base is bundled, so it is also the
+# approximation used for DeepSeek and Anthropic models.
+MODEL_PREFIX_TO_ENCODING = {
+    "gpt-4": "cl100k_base",
+    "gpt-3.5": "cl100k_base",
+    "text-embedding-3": "cl100k_base",
+    "deepseek": "cl100k_base",
+    "claude": "cl100k_base",
+}
+
+# Number of distinct texts kept in the count memo
+TEXT_MEMO_SIZE = 65_536
+# Number of distinct pre-tokenized pieces kept in the merge memo
+PIECE_MEMO_SIZE = 262_144
+
+
+def load_ranks(path: str) -> Dict[bytes, int]:
+    """
+    Load a tiktoken-format vocab file ("<base64 token> <rank>" per line)
+
+    Args:
+        path: Path to the .tiktoken file
+
+    Returns:
+        Mapping of token bytes to rank
+    """
+    ranks: Dict[bytes, int] = {}
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            token, rank = line.split()
+            ranks[base64.b64decode(token)] = int(rank)
+    return ranks
+
+
+class BPETokenizer:
+    """
+    Byte-level BPE tokenizer compatible with tiktoken encodings
+
+    Text is split by the encoding's regex, each piece is UTF-8 encoded and
+    merged by rank. Merges are memoized per piece and counts per text, so
+    datasets with a shared system prompt or template are counted mostly
+    from cache.
+    """
+
+    def __init__(self, name: str, ranks: Dict[bytes, int], pattern: str):
+        self.name = name
+        self.ranks = ranks
+        self.pattern = re.compile(pattern)
+        self._encode_piece = lru_cache(maxsize=PIECE_MEMO_SIZE)(self._encode_piece_uncached)
+        self._count_piece = lru_cache(maxsize=PIECE_MEMO_SIZE)(self._count_piece_uncached)
+        self._count = lru_cache(maxsize=TEXT_MEMO_SIZE)(self._count_uncached)
+
+
+    def encode(self, text: str) -> List[int]:
+        """
+        Encode text into token ids
+
+        Args:
+            text: Text to encode
+
+        Returns:
+            List of token ids
+        """
+        tokens: List[int] = []
+        for piece in self.pattern.findall(text):
+            tokens.extend(self._encode_piece(piece))
+        return tokens
+
+
+    def count(self, text: str) -> int:
+        """Number of tokens in text (memoized)"""
+        if not text:
+            return 0
+        return self._count(text)
+
+
+    def count_batch(self, texts: Iterable[Optional[str]]) -> List[int]:
+        """
+        Count tokens for many texts in one pass
+
+        Duplicate texts are tokenized once. None counts as an empty string,
+        so a pandas column with missing values can be passed directly.
+
+        Args:
+            texts: Texts to count
+
+        Returns:
+            Token counts in input order
+        """
+        texts = ["" if text is None else str(text) for text in texts]
+        counts = {text: self._count_uncached(text) if text else 0 for text in set(texts)}
+        return [counts[text] for text in texts]
+
+
+    def _count_uncached(self, text: str) -> int:
+        # map() over memoized callables keeps the hot loop in C
+        return sum(map(self._count_piece, self.pattern.findall(text)))
+
+
+    def _count_piece_uncached(self, piece: str) -> int:
+        return len(self._encode_piece(piece))
+
+
+    def _encode_piece_uncached(self, piece: str) -> tuple:
+        data = piece.encode("utf-8")
+        rank = self.ranks.get(data)
+        if rank is not None:
+            return (rank,)
+        return tuple(self.ranks[part] for part in self._merge(data))
+
+
+    def _merge(self, data: bytes) -> List[bytes]:
+        """Merge single bytes into the lowest-ranked pairs until no pair is in the vocab"""
+        parts = [data[i:i + 1] for i in range(len(data))]
+        ranks = self.ranks
+
+        while len(parts) > 1:
+            best_rank = None
+            best_idx = -1
+            for i in range(len(parts) - 1):
+                rank = ranks.get(parts[i] + parts[i + 1])
+                if rank is not None and (best_rank is None or rank < best_rank):
+                    best_rank = rank
+                    best_idx = i
+
+            if best_rank is None:
+                break
+
+            parts[best_idx:best_idx + 2] = [parts[best_idx] + parts[best_idx + 1]]
+
+        return parts
+
+
+_tokenizers: Dict[str, BPETokenizer] = {}
+_tokenizers_lock = threading.Lock()
+
+
+def get_tokenizer(encoding: str = DEFAULT_ENCODING) -> BPETokenizer:
+    """
+    Get the process-wide tokenizer for an encoding, loading its vocab on first use
+
+    Args:
+        encoding: Encoding name, e.g. cl100k_base
+
+    Returns:
+        BPETokenizer
+    """
+    with _tokenizers_lock:
+        tokenizer = _tokenizers.get(encoding)
+        if tokenizer is None:
+            if encoding not in ENCODING_PATTERNS:
+                raise ValueError(f"Unknown encoding: {encoding}")
+
+            path = os.path.join(VOCAB_DIR, f"{encoding}.tiktoken")
+            tokenizer = BPETokenizer(encoding, load_ranks(path), ENCODING_PATTERNS[encoding])
+            _tokenizers[encoding] = tokenizer
+            logger.info(f"Loaded {encoding} tokenizer ({len(tokenizer.ranks)} tokens)")
+
+    return tokenizer
+
+
+def encoding_for_model(model: Optional[str]) -> str:
+    """Encoding name for a model, falling back to the default encoding"""
+    if model:
+        for prefix, encoding in MODEL_PREFIX_TO_ENCODING.items():
+            if model.startswith(prefix):
+                return encoding
+    return DEFAULT_ENCODING
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Count tokens in text
+
+    Args:
+        text: Text to count tokens for
+        model: Model name used to pick the encoding
+
+    Returns:
+        Number of tokens
+    """
+    return get_tokenizer(encoding_for_model(model)).count(text)
+
+
+def count_tokens_batch(texts: Iterable[Optional[str]], model: Optional[str] = None) -> List[int]:
+    """
+    Count tokens for many texts (e.g. a dataset column) in one pass
+
+    Args:
+        texts: Texts to count
+        model: Model name used to pick the encoding
+
+    Returns:
+        Token counts in input order
+    """
+    return get_tokenizer(encoding_for_model(model)).count_batch(texts)
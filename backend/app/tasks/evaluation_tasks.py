@@ -5,23 +5,32 @@ Now supports parallel dual-model evaluation
 """
 
 import logging
-from celery import shared_task
-from typing import Dict, Any, List
+from celery import shared_task, group, chord
+from sqlalchemy import select, update, delete, func
+from typing import Dict, Any, List, Optional, Set, Tuple, AsyncIterator, Callable, Awaitable
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 import uuid
 from datetime import datetime
 
 from app.db.database import async_session
-from app.models.eval_cycle import EvalEntry, EvalCycle, EvalCycleSummary
+from app.models.eval_cycle import EvalCycle, EvalCycleShard
 from app.services.llm_service import LLMService
 from app.services.metrics_service import MetricsService
+from app.services.http_clients import http_client_pool
+from app.services.dataset_rows import DatasetRows
 from app.services.excel_service import ExcelService
+from app.services.circuit_breaker import circuit_events_since, last_circuit_event_seq
+from app.services.hedging import HedgePolicy
+from app.services.llm_errors import RetryBudget, use_retry_budget
+from app.services.eval_summary import METRIC_KEYS, SummaryAccumulator
+from app.services.result_writer import bulk_insert_entries, load_checkpoint, upsert_summary
+from app.services.pipeline import Pipeline, Stage
+from config import get_settings
 
 logger = logging.getLogger(__name__)
 
 
-@shared_task(bind=True, max_retries=3)
+@shared_task(bind=True, max_retries=3, acks_late=True, reject_on_worker_lost=True)
 def process_evaluation_job(
     self,
     job_id: str,
@@ -36,7 +45,8 @@ def process_evaluation_job(
     max_tokens: int = 2000,
     system_prompt: str = None,
     user_prompt_template: str = None,
-    expected_output_column: str = None
+    expected_output_column: str = None,
+    hedge_requests: bool = False
 ) -> Dict[str, Any]:
     """
     Process evaluation job with single or dual LLM models
@@ -55,6 +65,12 @@ def process_evaluation_job(
         system_prompt: System prompt for both models
         user_prompt_template: User prompt template with {variables}
         expected_output_column: Column name with expected output
+        hedge_requests: Send a duplicate request for calls running past the
+            model's rolling p95 (capped by LLM_HEDGE_MAX_EXTRA_PERCENT)
+        
+    Stored entries are the checkpoint: a retry, or a redelivery after a worker
+    crash (acks_late), skips the rows already completed, evaluates failed rows
+    again and rebuilds the summary totals from what is stored.
         
     Returns:
         Dict with job results and metrics
@@ -71,245 +87,65 @@ def process_evaluation_job(
                 if not eval_cycle:
                     raise ValueError(f"Evaluation cycle {job_id} not found")
                 
+                # Resume from the rows an earlier attempt already stored
+                done_rows, summary = await load_checkpoint(session, eval_cycle.id)
+                
                 # Update status to running
                 eval_cycle.status = "running"
-                eval_cycle.started_at = datetime.utcnow()
+                eval_cycle.started_at = eval_cycle.started_at or datetime.utcnow()
                 await session.commit()
                 
-                # Load dataset rows
+                # Dataset rows are read lazily, one chunk at a time
                 dataset_rows = await _load_dataset_rows(session, dataset_id)
-                total_rows = len(dataset_rows)
+                total_rows = dataset_rows.total_rows
                 
-                logger.info(f"Processing {total_rows} rows")
+                if done_rows:
+                    logger.info(f"Resuming evaluation job {job_id}: {len(done_rows)}/{total_rows} rows already completed")
+                logger.info(f"Processing {total_rows - len(done_rows)} rows")
                 
                 # Initialize services
-                llm_service_a = LLMService(provider=provider_a)
-                llm_service_b = LLMService(provider=provider_b) if model_b else None
-                metrics_service = MetricsService()
-                
-                processed_rows = 0
-                failed_rows = 0
+                evaluator = _RowEvaluator(
+                    job_id, model_a, model_b, provider_a, provider_b, temperature_a, temperature_b,
+                    max_tokens, system_prompt, user_prompt_template, expected_output_column, hedge_requests
+                )
+                circuit_seq = last_circuit_event_seq()
+                providers = {provider_a, provider_b} if model_b else {provider_a}
                 
-                # Track totals for summary
-                total_tokens_a = 0
-                total_cost_a = 0.0
-                total_tokens_b = 0
-                total_cost_b = 0.0
-                model_a_wins = 0
-                model_b_wins = 0
-                ties = 0
-                
-                metrics_a = {
-                    'accuracy': [], 'precision': [], 'recall': [],
-                    'f1_score': [], 'bleu_score': [], 'rouge_score': [], 'cosine_similarity': []
-                }
-                metrics_b = {
-                    'accuracy': [], 'precision': [], 'recall': [],
-                    'f1_score': [], 'bleu_score': [], 'rouge_score': [], 'cosine_similarity': []
-                }
+                async def on_batch():
+                    # Progress and circuit breaker opened/closed events show in cycle status right away
+                    progress = int((summary.rows / total_rows) * 100)
+                    eval_cycle.progress = progress
+                    eval_cycle.processed_rows = summary.rows - summary.failed_rows
+                    eval_cycle.failed_rows = summary.failed_rows
+                    circuit_events = circuit_events_since(circuit_seq, providers)
+                    if len(circuit_events) != len(eval_cycle.circuit_events or []):
+                        eval_cycle.circuit_events = circuit_events
+                    await session.commit()
+                    logger.info(f"Progress: {progress}% ({summary.rows}/{total_rows})")
                 
                 # Process each row
-                for row_idx, row_data in enumerate(dataset_rows, 1):
-                    try:
-                        logger.debug(f"Processing row {row_idx}/{total_rows}")
-                        
-                        # Render prompts with row data
-                        system_prompt_rendered = system_prompt or "You are a helpful assistant."
-                        user_prompt_rendered = user_prompt_template.format(**row_data) if user_prompt_template else str(row_data)
-                        expected_output = row_data.get(expected_output_column) if expected_output_column else None
-                        
-                        # Get response from Model A
-                        result_a = llm_service_a.evaluate(
-                            system_prompt=system_prompt_rendered,
-                            user_prompt=user_prompt_rendered,
-                            model=model_a,
-                            temperature=temperature_a,
-                            max_tokens=max_tokens
-                        )
-                        
-                        # Get response from Model B (if provided) - PARALLEL
-                        result_b = None
-                        if llm_service_b:
-                            result_b = llm_service_b.evaluate(
-                                system_prompt=system_prompt_rendered,
-                                user_prompt=user_prompt_rendered,
-                                model=model_b,
-                                temperature=temperature_b,
-                                max_tokens=max_tokens
-                            )
-                        
-                        # Calculate metrics
-                        if expected_output:
-                            metrics_a_result = metrics_service.calculate_metrics(
-                                expected_output, result_a['response']
-                            )
-                            
-                            if result_b:
-                                metrics_b_result = metrics_service.calculate_metrics(
-                                    expected_output, result_b['response']
-                                )
-                                
-                                # Determine winner based on accuracy
-                                accuracy_a = metrics_a_result.get('accuracy', 0)
-                                accuracy_b = metrics_b_result.get('accuracy', 0)
-                                
-                                if accuracy_a > accuracy_b:
-                                    winner = "model_a"
-                                    confidence = min(accuracy_a - accuracy_b, 1.0)
-                                    model_a_wins += 1
-                                elif accuracy_b > accuracy_a:
-                                    winner = "model_b"
-                                    confidence = min(accuracy_b - accuracy_a, 1.0)
-                                    model_b_wins += 1
-                                else:
-                                    winner = "tie"
-                                    confidence = 0.5
-                                    ties += 1
-                            else:
-                                metrics_b_result = {}
-                                winner = None
-                                confidence = None
-                        else:
-                            metrics_a_result = {}
-                            metrics_b_result = {}
-                            winner = None
-                            confidence = None
-                        
-                        # Create evaluation entry with dual outputs
-                        eval_entry = EvalEntry(
-                            id=uuid.uuid4(),
-                            eval_cycle_id=job_id,
-                            row_number=row_idx,
-                            input_data=row_data,
-                            system_prompt=system_prompt_rendered,
-                            user_prompt=user_prompt_rendered,
-                            expected_output=expected_output,
-                            
-                            # Model A
-                            output_a=result_a['response'],
-                            model_a=model_a,
-                            provider_a=provider_a,
-                            temperature_a=temperature_a,
-                            tokens_input_a=result_a['input_tokens'],
-                            tokens_output_a=result_a['output_tokens'],
-                            tokens_total_a=result_a['tokens_used'],
-                            cost_a=result_a['cost'],
-                            
-                            # Model B
-                            output_b=result_b['response'] if result_b else None,
-                            model_b=model_b,
-                            provider_b=provider_b,
-                            temperature_b=temperature_b,
-                            tokens_input_b=result_b['input_tokens'] if result_b else 0,
-                            tokens_output_b=result_b['output_tokens'] if result_b else 0,
-                            tokens_total_b=result_b['tokens_used'] if result_b else 0,
-                            cost_b=result_b['cost'] if result_b else 0.0,
-                            
-                            total_cost=(result_a['cost'] + (result_b['cost'] if result_b else 0.0)),
-                            
-                            # Metrics A
-                            accuracy_a=metrics_a_result.get('accuracy'),
-                            precision_a=metrics_a_result.get('precision'),
-                            recall_a=metrics_a_result.get('recall'),
-                            f1_score_a=metrics_a_result.get('f1_score'),
-                            bleu_score_a=metrics_a_result.get('bleu_score'),
-                            rouge_score_a=metrics_a_result.get('rouge_score'),
-                            cosine_similarity_a=metrics_a_result.get('cosine_similarity'),
-                            
-                            # Metrics B
-                            accuracy_b=metrics_b_result.get('accuracy'),
-                            precision_b=metrics_b_result.get('precision'),
-                            recall_b=metrics_b_result.get('recall'),
-                            f1_score_b=metrics_b_result.get('f1_score'),
-                            bleu_score_b=metrics_b_result.get('bleu_score'),
-                            rouge_score_b=metrics_b_result.get('rouge_score'),
-                            cosine_similarity_b=metrics_b_result.get('cosine_similarity'),
-                            
-                            # Comparison
-                            winner=winner,
-                            confidence=confidence,
-                            status="completed"
-                        )
-                        
-                        session.add(eval_entry)
-                        
-                        # Track metrics
-                        for key, value in metrics_a_result.items():
-                            if value is not None and key in metrics_a:
-                                metrics_a[key].append(value)
-                        
-                        if result_b:
-                            for key, value in metrics_b_result.items():
-                                if value is not None and key in metrics_b:
-                                    metrics_b[key].append(value)
-                        
-                        # Track tokens and costs
-                        total_tokens_a += result_a['tokens_used']
-                        total_cost_a += result_a['cost']
-                        if result_b:
-                            total_tokens_b += result_b['tokens_used']
-                            total_cost_b += result_b['cost']
-                        
-                        processed_rows += 1
-                        
-                        # Update progress every 10 rows
-                        if processed_rows % 10 == 0:
-                            progress = int((processed_rows / total_rows) * 100)
-                            eval_cycle.progress = progress
-                            eval_cycle.processed_rows = processed_rows
-                            await session.commit()
-                            logger.info(f"Progress: {progress}% ({processed_rows}/{total_rows})")
-                        
-                    except Exception as e:
-                        logger.error(f"Error processing row {row_idx}: {str(e)}")
-                        failed_rows += 1
-                        
-                        eval_entry = EvalEntry(
-                            id=uuid.uuid4(),
-                            eval_cycle_id=job_id,
-                            row_number=row_idx,
-                            input_data=row_data,
-                            status="failed",
-                            error_message=str(e)
-                        )
-                        session.add(eval_entry)
+                fatal_error, row_idx = await _evaluate_rows(
+                    session, evaluator, _skip_rows(dataset_rows.rows(), done_rows), summary, on_batch
+                )
+                processed_rows = summary.rows - summary.failed_rows
+                failed_rows = summary.failed_rows
                 
-                # Create summary
-                summary = EvalCycleSummary(
-                    id=uuid.uuid4(),
-                    eval_cycle_id=job_id,
-                    total_rows=total_rows,
-                    total_tokens=total_tokens_a + total_tokens_b,
-                    total_cost=total_cost_a + total_cost_b,
+                if fatal_error:
+                    eval_cycle.status = "failed"
+                    eval_cycle.error_message = f"Aborted at row {row_idx}: {str(fatal_error)}"
+                    eval_cycle.completed_at = datetime.utcnow()
+                    eval_cycle.processed_rows = processed_rows
+                    eval_cycle.failed_rows = failed_rows
+                    eval_cycle.circuit_events = circuit_events_since(circuit_seq, providers)
+                    await session.commit()
                     
-                    # Model A metrics
-                    accuracy_a=sum(metrics_a['accuracy']) / len(metrics_a['accuracy']) if metrics_a['accuracy'] else 0,
-                    precision_a=sum(metrics_a['precision']) / len(metrics_a['precision']) if metrics_a['precision'] else 0,
-                    recall_a=sum(metrics_a['recall']) / len(metrics_a['recall']) if metrics_a['recall'] else 0,
-                    f1_score_a=sum(metrics_a['f1_score']) / len(metrics_a['f1_score']) if metrics_a['f1_score'] else 0,
-                    avg_bleu_a=sum(metrics_a['bleu_score']) / len(metrics_a['bleu_score']) if metrics_a['bleu_score'] else 0,
-                    avg_rouge_a=sum(metrics_a['rouge_score']) / len(metrics_a['rouge_score']) if metrics_a['rouge_score'] else 0,
-                    avg_similarity_a=sum(metrics_a['cosine_similarity']) / len(metrics_a['cosine_similarity']) if metrics_a['cosine_similarity'] else 0,
-                    total_tokens_a=total_tokens_a,
-                    total_cost_a=total_cost_a,
-                    
-                    # Model B metrics
-                    accuracy_b=sum(metrics_b['accuracy']) / len(metrics_b['accuracy']) if metrics_b['accuracy'] else 0,
-                    precision_b=sum(metrics_b['precision']) / len(metrics_b['precision']) if metrics_b['precision'] else 0,
-                    recall_b=sum(metrics_b['recall']) / len(metrics_b['recall']) if metrics_b['recall'] else 0,
-                    f1_score_b=sum(metrics_b['f1_score']) / len(metrics_b['f1_score']) if metrics_b['f1_score'] else 0,
-                    avg_bleu_b=sum(metrics_b['bleu_score']) / len(metrics_b['bleu_score']) if metrics_b['bleu_score'] else 0,
-                    avg_rouge_b=sum(metrics_b['rouge_score']) / len(metrics_b['rouge_score']) if metrics_b['rouge_score'] else 0,
-                    avg_similarity_b=sum(metrics_b['cosine_similarity']) / len(metrics_b['cosine_similarity']) if metrics_b['cosine_similarity'] else 0,
-                    total_tokens_b=total_tokens_b,
-                    total_cost_b=total_cost_b,
-                    
-                    # Comparison
-                    model_a_wins=model_a_wins,
-                    model_b_wins=model_b_wins,
-                    ties=ties
-                )
-                session.add(summary)
+                    logger.error(f"Evaluation job {job_id} aborted: {str(fatal_error)}")
+                    return {"job_id": job_id, "status": "failed", "error": str(fatal_error)}
+                
+                # Create summary
+                summary.hedged_requests += evaluator.hedged_requests
+                summary_values = summary.summary_values(total_rows)
+                await upsert_summary(session, eval_cycle.id, summary_values)
                 
                 # Update final status
                 eval_cycle.status = "completed" if failed_rows == 0 else "partial"
@@ -327,16 +163,16 @@ def process_evaluation_job(
                     "status": eval_cycle.status,
                     "processed_rows": processed_rows,
                     "failed_rows": failed_rows,
-                    "total_cost": summary.total_cost,
-                    "total_tokens": summary.total_tokens,
-                    "model_a_accuracy": summary.accuracy_a,
-                    "model_b_accuracy": summary.accuracy_b,
-                    "model_a_wins": model_a_wins,
-                    "model_b_wins": model_b_wins
+                    "total_cost": summary_values["total_cost"],
+                    "total_tokens": summary_values["total_tokens"],
+                    "model_a_accuracy": summary_values["accuracy_a"],
+                    "model_b_accuracy": summary_values["accuracy_b"],
+                    "model_a_wins": summary.wins["model_a"],
+                    "model_b_wins": summary.wins["model_b"]
                 }
         
         # Run async evaluation
-        result = asyncio.run(_run_evaluation())
+        result = _run_async(_run_evaluation)
         return result
         
     except Exception as exc:
@@ -344,8 +180,644 @@ def process_evaluation_job(
         self.retry(exc=exc, countdown=60)
 
 
-async def _load_dataset_rows(session, dataset_id: str) -> List[Dict]:
-    """Load dataset rows from Excel file"""
-    # TODO: Implement based on your Excel service
-    return []
+@shared_task(bind=True, max_retries=3)
+def dispatch_sharded_evaluation(
+    self,
+    job_id: str,
+    dataset_id: str,
+    project_id: str,
+    model_a: str,
+    model_b: str = None,
+    provider_a: str = "openai",
+    provider_b: str = None,
+    temperature_a: float = 0.7,
+    temperature_b: float = 0.7,
+    max_tokens: int = 2000,
+    system_prompt: str = None,
+    user_prompt_template: str = None,
+    expected_output_column: str = None,
+    hedge_requests: bool = False,
+    shard_rows: int = None
+) -> Dict[str, Any]:
+    """
+    Split an evaluation cycle into row-range shards and run them as a chord
+    
+    Each shard (process_evaluation_shard) evaluates its rows on whichever worker
+    picks it up and stores its entries and a partial summary;
+    merge_evaluation_shards combines the partials into EvalCycleSummary once
+    all shards are done. Takes the same arguments as process_evaluation_job.
+    
+    Args:
+        shard_rows: Rows per shard (default EVAL_SHARD_ROWS)
+        
+    Returns:
+        Dict with the cycle ID, shard count and chord ID
+    """
+    
+    try:
+        shard_rows = shard_rows or get_settings().EVAL_SHARD_ROWS
+        
+        async def _plan_shards():
+            async with async_session() as session:
+                eval_cycle = await session.get(EvalCycle, job_id)
+                if not eval_cycle:
+                    raise ValueError(f"Evaluation cycle {job_id} not found")
+                
+                dataset_rows = await _load_dataset_rows(session, dataset_id)
+                total_rows = dataset_rows.total_rows
+                # Row numbers match the loader's: blank rows keep theirs, so ranges cover 1..total_rows
+                ranges = [
+                    (start_row, min(start_row + shard_rows - 1, total_rows))
+                    for start_row in range(1, total_rows + 1, shard_rows)
+                ]
+                
+                # Shards then seek to their range instead of parsing the sheet up to it;
+                # without the spill they still work, just slower
+                if len(ranges) > 1:
+                    try:
+                        await asyncio.to_thread(ExcelService.spill_rows, dataset_rows.file_path)
+                    except Exception as e:
+                        logger.warning(f"Could not spill rows of {dataset_rows.file_path}: {str(e)}")
+                
+                # Shard rows are created upfront so the merge can tell missing shards apart
+                await session.execute(delete(EvalCycleShard).where(EvalCycleShard.eval_cycle_id == eval_cycle.id))
+                for shard_index, (start_row, end_row) in enumerate(ranges):
+                    session.add(EvalCycleShard(
+                        id=uuid.uuid4(),
+                        eval_cycle_id=eval_cycle.id,
+                        shard_index=shard_index,
+                        start_row=start_row,
+                        end_row=end_row,
+                        status="pending"
+                    ))
+                
+                eval_cycle.status = "running"
+                eval_cycle.started_at = datetime.utcnow()
+                eval_cycle.total_rows = total_rows
+                eval_cycle.processed_rows = 0
+                eval_cycle.failed_rows = 0
+                eval_cycle.progress = 0
+                await session.commit()
+                return ranges
+        
+        ranges = asyncio.run(_plan_shards())
+        logger.info(f"Evaluation job {job_id}: {len(ranges)} shards of up to {shard_rows} rows")
+        
+        options = dict(
+            model_a=model_a, model_b=model_b, provider_a=provider_a, provider_b=provider_b,
+            temperature_a=temperature_a, temperature_b=temperature_b, max_tokens=max_tokens,
+            system_prompt=system_prompt, user_prompt_template=user_prompt_template,
+            expected_output_column=expected_output_column, hedge_requests=hedge_requests
+        )
+        shards = group(
+            process_evaluation_shard.s(job_id, dataset_id, shard_index, start_row, end_row, **options)
+            for shard_index, (start_row, end_row) in enumerate(ranges)
+        )
+        merge = merge_evaluation_shards.s(job_id).on_error(fail_sharded_evaluation.s(job_id))
+        result = chord(shards)(merge)
+        
+        return {"job_id": job_id, "shards": len(ranges), "chord_id": result.id}
+        
+    except Exception as exc:
+        logger.error(f"Dispatching sharded evaluation {job_id} failed: {str(exc)}")
+        self.retry(exc=exc, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3, acks_late=True, reject_on_worker_lost=True)
+def process_evaluation_shard(
+    self,
+    job_id: str,
+    dataset_id: str,
+    shard_index: int,
+    start_row: int,
+    end_row: int,
+    model_a: str,
+    model_b: str = None,
+    provider_a: str = "openai",
+    provider_b: str = None,
+    temperature_a: float = 0.7,
+    temperature_b: float = 0.7,
+    max_tokens: int = 2000,
+    system_prompt: str = None,
+    user_prompt_template: str = None,
+    expected_output_column: str = None,
+    hedge_requests: bool = False
+) -> Dict[str, Any]:
+    """
+    Evaluate one row range of a sharded cycle
+    
+    Entries are committed per pipeline batch together with the shard's counters
+    and an atomic increment of the cycle's progress (shards run concurrently). The
+    partial summary is stored on the EvalCycleShard row when the range is done.
+    A retried or redelivered shard resumes: rows its earlier attempt completed
+    are skipped and counted from the stored entries.
+    
+    Args:
+        job_id: Evaluation job ID
+        dataset_id: Dataset ID
+        shard_index: Index of the shard within the cycle
+        start_row: First row of the range (1-based)
+        end_row: Last row of the range, inclusive
+        (model and prompt arguments as in process_evaluation_job)
+        
+    Returns:
+        Dict with the shard's status and row counts
+    """
+    
+    try:
+        logger.info(f"Starting shard {shard_index} of evaluation job {job_id} (rows {start_row}-{end_row})")
+        
+        async def _run_shard():
+            async with async_session() as session:
+                shard = (await session.execute(
+                    select(EvalCycleShard).where(
+                        EvalCycleShard.eval_cycle_id == uuid.UUID(str(job_id)),
+                        EvalCycleShard.shard_index == shard_index
+                    )
+                )).scalar_one_or_none()
+                if shard is None:
+                    raise ValueError(f"Shard {shard_index} of evaluation cycle {job_id} not found")
+                
+                shard.status = "running"
+                done_rows, summary = await _resume_shard(session, shard)
+                
+                dataset_rows = await _load_dataset_rows(session, dataset_id)
+                evaluator = _RowEvaluator(
+                    job_id, model_a, model_b, provider_a, provider_b, temperature_a, temperature_b,
+                    max_tokens, system_prompt, user_prompt_template, expected_output_column, hedge_requests
+                )
+                
+                async def on_batch():
+                    await _commit_shard_progress(session, shard, summary)
+                
+                fatal_error, row_idx = await _evaluate_rows(
+                    session, evaluator, _skip_rows(dataset_rows.rows(start_row, end_row), done_rows), summary, on_batch
+                )
+                
+                summary.hedged_requests += evaluator.hedged_requests
+                shard.partial_summary = summary.to_dict()
+                if fatal_error:
+                    shard.status = "failed"
+                    shard.error_message = f"Aborted at row {row_idx}: {str(fatal_error)}"
+                    logger.error(f"Shard {shard_index} of evaluation job {job_id} aborted: {str(fatal_error)}")
+                else:
+                    shard.status = "completed"
+                await _commit_shard_progress(session, shard, summary)
+                
+                logger.info(f"Shard {shard_index} of evaluation job {job_id} {shard.status}. Rows: {summary.rows}, Failed: {summary.failed_rows}")
+                
+                return {
+                    "job_id": job_id,
+                    "shard_index": shard_index,
+                    "status": shard.status,
+                    "processed_rows": shard.processed_rows,
+                    "failed_rows": shard.failed_rows
+                }
+        
+        return _run_async(_run_shard)
+        
+    except Exception as exc:
+        logger.error(f"Shard {shard_index} of evaluation job {job_id} failed: {str(exc)}")
+        self.retry(exc=exc, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3)
+def merge_evaluation_shards(self, shard_results: List[Dict[str, Any]], job_id: str) -> Dict[str, Any]:
+    """
+    Chord callback: combine the shards' partial summaries into EvalCycleSummary
+    
+    Args:
+        shard_results: Return values of process_evaluation_shard
+        job_id: Evaluation job ID
+        
+    Returns:
+        Dict with job results and metrics (as process_evaluation_job)
+    """
+    
+    try:
+        async def _merge():
+            async with async_session() as session:
+                eval_cycle = await session.get(EvalCycle, job_id)
+                if not eval_cycle:
+                    raise ValueError(f"Evaluation cycle {job_id} not found")
+                
+                shards = (await session.execute(
+                    select(EvalCycleShard)
+                    .where(EvalCycleShard.eval_cycle_id == eval_cycle.id)
+                    .order_by(EvalCycleShard.shard_index)
+                )).scalars().all()
+                
+                summary = SummaryAccumulator()
+                for shard in shards:
+                    if shard.partial_summary:
+                        summary.merge(SummaryAccumulator.from_dict(shard.partial_summary))
+                
+                summary_values = summary.summary_values(eval_cycle.total_rows)
+                await upsert_summary(session, eval_cycle.id, summary_values)
+                
+                failed_shards = [shard for shard in shards if shard.status != "completed"]
+                if failed_shards:
+                    eval_cycle.status = "failed"
+                    eval_cycle.error_message = "; ".join(
+                        f"Shard {shard.shard_index}: {shard.error_message or shard.status}"
+                        for shard in failed_shards
+                    )
+                else:
+                    eval_cycle.status = "completed" if summary.failed_rows == 0 else "partial"
+                    eval_cycle.progress = 100
+                eval_cycle.completed_at = datetime.utcnow()
+                eval_cycle.processed_rows = summary.rows - summary.failed_rows
+                eval_cycle.failed_rows = summary.failed_rows
+                await session.commit()
+                
+                logger.info(f"Evaluation job {job_id} merged from {len(shards)} shards ({eval_cycle.status}). Processed: {eval_cycle.processed_rows}, Failed: {eval_cycle.failed_rows}")
+                
+                return {
+                    "job_id": job_id,
+                    "status": eval_cycle.status,
+                    "shards": len(shards),
+                    "processed_rows": eval_cycle.processed_rows,
+                    "failed_rows": eval_cycle.failed_rows,
+                    "total_cost": summary_values["total_cost"],
+                    "total_tokens": summary_values["total_tokens"],
+                    "model_a_accuracy": summary_values["accuracy_a"],
+                    "model_b_accuracy": summary_values["accuracy_b"],
+                    "model_a_wins": summary.wins["model_a"],
+                    "model_b_wins": summary.wins["model_b"]
+                }
+        
+        return asyncio.run(_merge())
+        
+    except Exception as exc:
+        logger.error(f"Merging shards of evaluation job {job_id} failed: {str(exc)}")
+        self.retry(exc=exc, countdown=60)
+
+
+@shared_task
+def fail_sharded_evaluation(request, exc, traceback, job_id: str) -> None:
+    """Chord error callback: a shard gave up after its retries, mark the cycle failed"""
+    logger.error(f"Sharded evaluation job {job_id} failed: {str(exc)}")
+    
+    async def _fail():
+        async with async_session() as session:
+            await session.execute(
+                update(EvalCycle).where(EvalCycle.id == uuid.UUID(str(job_id))).values(
+                    status="failed",
+                    error_message=f"Shard failed: {str(exc)}",
+                    completed_at=datetime.utcnow()
+                )
+            )
+            await session.commit()
+    
+    asyncio.run(_fail())
+
+
+def _run_async(run) -> Dict[str, Any]:
+    """Run a task's coroutine function in a fresh event loop"""
+    
+    async def _run_in_loop():
+        # Pooled connections belong to this job's event loop; release them when it ends
+        try:
+            # One retry budget for all provider calls of this cycle
+            with use_retry_budget(RetryBudget()):
+                return await run()
+        finally:
+            await http_client_pool.aclose()
+    
+    return asyncio.run(_run_in_loop())
+
+
+def _ms(value) -> int:
+    """Round an optional millisecond value for an Integer column"""
+    return int(round(value)) if value is not None else 0
+
 
+async def _load_dataset_rows(session, dataset_id: str) -> DatasetRows:
+    """Dataset rows of the cycle (row count known upfront, rows streamed in chunks)"""
+    return await DatasetRows.load(session, dataset_id)
+
+
+class _RowWork:
+    """A dataset row on its way through the evaluation pipeline"""
+    
+    def __init__(self, row_idx: int, row_data: Dict[str, Any]):
+        self.row_idx = row_idx
+        self.row_data = row_data
+        self.user_prompt = None
+        self.expected_output = None
+        self.result_a = None
+        self.result_b = None
+        self.metrics_a = {}
+        self.metrics_b = {}
+        self.error = None
+
+
+class _RowEvaluator:
+    """
+    Pipeline stages of one cycle's rows: render -> call -> score -> entry values
+    
+    Each stage records a row's error on the _RowWork instead of raising, and
+    later stages pass failed rows through untouched.
+    """
+    
+    def __init__(
+        self,
+        job_id: str,
+        model_a: str,
+        model_b: Optional[str],
+        provider_a: str,
+        provider_b: Optional[str],
+        temperature_a: float,
+        temperature_b: float,
+        max_tokens: int,
+        system_prompt: Optional[str],
+        user_prompt_template: Optional[str],
+        expected_output_column: Optional[str],
+        hedge_requests: bool
+    ):
+        self.job_id = uuid.UUID(str(job_id))
+        self.model_a = model_a
+        self.model_b = model_b
+        self.provider_a = provider_a
+        self.provider_b = provider_b
+        self.temperature_a = temperature_a
+        self.temperature_b = temperature_b
+        self.max_tokens = max_tokens
+        self.system_prompt = system_prompt or "You are a helpful assistant."
+        self.user_prompt_template = user_prompt_template
+        self.expected_output_column = expected_output_column
+        self.llm_service_a = LLMService(provider=provider_a)
+        self.llm_service_b = LLMService(provider=provider_b) if model_b else None
+        self.metrics_service = MetricsService()
+        self.hedge_policy = HedgePolicy() if hedge_requests else None
+
+
+    @property
+    def hedged_requests(self) -> int:
+        return self.hedge_policy.hedges if self.hedge_policy else 0
+
+
+    def render(self, row: Tuple[int, Dict[str, Any]]) -> _RowWork:
+        """Render the user prompt with the row data"""
+        work = _RowWork(*row)
+        try:
+            work.user_prompt = self.user_prompt_template.format(**work.row_data) if self.user_prompt_template else str(work.row_data)
+            work.expected_output = work.row_data.get(self.expected_output_column) if self.expected_output_column else None
+        except Exception as e:
+            work.error = e
+        return work
+
+
+    async def call(self, work: _RowWork) -> _RowWork:
+        """Get responses from Model A and Model B (if provided) in parallel"""
+        if work.error:
+            return work
+        
+        call_a = self.llm_service_a.aevaluate(
+            system_prompt=self.system_prompt,
+            user_prompt=work.user_prompt,
+            model=self.model_a,
+            temperature=self.temperature_a,
+            max_tokens=self.max_tokens,
+            hedge_policy=self.hedge_policy
+        )
+        try:
+            if self.llm_service_b:
+                work.result_a, work.result_b = await asyncio.gather(
+                    call_a,
+                    self.llm_service_b.aevaluate(
+                        system_prompt=self.system_prompt,
+                        user_prompt=work.user_prompt,
+                        model=self.model_b,
+                        temperature=self.temperature_b,
+                        max_tokens=self.max_tokens,
+                        hedge_policy=self.hedge_policy
+                    ),
+                )
+            else:
+                work.result_a = await call_a
+        except Exception as e:
+            work.error = e
+        return work
+
+
+    def score(self, work: _RowWork) -> _RowWork:
+        """Calculate metrics against the expected output (CPU-bound, runs in a worker thread)"""
+        if work.error or not work.expected_output:
+            return work
+        try:
+            work.metrics_a = self.metrics_service.calculate_metrics(work.expected_output, work.result_a['response'])
+            if work.result_b:
+                work.metrics_b = self.metrics_service.calculate_metrics(work.expected_output, work.result_b['response'])
+        except Exception as e:
+            work.error = e
+        return work
+
+
+    def entry_values(self, work: _RowWork) -> Dict[str, Any]:
+        """EvalEntry column values of a row that went through the pipeline"""
+        if work.error:
+            return self.failed_entry(work.row_idx, work.row_data, work.error)
+        
+        result_a, result_b = work.result_a, work.result_b
+        
+        # Determine winner based on accuracy
+        winner = None
+        confidence = None
+        if work.expected_output and result_b:
+            accuracy_a = work.metrics_a.get('accuracy', 0)
+            accuracy_b = work.metrics_b.get('accuracy', 0)
+            
+            if accuracy_a > accuracy_b:
+                winner = "model_a"
+                confidence = min(accuracy_a - accuracy_b, 1.0)
+            elif accuracy_b > accuracy_a:
+                winner = "model_b"
+                confidence = min(accuracy_b - accuracy_a, 1.0)
+            else:
+                winner = "tie"
+                confidence = 0.5
+        
+        values = {
+            "id": uuid.uuid4(),
+            "eval_cycle_id": self.job_id,
+            "row_number": work.row_idx,
+            "input_data": work.row_data,
+            "system_prompt": self.system_prompt,
+            "user_prompt": work.user_prompt,
+            "expected_output": work.expected_output,
+            
+            # Model A
+            "output_a": result_a['response'],
+            "model_a": self.model_a,
+            "provider_a": self.provider_a,
+            "temperature_a": self.temperature_a,
+            "tokens_input_a": result_a['input_tokens'],
+            "tokens_output_a": result_a['output_tokens'],
+            "tokens_total_a": result_a['tokens_used'],
+            "cost_a": result_a['cost'],
+            
+            # Model B
+            "output_b": result_b['response'] if result_b else None,
+            "model_b": self.model_b,
+            "provider_b": self.provider_b,
+            "temperature_b": self.temperature_b,
+            "tokens_input_b": result_b['input_tokens'] if result_b else 0,
+            "tokens_output_b": result_b['output_tokens'] if result_b else 0,
+            "tokens_total_b": result_b['tokens_used'] if result_b else 0,
+            "cost_b": result_b['cost'] if result_b else 0.0,
+            
+            "total_cost": (result_a['cost'] + (result_b['cost'] if result_b else 0.0)),
+            
+            # Latency (cache hits have none)
+            "latency_ms_a": _ms(result_a.get('latency_ms')),
+            "latency_ms_b": _ms(result_b.get('latency_ms')) if result_b else 0,
+            "connect_ms_a": _ms(result_a.get('connect_ms')),
+            "connect_ms_b": _ms(result_b.get('connect_ms')) if result_b else 0,
+            "ttfb_ms_a": _ms(result_a.get('ttfb_ms')),
+            "ttfb_ms_b": _ms(result_b.get('ttfb_ms')) if result_b else 0,
+            
+            # Response cache
+            # cached is None when the cache was not consulted (disabled, sampled call)
+            "cache_hits": sum(1 for r in (result_a, result_b) if r and r.get('cached') is True),
+            "cache_misses": sum(1 for r in (result_a, result_b) if r and r.get('cached') is False),
+            
+            # Comparison
+            "winner": winner,
+            "confidence": confidence,
+            "status": "completed"
+        }
+        for key in METRIC_KEYS:
+            values[f"{key}_a"] = work.metrics_a.get(key)
+            values[f"{key}_b"] = work.metrics_b.get(key)
+        return values
+
+
+    def failed_entry(self, row_idx: int, row_data: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+        """EvalEntry column values for a row that could not be evaluated"""
+        return {
+            "id": uuid.uuid4(),
+            "eval_cycle_id": self.job_id,
+            "row_number": row_idx,
+            "input_data": row_data,
+            "system_prompt": self.system_prompt,
+            "user_prompt": self.user_prompt_template or str(row_data),
+            "model_a": self.model_a,
+            "model_b": self.model_b,
+            "status": "failed",
+            "error_message": str(error)
+        }
+
+
+async def _evaluate_rows(
+    session,
+    evaluator: _RowEvaluator,
+    rows: AsyncIterator[Tuple[int, Dict[str, Any]]],
+    summary: SummaryAccumulator,
+    on_batch: Callable[[], Awaitable[None]]
+) -> Tuple[Optional[Exception], Optional[int]]:
+    """
+    Evaluate rows through the staged pipeline, inserting their entries and counting them into summary
+    
+    Rows are rendered, sent to the providers (EVAL_PIPELINE_CALL_CONCURRENCY rows
+    in flight), scored in worker threads and persisted in batches, with bounded
+    queues in between, so provider calls never wait on formatting, scoring or commits.
+    
+    Args:
+        session: Session the entries are inserted in (committed by on_batch / the caller)
+        evaluator: Row stages of the cycle
+        rows: (row_number, row) pairs
+        summary: Accumulator the entries are counted into
+        on_batch: Awaited after each persisted batch
+        
+    Returns:
+        (error that aborts the cycle or None, row number it happened at)
+    """
+    settings = get_settings()
+    fatal = []
+    
+    async def call(work: _RowWork) -> _RowWork:
+        work = await evaluator.call(work)
+        # Invalid API key etc.: every remaining row would fail the same way, stop calling
+        if getattr(work.error, "aborts_cycle", False) and not fatal:
+            fatal.append(work)
+            pipeline.stop()
+        return work
+    
+    async def persist(batch: List[_RowWork]):
+        await insert_entries(batch)
+        await on_batch()
+    
+    async def insert_entries(batch: List[_RowWork]):
+        # Column values straight into one COPY / multi-row INSERT, no ORM objects
+        entries = []
+        for work in batch:
+            if work.error:
+                logger.error(f"Error processing row {work.row_idx}: {str(work.error)}")
+            entries.append(evaluator.entry_values(work))
+        inserted = set(await bulk_insert_entries(session, entries))
+        # A row stored by a concurrent (redelivered) attempt is not counted twice
+        for values in entries:
+            if values["row_number"] in inserted:
+                summary.add_entry(values)
+    
+    pipeline = Pipeline(
+        [
+            Stage("render", evaluator.render),
+            Stage("call", call, concurrency=settings.EVAL_PIPELINE_CALL_CONCURRENCY),
+            Stage("score", evaluator.score, concurrency=settings.EVAL_PIPELINE_SCORE_WORKERS, threaded=True),
+        ],
+        sink=persist,
+    )
+    await pipeline.run(rows)
+    
+    if not fatal:
+        return None, None
+    # Rows still in flight when the cycle aborted are dropped; the aborting row is recorded
+    await insert_entries(fatal[0:1])
+    return fatal[0].error, fatal[0].row_idx
+
+
+async def _skip_rows(
+    rows: AsyncIterator[Tuple[int, Dict[str, Any]]],
+    done_rows: Set[int]
+) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """Rows not completed by an earlier attempt"""
+    async for row_idx, row_data in rows:
+        if row_idx not in done_rows:
+            yield row_idx, row_data
+
+
+async def _resume_shard(session, shard: EvalCycleShard) -> Tuple[Set[int], SummaryAccumulator]:
+    """
+    Checkpoint of a shard's range, with the cycle's counters corrected to it
+    
+    Failed entries of an earlier attempt are removed (those rows run again) and
+    entries stored after its last counted batch are counted.
+    """
+    done_rows, summary = await load_checkpoint(session, shard.eval_cycle_id, shard.start_row, shard.end_row)
+    shard.partial_summary = None
+    shard.error_message = None
+    await _commit_shard_progress(session, shard, summary)
+    if done_rows:
+        logger.info(f"Resuming shard {shard.shard_index} of evaluation job {shard.eval_cycle_id}: {len(done_rows)} rows already completed")
+    return done_rows, summary
+
+
+async def _commit_shard_progress(session, shard: EvalCycleShard, summary: SummaryAccumulator) -> None:
+    """Commit pending entries with the shard's counters and the cycle's share of them"""
+    processed_delta = summary.rows - summary.failed_rows - shard.processed_rows
+    failed_delta = summary.failed_rows - shard.failed_rows
+    shard.processed_rows += processed_delta
+    shard.failed_rows += failed_delta
+    
+    # Other shards update the same cycle row concurrently: increment, don't overwrite
+    done = EvalCycle.processed_rows + EvalCycle.failed_rows + processed_delta + failed_delta
+    await session.execute(
+        update(EvalCycle).where(EvalCycle.id == shard.eval_cycle_id).values(
+            processed_rows=EvalCycle.processed_rows + processed_delta,
+            failed_rows=EvalCycle.failed_rows + failed_delta,
+            progress=func.coalesce(func.least(100, done * 100 // func.nullif(EvalCycle.total_rows, 0)), 0)
+        )
+    )
+    await session.commit()
@@ -0,0 +1,377 @@
+"""
+Fake LLM Provider Server
+OpenAI- and Anthropic-compatible HTTP server for load and benchmark testing:
+- POST /v1/chat/completions (OpenAI / DeepSeek, including stream=True SSE)
+- POST /v1/messages (Anthropic)
+- GET /stats for request / error / 429 counters
+- Deterministic responses (same model and prompt -> same text and token counts)
+- Configurable latency distribution, stragglers, 5xx error rate and 429 injection
+- Runs in-process (FakeLLMServer, a uvicorn thread) or standalone:
+
+    python -m app.utils.fake_llm_server --port 8900 --latency-ms 300 --rate-limit-rate 0.02
+
+Point the services at it with
+LLM_BASE_URL_OVERRIDES='{"openai": "http://127.0.0.1:8900/v1", "deepseek": "http://127.0.0.1:8900/v1", "anthropic": "http://127.0.0.1:8900"}'
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+from app.services import tokenizer
+
+logger = logging.getLogger(__name__)
+
+# Vocabulary for generated responses
+_WORDS = (
+    "the model answer is based on data and the result shows that this value can be used for each case "
+    "with more time in our system we find new ways to make good use of all the information from your question"
+).split()
+
+# Approximate chat-format overhead per message, as added by the real APIs
+_TOKENS_PER_MESSAGE = 4
+
+
+class FakeLLMConfig(BaseModel):
+    """Behaviour of the fake provider (all rates are 0-1 fractions of requests)"""
+    # Latency before the response (or the first streamed token)
+    latency_ms: float = 200.0
+    latency_distribution: str = "lognormal"  # fixed, uniform, lognormal
+    latency_sigma: float = 0.5  # lognormal shape; uniform spread as a fraction of latency_ms
+    # Slow tail: this fraction of requests takes straggler_ms instead
+    straggler_rate: float = 0.0
+    straggler_ms: float = 30000.0
+    # Failure injection
+    error_rate: float = 0.0  # HTTP 500
+    rate_limit_rate: float = 0.0  # HTTP 429 with Retry-After
+    retry_after_ms: int = 1000
+    # Response size in tokens (capped by the request's max_tokens)
+    output_tokens: int = 50
+    # Delay between streamed chunks
+    stream_chunk_ms: float = 5.0
+    # When set, requests with another key get 401
+    api_key: Optional[str] = None
+    # Seed for latency and failure sampling
+    seed: int = 0
+
+
+class FakeLLMState:
+    """Sampling and counters shared by the routes"""
+
+    def __init__(self, config: FakeLLMConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0, "unauthorized": 0}
+        self._lock = threading.Lock()
+
+
+    def sample(self) -> Tuple[str, float]:
+        """
+        Decide the outcome of one request
+
+        Returns:
+            Tuple of (outcome: ok / error / rate_limited, latency in seconds)
+        """
+        config = self.config
+        with self._lock:
+            self.stats["requests"] += 1
+            roll = self.random.random()
+            if roll < config.rate_limit_rate:
+                self.stats["rate_limited"] += 1
+                return "rate_limited", 0.0
+
+            latency_ms = self._sample_latency_ms()
+            if roll < config.rate_limit_rate + config.error_rate:
+                self.stats["errors"] += 1
+                return "error", latency_ms / 1000
+
+            self.stats["ok"] += 1
+            return "ok", latency_ms / 1000
+
+
+    def _sample_latency_ms(self) -> float:
+        # Called with the lock held
+        config = self.config
+        if config.straggler_rate and self.random.random() < config.straggler_rate:
+            return config.straggler_ms
+        if config.latency_distribution == "fixed":
+            return config.latency_ms
+        if config.latency_distribution == "uniform":
+            spread = config.latency_ms * config.latency_sigma
+            return max(0.0, self.random.uniform(config.latency_ms - spread, config.latency_ms + spread))
+        # lognormal with median latency_ms
+        return config.latency_ms * self.random.lognormvariate(0.0, config.latency_sigma)
+
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+            self.stats["requests"] += 1
+
+
+def generate_text(model: str, messages: List[Dict[str, Any]], max_tokens: int, output_tokens: int) -> str:
+    """Deterministic response for (model, messages)"""
+    digest = hashlib.sha256(json.dumps([model, messages], sort_keys=True).encode()).digest()
+    seeded = random.Random(digest)
+    length = max(1, min(output_tokens, max_tokens or output_tokens))
+    return "".join(" " + seeded.choice(_WORDS) for _ in range(length)).lstrip()
+
+
+def count_prompt_tokens(messages: List[Dict[str, Any]], model: str) -> int:
+    texts = [message.get("content") if isinstance(message.get("content"), str) else json.dumps(message.get("content"))
+             for message in messages]
+    return sum(tokenizer.count_tokens_batch(texts, model)) + _TOKENS_PER_MESSAGE * len(messages)
+
+
+def create_app(config: Optional[FakeLLMConfig] = None) -> FastAPI:
+    """
+    Build the fake provider ASGI app
+
+    Args:
+        config: Behaviour settings (defaults if omitted)
+    """
+    state = FakeLLMState(config or FakeLLMConfig())
+    app = FastAPI(title="Fake LLM Provider")
+    app.state.fake = state
+
+    def _authorized(key: Optional[str]) -> bool:
+        return state.config.api_key is None or key == state.config.api_key
+
+    def _openai_error(status: int, message: str, error_type: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+        return JSONResponse(
+            {"error": {"message": message, "type": error_type, "code": error_type}},
+            status_code=status,
+            headers=headers,
+        )
+
+    def _anthropic_error(status: int, message: str, error_type: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+        return JSONResponse(
+            {"type": "error", "error": {"type": error_type, "message": message}},
+            status_code=status,
+            headers=headers,
+        )
+
+    def _retry_after_headers() -> Dict[str, str]:
+        retry_after_ms = state.config.retry_after_ms
+        return {"retry-after-ms": str(retry_after_ms), "retry-after": str(max(1, round(retry_after_ms / 1000)))}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        """OpenAI / DeepSeek chat completions"""
+        authorization = request.headers.get("authorization", "")
+        if not _authorized(authorization.removeprefix("Bearer ").strip()):
+            state.count("unauthorized")
+            return _openai_error(401, "Incorrect API key provided", "invalid_api_key")
+
+        body = await request.json()
+        outcome, latency = state.sample()
+        if outcome == "rate_limited":
+            return _openai_error(429, "Rate limit reached", "rate_limit_exceeded", _retry_after_headers())
+        await asyncio.sleep(latency)
+        if outcome == "error":
+            return _openai_error(500, "The server had an error while processing your request", "server_error")
+
+        model = body.get("model", "")
+        messages = body.get("messages", [])
+        text = generate_text(model, messages, body.get("max_tokens"), state.config.output_tokens)
+        usage = {
+            "prompt_tokens": count_prompt_tokens(messages, model),
+            "completion_tokens": tokenizer.count_tokens(text, model),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        if body.get("stream"):
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            return StreamingResponse(
+                _stream_chunks(completion_id, created, model, text, usage if include_usage else None),
+                media_type="text/event-stream",
+            )
+
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        }
+
+    async def _stream_chunks(
+        completion_id: str,
+        created: int,
+        model: str,
+        text: str,
+        usage: Optional[Dict[str, int]]
+    ) -> AsyncGenerator[str, None]:
+        def _chunk(delta: Dict[str, str], finish_reason: Optional[str] = None) -> str:
+            return "data: " + json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }) + "\n\n"
+
+        yield _chunk({"role": "assistant", "content": ""})
+        words = text.split(" ")
+        for index, word in enumerate(words):
+            yield _chunk({"content": word if index == 0 else " " + word})
+            if state.config.stream_chunk_ms:
+                await asyncio.sleep(state.config.stream_chunk_ms / 1000)
+        yield _chunk({}, "stop")
+        if usage is not None:
+            yield "data: " + json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [],
+                "usage": usage,
+            }) + "\n\n"
+        yield "data: [DONE]\n\n"
+
+    @app.post("/v1/messages")
+    async def messages(request: Request):
+        """Anthropic messages"""
+        if not _authorized(request.headers.get("x-api-key")):
+            state.count("unauthorized")
+            return _anthropic_error(401, "invalid x-api-key", "authentication_error")
+
+        body = await request.json()
+        outcome, latency = state.sample()
+        if outcome == "rate_limited":
+            return _anthropic_error(429, "Rate limit reached", "rate_limit_error", _retry_after_headers())
+        await asyncio.sleep(latency)
+        if outcome == "error":
+            return _anthropic_error(500, "Internal server error", "api_error")
+
+        model = body.get("model", "")
+        chat = body.get("messages", [])
+        if body.get("system"):
+            chat = [{"role": "system", "content": body["system"]}] + chat
+        text = generate_text(model, chat, body.get("max_tokens"), state.config.output_tokens)
+
+        return {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {
+                "input_tokens": count_prompt_tokens(chat, model),
+                "output_tokens": tokenizer.count_tokens(text, model),
+            },
+        }
+
+    @app.get("/stats")
+    async def stats():
+        """Request counters since start"""
+        return dict(state.stats)
+
+    return app
+
+
+class FakeLLMServer:
+    """
+    Fake provider served by uvicorn in a background thread
+
+    Usage:
+        with FakeLLMServer(FakeLLMConfig(latency_ms=50)) as server:
+            settings.LLM_BASE_URL_OVERRIDES = server.base_url_overrides()
+    """
+
+    def __init__(self, config: Optional[FakeLLMConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.app = create_app(config)
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host=host, port=port, log_level="warning"))
+        self._thread: Optional[threading.Thread] = None
+        self.host = host
+        self.port = port
+
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return dict(self.app.state.fake.stats)
+
+
+    def base_url_overrides(self) -> Dict[str, str]:
+        """Value for LLM_BASE_URL_OVERRIDES routing every provider here"""
+        return {
+            "openai": f"{self.base_url}/v1",
+            "deepseek": f"{self.base_url}/v1",
+            "anthropic": self.base_url,
+        }
+
+
+    def start(self, timeout: float = 10.0) -> "FakeLLMServer":
+        """Start serving and wait until the socket is bound (port 0 picks a free port)"""
+        self._thread = threading.Thread(target=self._server.run, name="fake-llm-server", daemon=True)
+        self._thread.start()
+
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise Exception("Fake LLM server failed to start")
+            time.sleep(0.01)
+
+        self.port = self._server.servers[0].sockets[0].getsockname()[1]
+        logger.info(f"Fake LLM server listening on {self.base_url}")
+        return self
+
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        if self._thread:
+            self._thread.join(timeout=10)
+
+
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake OpenAI/Anthropic-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    for name, field in FakeLLMConfig.model_fields.items():
+        field_type = field.annotation if field.annotation in (int, float, str) else str
+        parser.add_argument(f"--{name.replace('_', '-')}", type=field_type, default=field.default)
+    args = vars(parser.parse_args())
+
+    host, port = args.pop("host"), args.pop("port")
+    config = FakeLLMConfig(**args)
+    logger.info(f"Fake LLM server config: {config.model_dump()}")
+    uvicorn.run(create_app(config), host=host, port=port, log_level="info")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
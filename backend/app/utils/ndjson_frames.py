@@ -0,0 +1,106 @@
+"""
+NDJSON Frames
+Encoding of the evaluation result stream:
+- orjson when installed (several times faster than json.dumps), stdlib json otherwise
+- Frame batching: events finished within a time window / byte budget go out as one chunk
+- Optional gzip with a sync flush per frame, so every frame is decodable on arrival
+- Compact mode: drops fields the client sent itself (question, expected answer,
+  model names) and empty values
+"""
+
+import json
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+# Fields of a row result the client already has
+_COMPACT_RESULT_FIELDS = {"question", "expected_answer"}
+_COMPACT_EVENT_FIELDS = {"model_name"}
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize one event to compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def compact_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of an event without the fields the client already has"""
+    compacted = {
+        key: value for key, value in event.items()
+        if key not in _COMPACT_EVENT_FIELDS and value is not None
+    }
+    result = event.get("result")
+    if isinstance(result, dict):
+        compacted["result"] = {
+            key: value for key, value in result.items()
+            if key not in _COMPACT_RESULT_FIELDS and value is not None
+        }
+    return compacted
+
+
+class FrameEncoder:
+    """
+    Buffers encoded events and hands them out as frames
+
+    With window_ms=0 every event is its own frame (no batching).
+    """
+
+    def __init__(self, window_ms: int = 0, max_bytes: int = 65536, gzip: bool = False, compact: bool = False):
+        self.window = window_ms / 1000
+        self.max_bytes = max_bytes
+        self.compact = compact
+        # wbits 16+: gzip container
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if gzip else None
+        self._buffer: List[bytes] = []
+        self._size = 0
+        self._first_at: Optional[float] = None
+
+
+    def add(self, event: Dict[str, Any]) -> Optional[bytes]:
+        """
+        Buffer an event
+
+        Returns:
+            A frame when the window or byte budget is used up, else None
+        """
+        line = dumps(compact_event(event) if self.compact else event) + b"\n"
+        self._buffer.append(line)
+        self._size += len(line)
+        if self._first_at is None:
+            self._first_at = time.monotonic()
+        if self._size >= self.max_bytes or self.time_to_flush() == 0:
+            return self.flush()
+        return None
+
+
+    def time_to_flush(self) -> Optional[float]:
+        """Seconds until buffered events are due (None when nothing is buffered)"""
+        if self._first_at is None:
+            return None
+        return max(0.0, self._first_at + self.window - time.monotonic())
+
+
+    def flush(self) -> bytes:
+        """Frame of everything buffered (gzip sync-flushed), b"" if empty"""
+        data = b"".join(self._buffer)
+        self._buffer.clear()
+        self._size = 0
+        self._first_at = None
+        if self._compressor is None or not data:
+            return data
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+    def close(self) -> bytes:
+        """Last frame: buffered events and, with gzip, the stream trailer"""
+        data = self.flush()
+        if self._compressor is not None:
+            data += self._compressor.flush(zlib.Z_FINISH)
+        return data
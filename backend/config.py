@@ -37,6 +37,103 @@ class Settings(BaseSettings):
         "http://127.0.0.1:5173",
     ]
 
+    # Outbound LLM HTTP connection pool
+    LLM_HTTP2: bool = True
+    LLM_MAX_CONNECTIONS: int = 100
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_KEEPALIVE_EXPIRY: float = 30.0
+    LLM_REQUEST_TIMEOUT: float = 60.0
+    # Per-provider overrides, e.g. {"deepseek": {"max_connections": 50, "http2": false}}
+    LLM_POOL_OVERRIDES: dict = {}
+    # Per-provider API base URL, e.g. {"openai": "http://127.0.0.1:8900/v1"} to target
+    # the fake provider server (python -m app.utils.fake_llm_server)
+    LLM_BASE_URL_OVERRIDES: dict = {}
+    # Provider traffic cassettes: "record" appends every provider request/response (with timing)
+    # to LLM_CASSETTE_PATH, "replay" serves them back offline with latencies x LATENCY_SCALE
+    LLM_CASSETTE_MODE: str = "off"  # off, record, replay
+    LLM_CASSETTE_PATH: str = "./cassettes/llm_traffic.jsonl.gz"
+    LLM_CASSETTE_LATENCY_SCALE: float = 1.0
+
+    # LLM response cache (tiers: memory, disk, redis)
+    LLM_CACHE_ENABLED: bool = True
+    # Calls sampled above this temperature always go to the provider
+    LLM_CACHE_MAX_TEMPERATURE: float = 0.0
+    LLM_CACHE_TIERS: str = "memory,redis"
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    LLM_CACHE_MEMORY_MAX_ENTRIES: int = 10_000
+    LLM_CACHE_SHARED_MAX_ENTRIES: int = 500_000
+    LLM_CACHE_DISK_PATH: str = "llm_cache.sqlite3"
+    LLM_CACHE_REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+    # Client-side rate limiting per (provider, model)
+    LLM_RATE_LIMIT_ENABLED: bool = True
+    LLM_DEFAULT_RPM: int = 500
+    LLM_DEFAULT_TPM: int = 200_000
+    # Initial limits, e.g. {"openai:gpt-4": {"rpm": 500, "tpm": 30000}}; refined from response headers
+    LLM_RATE_LIMITS: dict = {}
+
+    # Latency tracking and hedged requests (a duplicate request once a call passes the rolling percentile)
+    LLM_LATENCY_WINDOW_SIZE: int = 200
+    LLM_HEDGE_PERCENTILE: float = 95.0
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    # Max duplicate requests as a percentage of calls
+    LLM_HEDGE_MAX_EXTRA_PERCENT: float = 5.0
+
+    # Retries of retriable provider errors: full-jitter backoff, and at most
+    # RETRY_BUDGET_MIN + RETRY_BUDGET_RATIO * calls retries per evaluation cycle
+    LLM_RETRY_BASE_SECONDS: float = 1.0
+    LLM_RETRY_MAX_BACKOFF_SECONDS: float = 20.0
+    LLM_RETRY_BUDGET_RATIO: float = 0.2
+    LLM_RETRY_BUDGET_MIN: int = 10
+
+    # Circuit breaker per (provider, base URL): opens when FAILURE_RATE of the last
+    # WINDOW_SIZE calls failed (after MIN_CALLS), probes again after OPEN_SECONDS
+    LLM_CIRCUIT_BREAKER_ENABLED: bool = True
+    LLM_CIRCUIT_FAILURE_RATE: float = 0.5
+    LLM_CIRCUIT_WINDOW_SIZE: int = 20
+    LLM_CIRCUIT_MIN_CALLS: int = 5
+    LLM_CIRCUIT_OPEN_SECONDS: float = 30.0
+    LLM_CIRCUIT_HALF_OPEN_PROBES: int = 2
+
+    # Evaluation run sizing (rows in flight at once) and pre-flight estimate assumptions
+    EVAL_CONCURRENCY: int = 8
+    ESTIMATE_MIN_OUTPUT_TOKENS: int = 50
+    ESTIMATE_OUTPUT_TOKENS_PER_SECOND: float = 50.0
+    ESTIMATE_REQUEST_OVERHEAD_SECONDS: float = 0.5
+    # Dataset rows read (and held in worker memory) at a time
+    DATASET_CHUNK_ROWS: int = 500
+    # Rows per shard of a sharded cycle (one shard must finish well inside task_time_limit)
+    EVAL_SHARD_ROWS: int = 200
+    # Evaluation task pipeline (render -> provider calls -> scoring -> persist)
+    EVAL_PIPELINE_CALL_CONCURRENCY: int = 8  # Rows with provider calls in flight
+    EVAL_PIPELINE_SCORE_WORKERS: int = 2  # Threads computing metrics
+    EVAL_PIPELINE_QUEUE_SIZE: int = 32  # Rows buffered between two stages
+    EVAL_PIPELINE_PERSIST_ROWS: int = 1000  # Entries bulk-inserted and committed per batch...
+    EVAL_PIPELINE_PERSIST_MS: int = 2000  # ...or after this long
+    # Bulk-insert EvalEntry rows with COPY on Postgres (off: multi-row INSERT)
+    EVAL_ENTRY_COPY: bool = True
+
+    # Streamed run state for resuming /evaluate/rows ("memory" = per API worker, "redis" = shared)
+    EVAL_RUN_STORE: str = "memory"
+    EVAL_RUN_REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    EVAL_RUN_TTL_SECONDS: int = 86400
+    EVAL_RUN_MEMORY_MAX_RUNS: int = 200
+    # Memory store: row events kept in full per run; later rows keep a compact record (replayed without results)
+    EVAL_RUN_MEMORY_MAX_REPLAY_EVENTS: int = 1000
+    # A streaming run holds a lease (renewed while it streams); resuming a leased run is refused
+    EVAL_RUN_LEASE_SECONDS: int = 30
+    # How often a streaming run checks whether its client is still connected
+    EVAL_DISCONNECT_POLL_SECONDS: float = 0.5
+
+    # Write-behind persistence of streamed results (runs with an eval_cycle_id):
+    # queued entries are bulk-inserted every FLUSH_ROWS rows or FLUSH_MS
+    RESULT_WRITER_FLUSH_ROWS: int = 200
+    RESULT_WRITER_FLUSH_MS: int = 1000
+    # Failed flushes stay queued and are retried with exponential backoff up to this delay...
+    RESULT_WRITER_MAX_BACKOFF_MS: int = 30000
+    # ...and this many more times once the stream has ended; rows still unwritten then are reported
+    RESULT_WRITER_CLOSE_RETRIES: int = 5
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -11,6 +11,7 @@ from contextlib import asynccontextmanager
 from config import get_settings
 from app.db.database import init_db, close_db
 from app.api.endpoints import router as api_router
+from app.services.http_clients import http_client_pool
 
 # Get settings
 settings = get_settings()
@@ -28,6 +29,7 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     print("Shutting down...")
+    await http_client_pool.aclose()
     await close_db()
 
 
@@ -0,0 +1,86 @@
+"""
+Shared test fixtures
+- settings: the process Settings, restored after the test
+- db_engine / session_factory / db_session: in-memory SQLite database with the evaluation tables
+- fake_llm: starts an in-process FakeLLMServer and points the providers at it
+"""
+
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("DEEPSEEK_API_KEY", "test-key")
+
+import pytest
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base
+from app.models.eval_cycle import EvalCycle, EvalCycleSummary, EvalEntry
+from app.services.http_clients import http_client_pool
+from app.services.provider_registry import provider_registry
+from app.utils.fake_llm_server import FakeLLMConfig, FakeLLMServer
+from config import get_settings
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+@pytest.fixture
+def settings():
+    settings = get_settings()
+    saved = dict(vars(settings))
+    yield settings
+    for name, value in saved.items():
+        setattr(settings, name, value)
+
+
+@pytest.fixture
+async def db_engine():
+    # One shared connection, so every session sees the same in-memory database
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as connection:
+        await connection.run_sync(
+            Base.metadata.create_all,
+            tables=[EvalCycle.__table__, EvalEntry.__table__, EvalCycleSummary.__table__],
+        )
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def session_factory(db_engine):
+    return async_sessionmaker(db_engine, expire_on_commit=False)
+
+
+@pytest.fixture
+async def db_session(session_factory):
+    async with session_factory() as session:
+        yield session
+
+
+@pytest.fixture
+async def fake_llm(settings):
+    """
+    Start a FakeLLMServer: fake_llm(latency_ms=5, error_rate=0.2, ...)
+    Cache and client-side rate limiting are off unless the test turns them on
+    """
+    servers = []
+
+    def start(**config) -> FakeLLMServer:
+        server = FakeLLMServer(FakeLLMConfig(api_key="test-key", **config)).start()
+        servers.append(server)
+        settings.LLM_BASE_URL_OVERRIDES = server.base_url_overrides()
+        settings.LLM_CACHE_ENABLED = False
+        settings.LLM_RATE_LIMIT_ENABLED = False
+        provider_registry.clear()
+        return server
+
+    yield start
+    await http_client_pool.aclose()
+    provider_registry.clear()
+    for server in servers:
+        server.stop()
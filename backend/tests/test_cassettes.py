@@ -0,0 +1,40 @@
+import pytest
+
+from app.services.cassettes import request_key
+from app.services.http_clients import http_client_pool
+from app.services.llm_errors import LLMCallError
+from app.services.llm_service import LLMService
+from app.services.provider_registry import provider_registry
+
+
+async def _switch_mode(settings, mode):
+    # Pooled clients pick up the cassette mode when they are created
+    await http_client_pool.aclose()
+    provider_registry.clear()
+    settings.LLM_CASSETTE_MODE = mode
+
+
+def test_request_key_ignores_json_key_order():
+    assert request_key("POST", "/v1/chat", b'{"a": 1, "b": 2}') == request_key("POST", "/v1/chat", b'{"b":2,"a":1}')
+    assert request_key("POST", "/v1/chat", b'{"a": 1}') != request_key("POST", "/v1/other", b'{"a": 1}')
+
+
+async def test_recorded_traffic_replays_without_the_provider(fake_llm, settings, tmp_path):
+    server = fake_llm(latency_ms=20, latency_distribution="fixed")
+    settings.LLM_CASSETTE_PATH = str(tmp_path / "traffic.jsonl.gz")
+    questions = ["first question", "second question"]
+
+    await _switch_mode(settings, "record")
+    recorded = [await LLMService("openai").aevaluate("system", question, model="gpt-4") for question in questions]
+    assert server.stats["requests"] == 2
+
+    await _switch_mode(settings, "replay")
+    settings.LLM_CASSETTE_LATENCY_SCALE = 0.0
+    server.stop()
+    replayed = [await LLMService("openai").aevaluate("system", question, model="gpt-4") for question in questions]
+
+    assert [result["response"] for result in replayed] == [result["response"] for result in recorded]
+    assert [result["tokens_used"] for result in replayed] == [result["tokens_used"] for result in recorded]
+    # A request that was never recorded fails instead of reaching the network
+    with pytest.raises(LLMCallError, match="No recorded response"):
+        await LLMService("openai").aevaluate("system", "never asked", model="gpt-4")
@@ -0,0 +1,88 @@
+import time
+
+import pytest
+
+from app.services.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, circuit_events_since, last_circuit_event_seq
+)
+from app.services.llm_service import LLMService
+
+
+def _breaker(open_seconds=0.05, half_open_probes=2):
+    return CircuitBreaker(
+        "test", "http://provider", failure_rate=0.5, window_size=4, min_calls=4,
+        open_seconds=open_seconds, half_open_probes=half_open_probes
+    )
+
+
+def test_opens_once_the_failure_rate_is_reached():
+    breaker = _breaker()
+    for _ in range(2):
+        breaker.record_success()
+    breaker.record_failure("500")
+    assert breaker.state == CLOSED
+
+    breaker.record_failure("500")
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_rate_limits_do_not_count_as_failures():
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record_outcome(status_code=429)
+    assert breaker.state == CLOSED
+
+    for _ in range(4):
+        breaker.record_outcome(status_code=503)
+    assert breaker.state == OPEN
+
+
+def test_half_open_probes_close_the_circuit():
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record_failure("500")
+    time.sleep(0.06)
+
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    # One probe at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens_the_circuit():
+    breaker = _breaker()
+    seq = last_circuit_event_seq()
+    for _ in range(4):
+        breaker.record_failure("500")
+    time.sleep(0.06)
+
+    breaker.before_call()
+    breaker.record_failure("500")
+
+    assert breaker.state == OPEN
+    assert [event["state"] for event in circuit_events_since(seq, {"test"})] == [OPEN, HALF_OPEN, OPEN]
+
+
+async def test_failing_provider_fails_fast_once_open(fake_llm, settings):
+    server = fake_llm(latency_ms=1, latency_distribution="fixed", error_rate=1.0)
+    settings.LLM_CIRCUIT_MIN_CALLS = 2
+    settings.LLM_CIRCUIT_WINDOW_SIZE = 2
+    settings.LLM_RETRY_BASE_SECONDS = 0.01
+    service = LLMService("openai")
+
+    # Two 500s open the circuit; the third attempt is refused without a request
+    with pytest.raises(CircuitOpenError):
+        await service.aevaluate("system", "question", model="gpt-4")
+    assert server.stats["errors"] == 2
+
+    with pytest.raises(CircuitOpenError):
+        await service.aevaluate("system", "question", model="gpt-4")
+    assert server.stats["requests"] == 2
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+
+from app.api.endpoints import evaluate
+from app.services.llm_evaluation import LLMEvaluationService
+
+
+class _ConnectedRequest:
+    async def is_disconnected(self):
+        return False
+
+
+def _request(rows, **settings):
+    return evaluate.EvaluationRequest(
+        system_prompt="Answer briefly",
+        user_prompt_template="{Question}",
+        openai_key="test-key",
+        deepseek_key="test-key",
+        rows=[{"question": f"q{number}", "expected_answer": "a"} for number in range(1, rows + 1)],
+        **settings
+    )
+
+
+async def _events(request):
+    events = []
+    stream = evaluate.evaluate_rows_stream(
+        request, uuid.uuid4().hex, evaluate._list_rows(request.rows),
+        total_rows=len(request.rows), http_request=_ConnectedRequest()
+    )
+    async for frame in stream:
+        events.extend(json.loads(line) for line in frame.decode().splitlines())
+    return events
+
+
+@pytest.fixture
+def rows_evaluated(monkeypatch):
+    """Replace provider calls: row N takes delays[N] seconds (default 10 ms); records start/finish order"""
+    log = {"delays": {}, "active": 0, "max_active": 0, "started": [], "finished": []}
+
+    async def evaluate_row(self, system_prompt, user_prompt_template, question, expected_answer, **kwargs):
+        row_number = int(question[1:])
+        log["started"].append(row_number)
+        log["active"] += 1
+        log["max_active"] = max(log["max_active"], log["active"])
+        try:
+            await asyncio.sleep(log["delays"].get(row_number, 0.01))
+        finally:
+            log["active"] -= 1
+        log["finished"].append(row_number)
+        return {"model_a_response": "a", "model_b_response": "a", "winner": None}
+
+    monkeypatch.setattr(LLMEvaluationService, "evaluate_row", evaluate_row)
+    return log
+
+
+def _completed(events):
+    return [event["row_number"] for event in events if event["type"] == "row_complete"]
+
+
+async def test_unordered_rows_stream_as_they_finish(rows_evaluated):
+    rows_evaluated["delays"][1] = 0.2
+
+    events = await _events(_request(6, concurrency=3))
+
+    assert sorted(_completed(events)) == [1, 2, 3, 4, 5, 6]
+    assert _completed(events)[-1] == 1
+    assert rows_evaluated["max_active"] == 3
+    assert events[-1]["type"] == "complete"
+
+
+async def test_ordered_rows_wait_for_earlier_rows_within_the_window(rows_evaluated):
+    rows_evaluated["delays"][1] = 0.2
+
+    events = await _events(_request(6, concurrency=3, ordered=True))
+
+    assert _completed(events) == [1, 2, 3, 4, 5, 6]
+    # Rows 2 and 3 finished but wait to be emitted: their slots stay taken until row 1 is out
+    assert rows_evaluated["started"][:3] == [1, 2, 3]
+    assert rows_evaluated["finished"].index(1) < rows_evaluated["started"].index(4)
+
+
+async def test_ordered_stream_against_fake_provider(fake_llm):
+    server = fake_llm(latency_ms=20, latency_distribution="uniform", latency_sigma=0.9)
+
+    events = await _events(_request(8, concurrency=4, ordered=True))
+
+    assert _completed(events) == list(range(1, 9))
+    assert server.stats["ok"] == 16
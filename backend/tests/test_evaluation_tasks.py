@@ -0,0 +1,110 @@
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from app.models.eval_cycle import EvalEntry
+from app.services.eval_summary import SummaryAccumulator
+from app.services.result_writer import load_checkpoint
+from app.tasks.evaluation_tasks import _RowEvaluator, _evaluate_rows, _skip_rows
+
+
+@pytest.fixture
+def provider(fake_llm, settings):
+    settings.EVAL_PIPELINE_CALL_CONCURRENCY = 2
+    settings.EVAL_PIPELINE_QUEUE_SIZE = 2
+    settings.EVAL_PIPELINE_PERSIST_ROWS = 5
+    settings.EVAL_PIPELINE_PERSIST_MS = 20
+    return fake_llm(latency_ms=2, latency_distribution="fixed")
+
+
+def _evaluator(cycle_id):
+    return _RowEvaluator(
+        cycle_id, "gpt-4o-mini", None, "openai", None, 0.0, 0.0, 20, None, "Q: {Question}", "Answer", False
+    )
+
+
+async def _rows(count, on_row=None):
+    for row_number in range(1, count + 1):
+        if on_row:
+            on_row(row_number)
+        yield row_number, {"Question": f"q{row_number}", "Answer": "a"}
+
+
+async def _run(db_session, cycle_id, rows):
+    summary = SummaryAccumulator()
+    error, row_number = await _evaluate_rows(db_session, _evaluator(cycle_id), rows, summary, db_session.commit)
+    await db_session.commit()
+    return error, row_number, summary
+
+
+async def _entries(db_session, cycle_id):
+    result = await db_session.execute(
+        select(EvalEntry.row_number, EvalEntry.status).where(EvalEntry.eval_cycle_id == cycle_id)
+    )
+    return dict(result.all())
+
+
+async def test_bad_rows_are_recorded_as_failed_entries(db_session, provider):
+    cycle_id = uuid.uuid4()
+
+    async def rows():
+        async for row_number, row in _rows(12):
+            yield row_number, {"x": 1} if row_number == 4 else row
+
+    error, row_number, summary = await _run(db_session, cycle_id, rows())
+
+    assert (error, row_number) == (None, None)
+    entries = await _entries(db_session, cycle_id)
+    assert sorted(entries) == list(range(1, 13))
+    assert entries[4] == "failed"
+    assert (summary.rows, summary.failed_rows) == (12, 1)
+
+
+async def test_auth_error_aborts_the_cycle(db_session, provider):
+    cycle_id = uuid.uuid4()
+
+    def rotate_key(row_number):
+        # The key stops working while the cycle runs
+        if row_number == 10:
+            provider.app.state.fake.config.api_key = "rotated"
+
+    error, row_number, summary = await _run(db_session, cycle_id, _rows(200, rotate_key))
+
+    assert getattr(error, "aborts_cycle", False)
+    entries = await _entries(db_session, cycle_id)
+    assert entries[row_number] == "failed"
+    assert [row for row, status in entries.items() if status == "failed"] == [row_number]
+    # Calls stopped at the first rejected row instead of failing the other rows one by one
+    assert len(entries) < 30
+    assert provider.stats["unauthorized"] < 10
+    assert summary.rows == len(entries)
+
+
+async def test_resumed_cycle_only_evaluates_rows_without_an_entry(db_session, provider):
+    cycle_id = uuid.uuid4()
+
+    def rotate_key(row_number):
+        if row_number == 10:
+            provider.app.state.fake.config.api_key = "rotated"
+
+    error, _, _ = await _run(db_session, cycle_id, _rows(40, rotate_key))
+    assert error is not None
+    first_attempt = await _entries(db_session, cycle_id)
+
+    # The key is fixed and the cycle resumes from its checkpoint
+    provider.app.state.fake.config.api_key = "test-key"
+    done_rows, checkpoint = await load_checkpoint(db_session, cycle_id)
+    await db_session.commit()
+    assert done_rows == {row for row, status in first_attempt.items() if status == "completed"}
+
+    requests = provider.stats["requests"]
+    error, _, summary = await _run(db_session, cycle_id, _skip_rows(_rows(40), done_rows))
+
+    assert error is None
+    assert provider.stats["requests"] - requests == 40 - len(done_rows)
+    entries = await _entries(db_session, cycle_id)
+    assert sorted(entries) == list(range(1, 41))
+    assert set(entries.values()) == {"completed"}
+    checkpoint.merge(summary)
+    assert (checkpoint.rows, checkpoint.failed_rows) == (40, 0)
@@ -0,0 +1,71 @@
+import datetime
+import json
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from app.services.excel_service import ExcelService
+
+
+@pytest.fixture
+def sheet_path(tmp_path):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["Question", None, "Question", "Asked"])
+    sheet.append(["q1", 1, "dup", datetime.date(2024, 1, 2)])
+    sheet.append([None, None, None, None])
+    sheet.append(["q3", 3.5, None, datetime.datetime(2024, 1, 2, 3, 4, 5)])
+    sheet.append(["q4", None, None, datetime.time(9, 30)])
+    sheet.append([None, None, None, None])
+    path = tmp_path / "dataset.xlsx"
+    workbook.save(path)
+    return str(path)
+
+
+def _rows(file_path, **kwargs):
+    return [pair for chunk in ExcelService.iter_row_chunks(file_path, chunk_size=2, **kwargs) for pair in chunk]
+
+
+def test_rows_are_numbered_and_named_like_the_dataframe(sheet_path):
+    rows = _rows(sheet_path)
+    df = pd.read_excel(sheet_path)
+
+    assert [row_number for row_number, _ in rows] == [1, 3, 4]
+    assert list(rows[0][1]) == [str(column) for column in df.columns] == ["Question", "Unnamed: 1", "Question.1", "Asked"]
+    assert ExcelService.count_rows(sheet_path) == len(df) == 4
+
+
+def test_row_values_are_json_serializable(sheet_path):
+    rows = dict(_rows(sheet_path))
+
+    assert rows[1]["Asked"] == "2024-01-02T00:00:00"
+    assert rows[3]["Asked"] == "2024-01-02T03:04:05"
+    assert rows[4]["Asked"] == "09:30:00"
+    assert rows[4]["Unnamed: 1"] is None
+    json.dumps(rows)
+
+
+def test_row_range_keeps_sheet_row_numbers(sheet_path):
+    assert [row_number for row_number, _ in _rows(sheet_path, start_row=2, end_row=3)] == [3]
+    assert [row_number for row_number, _ in _rows(sheet_path, start_row=4)] == [4]
+
+
+def test_row_spill_returns_the_same_rows(sheet_path):
+    ExcelService.spill_rows(sheet_path)
+
+    for start_row, end_row in [(1, None), (2, 3), (4, 4), (5, None)]:
+        spilled = _rows(sheet_path, start_row=start_row, end_row=end_row)
+        ExcelService.remove_row_spill(sheet_path)
+        assert spilled == _rows(sheet_path, start_row=start_row, end_row=end_row)
+        ExcelService.spill_rows(sheet_path)
+
+
+def test_row_spill_is_ignored_once_the_file_changes(sheet_path):
+    ExcelService.spill_rows(sheet_path)
+    workbook = openpyxl.Workbook()
+    workbook.active.append(["Question"])
+    workbook.active.append(["new"])
+    workbook.save(sheet_path)
+
+    assert _rows(sheet_path) == [(1, {"Question": "new"})]
@@ -0,0 +1,79 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.services.hedging import HedgePolicy
+from app.services.latency import record_latency
+
+
+@pytest.fixture
+def model():
+    """A model name with 20 recorded 20 ms calls, so the hedge delay is 20 ms"""
+    name = f"model-{uuid.uuid4().hex[:8]}"
+    for _ in range(20):
+        record_latency("test", name, 20)
+    return name
+
+
+def _sender(*behaviours):
+    """send() running one (delay seconds, result or exception) per call, in order"""
+    calls = iter(behaviours)
+
+    async def send():
+        delay, outcome = next(calls)
+        await asyncio.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return send
+
+
+async def test_straggler_is_hedged_and_first_success_wins(model):
+    policy = HedgePolicy(percentile=95, max_extra_percent=100, min_samples=5)
+
+    result, timing, hedged = await asyncio.wait_for(
+        policy.run(_sender((10, "primary"), (0.01, "backup")), "test", model), timeout=2
+    )
+
+    assert (result, hedged) == ("backup", True)
+    assert timing.total_ms < 1000
+    assert policy.stats() == {"calls": 1, "hedges": 1, "hedge_wins": 1}
+
+
+async def test_failed_copy_does_not_beat_a_slower_success(model):
+    policy = HedgePolicy(percentile=95, max_extra_percent=100, min_samples=5)
+    send = _sender((0.2, "primary"), (0.01, "rate limited"))
+
+    result, _, hedged = await policy.run(send, "test", model, is_success=lambda result: result != "rate limited")
+
+    assert (result, hedged) == ("primary", True)
+    assert policy.stats()["hedge_wins"] == 0
+
+
+async def test_raising_copy_does_not_beat_a_slower_success(model):
+    policy = HedgePolicy(percentile=95, max_extra_percent=100, min_samples=5)
+
+    result, _, _ = await policy.run(_sender((0.2, "primary"), (0.01, RuntimeError("boom"))), "test", model)
+
+    assert result == "primary"
+
+
+async def test_hedges_stay_within_the_extra_spend_budget(model):
+    policy = HedgePolicy(percentile=95, max_extra_percent=50, min_samples=5)
+
+    for _ in range(4):
+        await policy.run(_sender((0.1, "primary"), (0.01, "backup")), "test", model)
+
+    assert policy.stats()["calls"] == 4
+    assert policy.stats()["hedges"] == 2
+
+
+async def test_no_hedge_without_latency_history():
+    policy = HedgePolicy(percentile=95, max_extra_percent=100, min_samples=5)
+
+    result, _, hedged = await policy.run(_sender((0.05, "primary")), "test", f"model-{uuid.uuid4().hex[:8]}")
+
+    assert (result, hedged) == ("primary", False)
+    assert policy.stats()["hedges"] == 0
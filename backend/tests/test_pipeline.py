@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from app.services.pipeline import Pipeline, Stage
+
+
+class _Source:
+    """Async iterator over items that records being closed"""
+
+    def __init__(self, items, fail_after=None):
+        self.items = iter(items)
+        self.read = 0
+        self.fail_after = fail_after
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.read == self.fail_after:
+            raise RuntimeError("source broke")
+        try:
+            item = next(self.items)
+        except StopIteration:
+            raise StopAsyncIteration
+        self.read += 1
+        return item
+
+    async def aclose(self):
+        self.closed = True
+
+
+def _pipeline(stages, batches, **options):
+    async def sink(batch):
+        batches.append(batch)
+
+    return Pipeline(stages, sink, **{"queue_size": 2, "batch_rows": 3, "batch_ms": 20, **options})
+
+
+async def test_items_pass_every_stage_into_batches():
+    async def double(item):
+        await asyncio.sleep(0.001)
+        return item * 2
+
+    batches = []
+    pipeline = _pipeline(
+        [Stage("double", double, concurrency=4), Stage("inc", lambda item: item + 1, threaded=True)], batches
+    )
+    source = _Source(range(10))
+    await pipeline.run(source)
+
+    assert sorted(item for batch in batches for item in batch) == [item * 2 + 1 for item in range(10)]
+    assert max(len(batch) for batch in batches) == 3
+    assert pipeline.stats["double"]["items"] == pipeline.stats["sink"]["items"] == 10
+    assert source.closed
+
+
+async def test_stop_ends_the_run_and_stops_reading_the_source():
+    batches = []
+
+    async def call(item):
+        if item == 5:
+            pipeline.stop()
+        await asyncio.sleep(0.001)
+        return item
+
+    pipeline = _pipeline([Stage("call", call)], batches)
+    source = _Source(range(1000))
+    await asyncio.wait_for(pipeline.run(source), 5)
+
+    assert pipeline.stopped
+    assert source.closed
+    # Bounded queues: only a few items were read ahead of the stop
+    assert source.read < 20
+    assert all(item <= 5 for batch in batches for item in batch)
+
+
+async def test_stage_error_is_raised_from_run():
+    def score(item):
+        if item == 3:
+            raise ValueError("bad item")
+        return item
+
+    pipeline = _pipeline([Stage("score", score)], [])
+    source = _Source(range(100))
+    with pytest.raises(ValueError, match="bad item"):
+        await asyncio.wait_for(pipeline.run(source), 5)
+    assert source.closed
+
+
+async def test_items_read_before_a_source_error_are_flushed():
+    batches = []
+    pipeline = _pipeline([Stage("call", lambda item: item)], batches)
+    with pytest.raises(RuntimeError, match="source broke"):
+        await pipeline.run(_Source(range(100), fail_after=7))
+
+    assert sorted(item for batch in batches for item in batch) == list(range(7))
@@ -0,0 +1,84 @@
+import time
+import uuid
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.llm_service import LLMService
+from app.services.rate_limiter import AdaptiveRateLimiter, TokenBucket, get_rate_limiter, parse_retry_after
+
+
+def test_token_bucket_queues_callers_past_the_limit():
+    bucket = TokenBucket(per_minute=60)
+    now = bucket.updated_at
+
+    assert all(bucket.reserve(1, now) == 0 for _ in range(60))
+    assert bucket.reserve(1, now) == pytest.approx(1.0)
+    # Reservations queue: the next caller waits behind the previous one
+    assert bucket.reserve(1, now) == pytest.approx(2.0)
+    # Refills at one token per second
+    assert bucket.reserve(1, now + 3) == pytest.approx(0.0)
+
+
+@pytest.mark.parametrize("headers, expected", [
+    ({"retry-after": "3"}, 3.0),
+    ({"retry-after-ms": "250", "retry-after": "1"}, 0.25),
+    ({"retry-after": "soon"}, None),
+    ({}, None),
+    (None, None),
+])
+def test_parse_retry_after(headers, expected):
+    assert parse_retry_after(headers) == expected
+
+
+def test_parse_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+
+    assert parse_retry_after({"retry-after": format_datetime(retry_at, usegmt=True)}) == pytest.approx(30, abs=2)
+
+
+def test_retry_after_pauses_every_caller_and_slows_down():
+    limiter = AdaptiveRateLimiter("test", "model", requests_per_minute=600, tokens_per_minute=100_000)
+
+    assert limiter.on_rate_limited({"retry-after-ms": "500"}) == 0.5
+    assert limiter._reserve(10) == pytest.approx(0.5, abs=0.05)
+    assert limiter._reserve(10) == pytest.approx(0.5, abs=0.05)
+    assert limiter.requests.capacity == pytest.approx(600 * AdaptiveRateLimiter.BACKOFF_FACTOR)
+
+    # Successes recover the limit step by step
+    limiter.on_success()
+    assert limiter.requests.capacity > 600 * AdaptiveRateLimiter.BACKOFF_FACTOR
+
+
+def test_limits_are_learned_from_response_headers():
+    limiter = AdaptiveRateLimiter("test", "model", requests_per_minute=10_000, tokens_per_minute=1_000_000)
+
+    limiter.on_success({
+        "x-ratelimit-limit-requests": "100",
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "2s",
+    })
+
+    assert limiter.max_rpm == pytest.approx(95)
+    assert limiter.paused_until - time.monotonic() == pytest.approx(2, abs=0.1)
+
+
+async def test_provider_429s_are_retried_after_retry_after(fake_llm, settings):
+    server = fake_llm(latency_ms=1, latency_distribution="fixed", rate_limit_rate=0.3, retry_after_ms=200, seed=1)
+    settings.LLM_RATE_LIMIT_ENABLED = True
+    model = f"gpt-test-{uuid.uuid4().hex[:8]}"
+    service = LLMService("openai")
+
+    started = time.monotonic()
+    for _ in range(10):
+        result = await service.aevaluate("system", "question", model=model)
+        assert result["response"]
+    elapsed = time.monotonic() - started
+
+    rate_limited = server.stats["rate_limited"]
+    assert rate_limited > 0
+    assert server.stats["ok"] == 10
+    # Each 429 paused the (shared) limiter for its Retry-After before the retry
+    assert elapsed >= rate_limited * 0.2
+    assert get_rate_limiter("openai", model).requests.capacity < settings.LLM_DEFAULT_RPM
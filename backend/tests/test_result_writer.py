@@ -0,0 +1,120 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from app.models.eval_cycle import EvalCycle, EvalCycleSummary, EvalEntry
+from app.services import result_writer
+from app.services.result_writer import ResultWriter, bulk_insert_entries, upsert_summary
+
+
+async def test_upsert_summary_inserts_then_updates_on_sqlite(db_session):
+    cycle_id = uuid.uuid4()
+
+    await upsert_summary(db_session, cycle_id, {"total_rows": 10, "total_cost": 1.5})
+    await upsert_summary(db_session, cycle_id, {"total_rows": 25, "total_cost": 4.0})
+    await db_session.commit()
+
+    summaries = (await db_session.execute(select(EvalCycleSummary))).scalars().all()
+    assert len(summaries) == 1
+    assert summaries[0].eval_cycle_id == cycle_id
+    assert (summaries[0].total_rows, summaries[0].total_cost) == (25, 4.0)
+
+
+@pytest.fixture
+async def cycle_id(db_session, monkeypatch, session_factory):
+    """An evaluation cycle the writer (using the test database) persists to"""
+    monkeypatch.setattr(result_writer, "async_session", session_factory)
+    cycle = EvalCycle(
+        id=uuid.uuid4(), project_id=uuid.uuid4(), dataset_id=uuid.uuid4(), prompt_version_id=uuid.uuid4(),
+        eval_config_id=uuid.uuid4(), name="cycle", total_rows=20
+    )
+    db_session.add(cycle)
+    await db_session.commit()
+    return cycle.id
+
+
+@pytest.fixture
+def flaky_database(monkeypatch):
+    """Make the next `failures["left"]` entry inserts raise"""
+    failures = {"left": 0, "calls": 0}
+    insert = result_writer.bulk_insert_entries
+
+    async def bulk_insert_entries(session, entries):
+        failures["calls"] += 1
+        if failures["left"]:
+            failures["left"] -= 1
+            raise OperationalError("INSERT", {}, Exception("database is unavailable"))
+        return await insert(session, entries)
+
+    monkeypatch.setattr(result_writer, "bulk_insert_entries", bulk_insert_entries)
+    return failures
+
+
+def _entry(cycle_id, row_number, **values):
+    return {
+        "eval_cycle_id": cycle_id, "row_number": row_number, "input_data": {}, "system_prompt": "s",
+        "user_prompt": "u", "status": "completed", "tokens_total_a": 10, **values
+    }
+
+
+def _writer(cycle_id, close_retries=5):
+    writer = ResultWriter(cycle_id, flush_rows=5, flush_ms=20)
+    writer.max_backoff_seconds = 0.05
+    writer.close_retries = close_retries
+    return writer
+
+
+async def _stored(db_session, cycle_id):
+    db_session.expire_all()
+    rows = await db_session.execute(select(EvalEntry.row_number).where(EvalEntry.eval_cycle_id == cycle_id))
+    return sorted(rows.scalars())
+
+
+async def test_failed_flushes_are_retried_without_losing_or_duplicating_rows(db_session, cycle_id, flaky_database):
+    flaky_database["left"] = 3
+    writer = _writer(cycle_id)
+    await writer.start()
+
+    for row_number in range(1, 21):
+        writer.submit(_entry(cycle_id, row_number))
+        await asyncio.sleep(0.002)
+    await writer.aclose("completed")
+
+    assert flaky_database["calls"] > 3
+    assert (writer.written, writer.unwritten) == (20, 0)
+    assert await _stored(db_session, cycle_id) == list(range(1, 21))
+    summary = (await db_session.execute(select(EvalCycleSummary))).scalar_one()
+    assert summary.total_tokens_a == 200
+    assert (await db_session.get(EvalCycle, cycle_id)).status == "completed"
+
+
+async def test_rows_the_database_never_takes_are_reported(db_session, cycle_id, flaky_database):
+    flaky_database["left"] = 10 ** 6
+    writer = _writer(cycle_id, close_retries=2)
+    await writer.start()
+
+    for row_number in range(1, 8):
+        writer.submit(_entry(cycle_id, row_number))
+    await writer.aclose("completed")
+
+    assert writer.unwritten == 7
+    assert await _stored(db_session, cycle_id) == []
+    assert (await db_session.get(EvalCycle, cycle_id)).status == "partial"
+
+
+async def test_rows_stored_by_an_earlier_run_are_not_counted_twice(db_session, cycle_id):
+    await bulk_insert_entries(db_session, [_entry(cycle_id, row_number) for row_number in range(1, 6)])
+    await db_session.commit()
+    writer = _writer(cycle_id)
+    await writer.start()
+
+    for row_number in range(1, 11):
+        writer.submit(_entry(cycle_id, row_number))
+    await writer.aclose("completed")
+
+    assert writer.written == 5
+    assert writer.summary.rows == 10
+    assert await _stored(db_session, cycle_id) == list(range(1, 11))
@@ -0,0 +1,98 @@
+import uuid
+
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.database import SchemaUpgradeError, upgrade_schema
+from app.services.result_writer import bulk_insert_entries, load_checkpoint
+
+# eval_entries as created before the unique row constraint and the latency / cache columns
+LEGACY_EVAL_ENTRIES = """
+CREATE TABLE eval_entries (
+    id CHAR(32) PRIMARY KEY,
+    eval_cycle_id CHAR(32) NOT NULL,
+    row_number INTEGER NOT NULL,
+    input_data JSON NOT NULL,
+    system_prompt TEXT NOT NULL,
+    user_prompt TEXT NOT NULL,
+    status VARCHAR(50),
+    created_at DATETIME NOT NULL,
+    updated_at DATETIME NOT NULL
+)
+"""
+
+CYCLE_ID = uuid.uuid4()
+
+
+@pytest.fixture
+async def legacy_engine():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.execute(text(LEGACY_EVAL_ENTRIES))
+    yield engine
+    await engine.dispose()
+
+
+async def _insert_legacy_row(connection, row_number, status="completed"):
+    await connection.execute(
+        text(
+            "INSERT INTO eval_entries VALUES (:id, :cycle, :row, '{}', 's', 'u', :status, "
+            "CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+        ),
+        {"id": uuid.uuid4().hex, "cycle": CYCLE_ID.hex, "row": row_number, "status": status},
+    )
+
+
+def _entry(row_number, status="completed"):
+    return {
+        "eval_cycle_id": CYCLE_ID,
+        "row_number": row_number,
+        "input_data": {"Question": f"q{row_number}"},
+        "system_prompt": "s",
+        "user_prompt": "u",
+        "status": status,
+    }
+
+
+async def test_upgrade_adds_missing_columns_and_row_constraint(legacy_engine):
+    async with legacy_engine.begin() as connection:
+        await _insert_legacy_row(connection, 1)
+        executed = await connection.run_sync(upgrade_schema)
+        columns = await connection.run_sync(lambda sync: {c["name"] for c in inspect(sync).get_columns("eval_entries")})
+        cache_hits = (await connection.execute(text("SELECT cache_hits FROM eval_entries"))).scalar_one()
+
+    assert any("uq_eval_entry_cycle_row" in ddl for ddl in executed)
+    assert {"cache_hits", "cache_misses", "connect_ms_a", "ttfb_ms_b"} <= columns
+    assert cache_hits == 0
+
+    async with legacy_engine.begin() as connection:
+        assert await connection.run_sync(upgrade_schema) == []
+
+
+async def test_upgrade_refuses_tables_with_duplicate_rows(legacy_engine):
+    async with legacy_engine.begin() as connection:
+        await _insert_legacy_row(connection, 1)
+        await _insert_legacy_row(connection, 1)
+        with pytest.raises(SchemaUpgradeError, match="uq_eval_entry_cycle_row"):
+            await connection.run_sync(upgrade_schema)
+
+
+async def test_resume_on_upgraded_table_only_stores_missing_rows(legacy_engine):
+    async with legacy_engine.begin() as connection:
+        for row_number, status in [(1, "completed"), (2, "completed"), (3, "failed")]:
+            await _insert_legacy_row(connection, row_number, status)
+        await connection.run_sync(upgrade_schema)
+
+    async with async_sessionmaker(legacy_engine)() as session:
+        done_rows, accumulator = await load_checkpoint(session, CYCLE_ID)
+        assert done_rows == {1, 2}
+        assert accumulator.rows == 2
+
+        # A redelivered attempt re-sends every row: only the failed and the new row are stored
+        inserted = await bulk_insert_entries(session, [_entry(row_number) for row_number in range(1, 5)])
+        await session.commit()
+        assert sorted(inserted) == [3, 4]
+
+        rows = (await session.execute(text("SELECT row_number, status FROM eval_entries ORDER BY row_number"))).all()
+        assert rows == [(1, "completed"), (2, "completed"), (3, "completed"), (4, "completed")]